@@ -0,0 +1,69 @@
+import asyncio
+import logging
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from app.services.ingest import UploadTooLarge, stage_upload
+from app.services.media_store import media_store
+from app.services.metrics import stage_metrics
+from app.services.waveform import project_peaks
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def upload_video(request: Request) -> JSONResponse:
+    filename = request.query_params.get("filename", "")
+    ticket = request.query_params.get("ticket", "")
+    try:
+        staged = await stage_upload(
+            request.stream(), filename, media_store.staging_dir, ticket
+        )
+    except UploadTooLarge as e:
+        return JSONResponse({"error": str(e)}, status_code=413)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return JSONResponse(staged)
+
+
+async def waveform_meta(request: Request) -> JSONResponse:
+    try:
+        peaks = await asyncio.to_thread(
+            project_peaks, request.path_params["project_id"]
+        )
+    except LookupError as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    return JSONResponse(peaks.meta())
+
+
+async def waveform_tile(request: Request) -> Response:
+    try:
+        peaks = await asyncio.to_thread(
+            project_peaks, request.path_params["project_id"]
+        )
+        tile = peaks.tile(request.path_params["level"], request.path_params["tile"])
+    except (LookupError, IndexError) as e:
+        return JSONResponse({"error": str(e)}, status_code=404)
+    return Response(
+        tile.tobytes(),
+        media_type="application/octet-stream",
+        headers={"Cache-Control": "private, max-age=3600"},
+    )
+
+
+async def metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(
+        stage_metrics.prometheus_text(), media_type="text/plain; version=0.0.4"
+    )
+
+
+api = Starlette(
+    routes=[
+        Route("/api/uploads/video", upload_video, methods=["PUT"]),
+        Route("/metrics", metrics),
+        Route("/api/waveform/{project_id}", waveform_meta),
+        Route("/api/waveform/{project_id}/{level:int}/{tile:int}", waveform_tile),
+    ]
+)
@@ -1,7 +1,18 @@
+import time
+
+_import_started = time.perf_counter()
+
 import reflex as rx
 from app.components.sidebar import sidebar
 from app.components.dashboard import dashboard
+from app.api import api
 from app.states.video_state import VideoState
+from app.services.media_store import sweep_staged_uploads
+from app.services.metrics import record_stage
+from app.services.project_store import recover_interrupted_projects
+from app.services.warmup import warm_up_heavy_imports
+
+record_stage("startup.import", time.perf_counter() - _import_started)
 
 
 def index() -> rx.Component:
@@ -24,6 +35,10 @@ app = rx.App(
             href="https://fonts.googleapis.com/css2?family=Raleway:wght@400;500;600;700&display=swap",
             rel="stylesheet",
         ),
+        rx.script(src="/waveform.js"),
     ],
+    api_transformer=api,
 )
-app.add_page(index, title="YT Shorts Generator")
\ No newline at end of file
+app.add_page(index, title="YT Shorts Generator", on_load=VideoState.load_projects)
+app.register_lifespan_task(warm_up_heavy_imports)
+app.register_lifespan_task(recover_interrupted_projects, upkeep=[sweep_staged_uploads])
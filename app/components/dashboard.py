@@ -1,7 +1,63 @@
 import reflex as rx
-from app.states.video_state import VideoState, Video, Clip
+from app.states.video_state import VideoState, Clip, StageTiming
 from app.states.analysis_state import AnalysisState
 
+# Slider ticks only re-rank in memory; the ranking is stored once it settles.
+WEIGHT_COMMIT_MS = 400
+
+
+def batch_input() -> rx.Component:
+    return rx.el.div(
+        rx.el.textarea(
+            placeholder="https://www.youtube.com/playlist?list=...\nhttps://www.youtube.com/@channel/videos",
+            on_change=VideoState.set_batch_text,
+            default_value=VideoState.batch_text,
+            rows=4,
+            class_name="w-full bg-white border border-gray-300 rounded-lg px-4 py-2 text-sm focus:ring-2 focus:ring-purple-500 focus:border-transparent",
+        ),
+        rx.el.div(
+            rx.checkbox(
+                "Analyze after download",
+                checked=VideoState.batch_auto_analyze,
+                on_change=VideoState.set_batch_auto_analyze,
+                color_scheme="purple",
+                size="1",
+                class_name="text-sm text-gray-600",
+            ),
+            rx.el.button(
+                rx.cond(
+                    VideoState.is_loading,
+                    rx.spinner(color="white", size="1"),
+                    rx.el.span("Import All"),
+                ),
+                on_click=VideoState.add_batch,
+                disabled=VideoState.is_loading,
+                class_name="bg-purple-600 text-white px-6 py-2 rounded-lg hover:bg-purple-700 transition-colors duration-200 disabled:bg-purple-300 disabled:cursor-not-allowed",
+            ),
+            class_name="flex justify-between items-center mt-2",
+        ),
+    )
+
+
+def local_upload() -> rx.Component:
+    return rx.el.div(
+        rx.el.span("or upload a file", class_name="text-xs text-gray-500"),
+        rx.el.input(
+            type="file",
+            id="local-video-input",
+            accept="video/*",
+            class_name="flex-grow text-sm text-gray-600 file:mr-3 file:px-3 file:py-1 file:rounded-md file:border-0 file:bg-purple-50 file:text-purple-700",
+        ),
+        rx.el.button(
+            rx.icon("upload", class_name="h-4 w-4 mr-1"),
+            "Upload",
+            on_click=VideoState.upload_local_video,
+            disabled=VideoState.is_loading,
+            class_name="text-sm text-purple-600 hover:text-purple-800 flex items-center disabled:text-purple-300",
+        ),
+        class_name="flex items-center gap-3 mt-3",
+    )
+
 
 def video_input_card() -> rx.Component:
     return rx.el.div(
@@ -15,24 +71,73 @@ def video_input_card() -> rx.Component:
             ),
             class_name="mb-4",
         ),
+        rx.cond(
+            VideoState.batch_mode,
+            batch_input(),
+            rx.el.div(
+                rx.el.input(
+                    placeholder="https://www.youtube.com/watch?v=...",
+                    on_change=VideoState.set_video_url,
+                    class_name="flex-grow bg-white border border-gray-300 rounded-l-lg px-4 py-2 focus:ring-2 focus:ring-purple-500 focus:border-transparent transition-shadow duration-200",
+                    default_value=VideoState.video_url,
+                ),
+                rx.el.button(
+                    rx.cond(
+                        VideoState.is_loading,
+                        rx.spinner(color="white", size="1"),
+                        rx.el.span("Import Video"),
+                    ),
+                    on_click=VideoState.add_video,
+                    disabled=VideoState.is_loading,
+                    class_name="bg-purple-600 text-white px-6 py-2 rounded-r-lg hover:bg-purple-700 focus:outline-none focus:ring-2 focus:ring-purple-500 focus:ring-offset-2 transition-colors duration-200 disabled:bg-purple-300 disabled:cursor-not-allowed",
+                ),
+                class_name="flex w-full",
+            ),
+        ),
+        rx.cond(
+            VideoState.batch_mode,
+            None,
+            local_upload(),
+        ),
         rx.el.div(
-            rx.el.input(
-                placeholder="https://www.youtube.com/watch?v=...",
-                on_change=VideoState.set_video_url,
-                class_name="flex-grow bg-white border border-gray-300 rounded-l-lg px-4 py-2 focus:ring-2 focus:ring-purple-500 focus:border-transparent transition-shadow duration-200",
-                default_value=VideoState.video_url,
+            rx.checkbox(
+                "Batch import (playlists, channels or one URL per line)",
+                checked=VideoState.batch_mode,
+                on_change=VideoState.set_batch_mode,
+                color_scheme="purple",
+                size="1",
+                class_name="text-sm text-gray-600",
             ),
-            rx.el.button(
-                rx.cond(
-                    VideoState.is_loading,
-                    rx.spinner(color="white", size="1"),
-                    rx.el.span("Import Video"),
+            class_name="mt-3",
+        ),
+        rx.cond(
+            VideoState.batch_total > 0,
+            rx.el.div(
+                rx.el.div(
+                    rx.el.span(
+                        f"Batch: {VideoState.batch_done} of {VideoState.batch_total} downloaded",
+                        class_name="text-xs text-purple-600",
+                    ),
+                    rx.cond(
+                        VideoState.batch_failed > 0,
+                        rx.el.span(
+                            f"{VideoState.batch_failed} failed",
+                            class_name="text-xs text-red-600",
+                        ),
+                        None,
+                    ),
+                    class_name="flex justify-between mb-1",
                 ),
-                on_click=VideoState.add_video,
-                disabled=VideoState.is_loading,
-                class_name="bg-purple-600 text-white px-6 py-2 rounded-r-lg hover:bg-purple-700 focus:outline-none focus:ring-2 focus:ring-purple-500 focus:ring-offset-2 transition-colors duration-200 disabled:bg-purple-300 disabled:cursor-not-allowed",
+                rx.el.div(
+                    rx.el.div(
+                        class_name="bg-purple-600 h-1.5 rounded-full transition-all duration-300",
+                        style={"width": f"{VideoState.batch_percent}%"},
+                    ),
+                    class_name="w-full bg-gray-200 rounded-full h-1.5",
+                ),
+                class_name="mt-3",
             ),
-            class_name="flex w-full",
+            None,
         ),
         rx.cond(
             VideoState.error,
@@ -69,7 +174,10 @@ def scoring_weights_card() -> rx.Component:
                 max=1,
                 step=0.05,
                 default_value=VideoState.sentiment_weight.to_string(),
-                on_change=VideoState.set_sentiment_weight.throttle(50),
+                on_change=[
+                    VideoState.set_sentiment_weight.throttle(50),
+                    VideoState.commit_weights.debounce(WEIGHT_COMMIT_MS),
+                ],
                 key="sentiment_weight_slider",
                 class_name="w-full h-2 bg-gray-200 rounded-lg appearance-none cursor-pointer accent-purple-600",
             ),
@@ -93,7 +201,10 @@ def scoring_weights_card() -> rx.Component:
                 max=1,
                 step=0.05,
                 default_value=VideoState.subjectivity_weight.to_string(),
-                on_change=VideoState.set_subjectivity_weight.throttle(50),
+                on_change=[
+                    VideoState.set_subjectivity_weight.throttle(50),
+                    VideoState.commit_weights.debounce(WEIGHT_COMMIT_MS),
+                ],
                 key="subjectivity_weight_slider",
                 class_name="w-full h-2 bg-gray-200 rounded-lg appearance-none cursor-pointer accent-purple-600",
             ),
@@ -116,16 +227,89 @@ def scoring_weights_card() -> rx.Component:
                 max=1,
                 step=0.05,
                 default_value=VideoState.wps_weight.to_string(),
-                on_change=VideoState.set_wps_weight.throttle(50),
+                on_change=[
+                    VideoState.set_wps_weight.throttle(50),
+                    VideoState.commit_weights.debounce(WEIGHT_COMMIT_MS),
+                ],
                 key="wps_weight_slider",
                 class_name="w-full h-2 bg-gray-200 rounded-lg appearance-none cursor-pointer accent-purple-600",
             ),
+            class_name="mb-4",
+        ),
+        rx.el.div(
+            rx.el.div(
+                rx.el.label(
+                    "Loudness Weight", class_name="text-sm font-medium text-gray-700"
+                ),
+                rx.el.span(
+                    f"{VideoState.loudness_weight:.2f}",
+                    class_name="text-sm font-bold text-purple-600",
+                ),
+                class_name="flex justify-between items-center mb-1",
+            ),
+            rx.el.input(
+                type="range",
+                min=0,
+                max=1,
+                step=0.05,
+                default_value=VideoState.loudness_weight.to_string(),
+                on_change=[
+                    VideoState.set_loudness_weight.throttle(50),
+                    VideoState.commit_weights.debounce(WEIGHT_COMMIT_MS),
+                ],
+                key="loudness_weight_slider",
+                class_name="w-full h-2 bg-gray-200 rounded-lg appearance-none cursor-pointer accent-purple-600",
+            ),
         ),
         class_name="bg-white p-6 rounded-lg shadow-[0px_1px_3px_rgba(0,0,0,0.12)] border border-gray-200/50",
     )
 
 
-def project_card(project: Video) -> rx.Component:
+def stage_timing_row(timing: StageTiming) -> rx.Component:
+    return rx.el.div(
+        rx.el.div(
+            rx.el.span(timing["stage"], class_name="text-gray-700 truncate"),
+            rx.el.span(
+                rx.cond(
+                    timing["runs"] > 1,
+                    f"{timing['seconds_str']} ({timing['runs']}x)",
+                    timing["seconds_str"],
+                ),
+                class_name=rx.cond(
+                    timing["errors"] > 0,
+                    "text-red-600 shrink-0",
+                    "text-gray-500 shrink-0",
+                ),
+            ),
+            class_name="flex justify-between gap-2",
+        ),
+        rx.el.div(
+            rx.el.div(
+                class_name="bg-purple-400 h-1 rounded-full",
+                style={"width": f"{timing['share']}%"},
+            ),
+            class_name="w-full bg-gray-100 rounded-full h-1",
+        ),
+        class_name="space-y-1",
+    )
+
+
+def stage_timings_panel() -> rx.Component:
+    return rx.el.div(
+        rx.cond(
+            VideoState.project_timings.length() > 0,
+            rx.foreach(VideoState.project_timings, stage_timing_row),
+            rx.el.p("No stages timed yet.", class_name="text-gray-500"),
+        ),
+        class_name="mt-3 pt-3 border-t border-gray-100 space-y-2 text-xs",
+    )
+
+
+def project_card(project_id: str) -> rx.Component:
+    project = VideoState.projects[project_id]
+    status = VideoState.project_status[project_id]
+    progress = VideoState.project_progress[project_id]
+    video_status = VideoState.project_video_status[project_id]
     return rx.el.div(
         rx.el.div(
             rx.image(
@@ -135,13 +319,13 @@ def project_card(project: Video) -> rx.Component:
             ),
             rx.el.div(
                 rx.match(
-                    project["status"],
+                    status,
                     (
                         "downloading",
                         rx.el.div(
                             rx.el.div(
                                 class_name=f"bg-purple-600 h-1.5 rounded-full transition-all duration-300",
-                                style={"width": f"{project['progress']}%"},
+                                style={"width": f"{progress}%"},
                             ),
                             class_name="w-full bg-gray-200 rounded-full h-1.5 mb-2",
                         ),
@@ -155,6 +339,15 @@ def project_card(project: Video) -> rx.Component:
                             class_name="w-full bg-gray-200 rounded-full h-1-5 mb-2",
                         ),
                     ),
+                    (
+                        "analyzing",
+                        rx.el.div(
+                            rx.el.div(
+                                class_name="w-full bg-purple-200 rounded-full h-1.5 animate-pulse"
+                            ),
+                            class_name="w-full bg-gray-200 rounded-full h-1-5 mb-2",
+                        ),
+                    ),
                     rx.el.div(),
                 ),
                 class_name="absolute top-0 left-0 w-full",
@@ -162,8 +355,34 @@ def project_card(project: Video) -> rx.Component:
             class_name="relative",
         ),
         rx.el.div(
-            rx.el.h3(
-                project["title"], class_name="font-semibold text-gray-800 truncate"
+            rx.el.div(
+                rx.el.h3(
+                    project["title"], class_name="font-semibold text-gray-800 truncate"
+                ),
+                rx.el.div(
+                    rx.el.button(
+                        rx.icon("gauge", class_name="h-4 w-4"),
+                        on_click=lambda: VideoState.toggle_timings(project_id),
+                        class_name="text-gray-400 hover:text-purple-600",
+                    ),
+                    rx.el.button(
+                        rx.icon("audio_waveform", class_name="h-4 w-4"),
+                        on_click=lambda: VideoState.show_timeline(project_id),
+                        disabled=project["audio_path"] == None,
+                        class_name="text-gray-400 hover:text-purple-600 disabled:text-gray-200",
+                    ),
+                    rx.el.button(
+                        rx.icon("trash_2", class_name="h-4 w-4"),
+                        on_click=lambda: VideoState.delete_project(project_id),
+                        disabled=(status == "downloading")
+                        | (status == "processing")
+                        | (status == "analyzing")
+                        | (video_status == "downloading"),
+                        class_name="text-gray-400 hover:text-red-600 disabled:text-gray-200",
+                    ),
+                    class_name="flex items-center gap-2 shrink-0",
+                ),
+                class_name="flex items-center justify-between gap-2",
             ),
             rx.el.div(
                 rx.el.div(
@@ -174,9 +393,9 @@ def project_card(project: Video) -> rx.Component:
                     class_name="flex items-center gap-2",
                 ),
                 rx.el.span(
-                    project["status"].capitalize(),
+                    status.capitalize(),
                     class_name=rx.match(
-                        project["status"],
+                        status,
                         (
                             "pending",
                             "text-xs font-medium bg-yellow-100 text-yellow-800 px-2 py-1 rounded-full",
@@ -202,6 +421,43 @@ def project_card(project: Video) -> rx.Component:
                 ),
                 class_name="flex items-center justify-between mt-3",
             ),
+            rx.cond(
+                (status != "pending") & (status != "downloading"),
+                rx.match(
+                    video_status,
+                    (
+                        "downloading",
+                        rx.el.p(
+                            f"Downloading video {VideoState.project_video_progress[project_id]}%",
+                            class_name="text-xs text-blue-600 mt-2",
+                        ),
+                    ),
+                    (
+                        "missing",
+                        rx.el.p(
+                            "Audio only, video is fetched on render",
+                            class_name="text-xs text-gray-500 mt-2",
+                        ),
+                    ),
+                    (
+                        "error",
+                        rx.el.p(
+                            "Video download failed, retried on render",
+                            class_name="text-xs text-red-600 mt-2",
+                        ),
+                    ),
+                    rx.el.div(),
+                ),
+                None,
+            ),
+            rx.cond(
+                status == "analyzing",
+                rx.el.p(
+                    f"{VideoState.project_segment_counts[project_id]} segments transcribed",
+                    class_name="text-xs text-purple-600 mt-2",
+                ),
+                None,
+            ),
             rx.cond(
                 project["error_message"],
                 rx.el.p(
@@ -210,18 +466,24 @@ def project_card(project: Video) -> rx.Component:
                 ),
                 None,
             ),
+            rx.cond(
+                VideoState.timings_project_id == project_id,
+                stage_timings_panel(),
+                None,
+            ),
             class_name="p-4",
         ),
         rx.cond(
-            (project["status"] == "complete") & (project["file_path"] != None),
+            (status == "complete")
+            & ((project["audio_path"] != None) | (project["file_path"] != None)),
             rx.el.div(
                 rx.el.button(
                     rx.cond(
-                        VideoState.processing_video_id == project["id"],
+                        VideoState.processing_video_id == project_id,
                         rx.spinner(color="white", size="1"),
                         rx.el.span("Analyze"),
                     ),
-                    on_click=lambda: AnalysisState.analyze_video(project["id"]),
+                    on_click=lambda: AnalysisState.analyze_video(project_id),
                     disabled=VideoState.processing_video_id != None,
                     class_name="w-full bg-purple-600 text-white text-sm font-semibold py-2 rounded-b-lg hover:bg-purple-700 transition-colors duration-200 disabled:bg-purple-300",
                 )
@@ -233,8 +495,10 @@ def project_card(project: Video) -> rx.Component:
 
 
 def clip_card(clip: Clip, index: int) -> rx.Component:
-    is_generating = clip["status"] == "generating"
-    is_pending = clip["status"] == "pending"
+    status = VideoState.clip_status[clip["id"]]
+    progress = VideoState.clip_progress[clip["id"]]
+    is_generating = (status == "generating") | (status == "queued")
+    is_pending = status == "pending"
     return rx.el.div(
         rx.el.div(
             rx.el.div(
@@ -252,6 +516,31 @@ def clip_card(clip: Clip, index: int) -> rx.Component:
                 class_name="flex justify-between items-center mb-2",
             ),
             rx.el.p(clip["text"], class_name="text-sm text-gray-600 line-clamp-2 mb-3"),
+            rx.cond(
+                is_generating,
+                rx.el.div(
+                    rx.el.div(
+                        rx.el.span(
+                            rx.cond(
+                                status == "queued",
+                                "Queued",
+                                f"Rendering {progress}%",
+                            ),
+                            class_name="text-xs text-purple-600",
+                        ),
+                        class_name="flex justify-between mb-1",
+                    ),
+                    rx.el.div(
+                        rx.el.div(
+                            class_name="bg-purple-600 h-1.5 rounded-full transition-all duration-300",
+                            style={"width": f"{progress}%"},
+                        ),
+                        class_name="w-full bg-gray-200 rounded-full h-1.5",
+                    ),
+                    class_name="mb-3",
+                ),
+                None,
+            ),
             rx.el.div(
                 rx.el.div(
                     rx.icon("clock", class_name="h-4 w-4 text-gray-500"),
@@ -280,25 +569,125 @@ def clip_card(clip: Clip, index: int) -> rx.Component:
     )
 
 
+def project_pagination() -> rx.Component:
+    return rx.el.div(
+        rx.el.button(
+            rx.icon("chevron_left", class_name="h-4 w-4"),
+            on_click=VideoState.previous_page,
+            disabled=~VideoState.has_previous_page,
+            class_name="p-1 rounded-md text-gray-600 hover:bg-gray-200 disabled:text-gray-300 disabled:hover:bg-transparent",
+        ),
+        rx.el.span(
+            f"Page {VideoState.project_page + 1} of {VideoState.page_count}",
+            class_name="text-sm text-gray-600",
+        ),
+        rx.el.button(
+            rx.icon("chevron_right", class_name="h-4 w-4"),
+            on_click=VideoState.next_page,
+            disabled=~VideoState.has_next_page,
+            class_name="p-1 rounded-md text-gray-600 hover:bg-gray-200 disabled:text-gray-300 disabled:hover:bg-transparent",
+        ),
+        class_name="flex items-center justify-center gap-3 mt-6",
+    )
+
+
+def timeline_panel() -> rx.Component:
+    return rx.el.div(
+        rx.el.div(
+            rx.el.h3("Timeline", class_name="font-semibold text-md text-gray-800"),
+            rx.el.div(
+                rx.el.span(
+                    "Scroll to zoom, drag to pan", class_name="text-xs text-gray-500"
+                ),
+                rx.el.button(
+                    rx.icon("x", class_name="h-4 w-4"),
+                    on_click=VideoState.hide_timeline,
+                    class_name="text-gray-400 hover:text-gray-700",
+                ),
+                class_name="flex items-center gap-3",
+            ),
+            class_name="flex justify-between items-center mb-2",
+        ),
+        rx.el.canvas(
+            id="waveform-canvas",
+            height="120",
+            class_name="w-full h-[120px] bg-gray-50 rounded-md cursor-grab touch-none",
+        ),
+        class_name="bg-white p-4 rounded-lg border border-gray-200 shadow-sm mb-6",
+    )
+
+
 def project_list() -> rx.Component:
     return rx.el.div(
-        rx.el.h2("My Projects", class_name="text-lg font-semibold text-gray-900 mb-4"),
+        rx.el.div(
+            rx.el.div(
+                rx.el.h2(
+                    "My Projects", class_name="text-lg font-semibold text-gray-900"
+                ),
+                rx.el.p(VideoState.storage_label, class_name="text-xs text-gray-500"),
+            ),
+            rx.el.div(
+                rx.checkbox(
+                    "Burn in captions",
+                    checked=VideoState.burn_captions,
+                    on_change=VideoState.set_burn_captions,
+                    color_scheme="purple",
+                    size="1",
+                    class_name="text-sm text-gray-600",
+                ),
+                rx.checkbox(
+                    "Crop to 9:16",
+                    checked=VideoState.crop_to_vertical,
+                    on_change=VideoState.set_crop_to_vertical,
+                    color_scheme="purple",
+                    size="1",
+                    class_name="text-sm text-gray-600",
+                ),
+                rx.checkbox(
+                    rx.cond(
+                        VideoState.has_render_effects,
+                        "Snap cuts to keyframes (off: crop/captions re-encode)",
+                        "Snap cuts to keyframes (fastest export)",
+                    ),
+                    checked=VideoState.snap_to_keyframes
+                    & ~VideoState.has_render_effects,
+                    disabled=VideoState.has_render_effects,
+                    on_change=VideoState.set_snap_to_keyframes,
+                    color_scheme="purple",
+                    size="1",
+                    class_name="text-sm text-gray-600",
+                ),
+                class_name="flex flex-col items-end gap-1",
+            ),
+            class_name="flex justify-between items-center mb-4",
+        ),
         rx.cond(
             VideoState.has_projects,
             rx.el.div(
                 rx.foreach(
-                    VideoState.formatted_video_projects,
+                    VideoState.project_ids,
                     lambda p: rx.el.div(
                         project_card(p),
                         rx.cond(
-                            p["clips"].length() > 0,
+                            VideoState.project_clips[p].length() > 0,
                             rx.el.div(
-                                rx.el.h3(
-                                    "Generated Clips",
-                                    class_name="font-semibold text-md text-gray-800 mt-4 mb-2 px-1",
+                                rx.el.div(
+                                    rx.el.h3(
+                                        "Generated Clips",
+                                        class_name="font-semibold text-md text-gray-800",
+                                    ),
+                                    rx.el.button(
+                                        rx.icon("layers", class_name="h-4 w-4 mr-1"),
+                                        "Render All",
+                                        on_click=lambda: AnalysisState.render_all_clips(
+                                            p
+                                        ),
+                                        class_name="text-xs text-purple-600 hover:text-purple-800 flex items-center",
+                                    ),
+                                    class_name="flex justify-between items-center mt-4 mb-2 px-1",
                                 ),
                                 rx.el.div(
-                                    rx.foreach(p["clips"], clip_card),
+                                    rx.foreach(VideoState.project_clips[p], clip_card),
                                     class_name="space-y-3",
                                 ),
                                 class_name="mt-4",
@@ -322,6 +711,7 @@ def project_list() -> rx.Component:
                 class_name="text-center py-16 border-2 border-dashed border-gray-300 rounded-lg",
             ),
         ),
+        rx.cond(VideoState.page_count > 1, project_pagination(), None),
     )
 
 
@@ -333,6 +723,7 @@ def dashboard() -> rx.Component:
             class_name="grid grid-cols-1 lg:grid-cols-2 gap-6",
         ),
         rx.el.div(class_name="my-8"),
+        rx.cond(VideoState.timeline_project_id, timeline_panel(), None),
         project_list(),
         class_name="p-6 md:p-8",
-    )
\ No newline at end of file
+    )
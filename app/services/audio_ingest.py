@@ -0,0 +1,34 @@
+import os
+from pathlib import Path
+
+import numpy as np
+
+from app.services.loudness import SAMPLE_RATE, pcm_chunks
+
+PCM_DTYPE = np.float32
+DECODE_CHUNK_BYTES = 4 * 1024 * 1024
+
+
+def decode_pcm(
+    media_path: str, output_path: Path, sample_rate: int = SAMPLE_RATE
+) -> int:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(".part")
+    written = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in pcm_chunks(
+                media_path, sample_rate, DECODE_CHUNK_BYTES, sample_format="f32le"
+            ):
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return written // np.dtype(PCM_DTYPE).itemsize
+
+
+def open_pcm(path: Path) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=PCM_DTYPE)
+    return np.memmap(path, dtype=PCM_DTYPE, mode="r")
@@ -0,0 +1,174 @@
+import bisect
+import functools
+import os
+from typing import NamedTuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from app.services.render import Effect
+
+CAPTION_FONT = os.environ.get("CAPTION_FONT")
+CAPTION_MAX_WORDS = int(os.environ.get("CAPTION_MAX_WORDS", "4"))
+CAPTION_MAX_GAP = 0.6
+CAPTION_RASTER_CACHE = 512
+
+
+class CaptionStyle(NamedTuple):
+    # Sizes are fractions of the frame so one style fits any output width.
+    font_scale: float = 0.075
+    fill: tuple[int, int, int] = (255, 255, 255)
+    highlight: tuple[int, int, int] = (255, 214, 0)
+    stroke: tuple[int, int, int] = (0, 0, 0)
+    stroke_scale: float = 0.12
+    line_spacing: float = 1.2
+    max_width: float = 0.9
+    bottom_margin: float = 0.22
+
+
+DEFAULT_CAPTION_STYLE = CaptionStyle()
+
+
+class CaptionPage(NamedTuple):
+    start: float
+    end: float
+    words: tuple[str, ...]
+    word_starts: tuple[float, ...]
+
+
+class CaptionRaster(NamedTuple):
+    color: np.ndarray
+    alpha: np.ndarray
+
+
+def caption_pages(
+    words: list[dict],
+    offset: float = 0.0,
+    max_words: int = CAPTION_MAX_WORDS,
+    max_gap: float = CAPTION_MAX_GAP,
+) -> list[CaptionPage]:
+    groups: list[list[dict]] = []
+    for word in words:
+        if not word["word"].strip():
+            continue
+        if (
+            not groups
+            or len(groups[-1]) >= max_words
+            or word["start"] - groups[-1][-1]["end"] > max_gap
+        ):
+            groups.append([])
+        groups[-1].append(word)
+    pages = []
+    for i, group in enumerate(groups):
+        end = group[-1]["end"]
+        # Hold a page on screen until the next one when the pause is short, so
+        # captions do not flicker between phrases.
+        if i + 1 < len(groups) and groups[i + 1][0]["start"] - end <= max_gap:
+            end = groups[i + 1][0]["start"]
+        pages.append(
+            CaptionPage(
+                start=group[0]["start"] - offset,
+                end=end - offset,
+                words=tuple(w["word"].strip() for w in group),
+                word_starts=tuple(w["start"] - offset for w in group),
+            )
+        )
+    return pages
+
+
+@functools.lru_cache(maxsize=16)
+def _font(size: int) -> ImageFont.FreeTypeFont:
+    if CAPTION_FONT:
+        return ImageFont.truetype(CAPTION_FONT, size)
+    return ImageFont.load_default(size=size)
+
+
+@functools.lru_cache(maxsize=CAPTION_RASTER_CACHE)
+def render_caption(
+    words: tuple[str, ...], highlight: int, style: CaptionStyle, frame_width: int
+) -> CaptionRaster:
+    size = max(8, round(frame_width * style.font_scale))
+    font = _font(size)
+    stroke = max(1, round(size * style.stroke_scale))
+    space = font.getlength(" ")
+    widths = [font.getlength(w) for w in words]
+    limit = frame_width * style.max_width - 2 * stroke
+    lines: list[list[int]] = [[]]
+    line_width = 0.0
+    for i, width in enumerate(widths):
+        if lines[-1] and line_width + space + width > limit:
+            lines.append([])
+            line_width = 0.0
+        line_width += width + (space if lines[-1] else 0)
+        lines[-1].append(i)
+    line_widths = [
+        sum(widths[i] for i in line) + space * (len(line) - 1) for line in lines
+    ]
+    line_height = round(size * style.line_spacing)
+    image = Image.new(
+        "RGBA",
+        (int(max(line_widths)) + 2 * stroke, line_height * len(lines) + 2 * stroke),
+        (0, 0, 0, 0),
+    )
+    draw = ImageDraw.Draw(image)
+    for row, (line, width) in enumerate(zip(lines, line_widths)):
+        x = (image.width - width) / 2
+        for i in line:
+            draw.text(
+                (x, stroke + row * line_height),
+                words[i],
+                font=font,
+                fill=style.highlight if i == highlight else style.fill,
+                stroke_width=stroke,
+                stroke_fill=style.stroke,
+            )
+            x += widths[i] + space
+    rgba = np.asarray(image, dtype=np.float32) / 255
+    alpha = rgba[..., 3:]
+    # Premultiplied so compositing is one multiply-add per pixel.
+    return CaptionRaster(color=rgba[..., :3] * alpha * 255, alpha=alpha)
+
+
+def composite(frame: np.ndarray, raster: CaptionRaster, x: int, y: int) -> np.ndarray:
+    h, w = raster.alpha.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, frame.shape[1]), min(y + h, frame.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return frame
+    color = raster.color[y0 - y : y1 - y, x0 - x : x1 - x]
+    alpha = raster.alpha[y0 - y : y1 - y, x0 - x : x1 - x]
+    out = frame.copy()
+    region = out[y0:y1, x0:x1]
+    region[:] = region * (1 - alpha) + color + 0.5
+    return out
+
+
+def caption_effect(
+    words: list[dict], offset: float = 0.0, style: CaptionStyle = DEFAULT_CAPTION_STYLE
+) -> Effect:
+    pages = caption_pages(words, offset)
+    starts = [p.start for p in pages]
+
+    def apply(clip):
+        if not pages:
+            return clip
+
+        def caption(get_frame, t):
+            frame = get_frame(t)
+            i = bisect.bisect_right(starts, t) - 1
+            if i < 0 or t >= pages[i].end:
+                return frame
+            page = pages[i]
+            highlight = bisect.bisect_right(page.word_starts, t) - 1
+            raster = render_caption(page.words, highlight, style, frame.shape[1])
+            h, w = raster.alpha.shape[:2]
+            return composite(
+                frame,
+                raster,
+                (frame.shape[1] - w) // 2,
+                round(frame.shape[0] * (1 - style.bottom_margin)) - h,
+            )
+
+        return clip.fl(caption)
+
+    return apply
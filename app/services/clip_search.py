@@ -0,0 +1,124 @@
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+
+class ClipWindow(NamedTuple):
+    first: int
+    last: int
+    start: float
+    end: float
+    score: float
+
+
+class WindowCandidates(NamedTuple):
+    first: np.ndarray
+    last: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+
+
+def duration_bounds(
+    starts: np.ndarray, ends: np.ndarray, min_duration: float, max_duration: float
+) -> tuple[np.ndarray, np.ndarray]:
+    n = len(starts)
+    lo = np.empty(n, dtype=np.int64)
+    hi = np.empty(n, dtype=np.int64)
+    j_lo = 0
+    j_hi = 0
+    # Segments are ordered by start, so both pointers only ever move forward.
+    for i in range(n):
+        j_lo = max(j_lo, i)
+        while j_lo < n and ends[j_lo] - starts[i] < min_duration:
+            j_lo += 1
+        j_hi = max(j_hi, i)
+        while j_hi < n and ends[j_hi] - starts[i] <= max_duration:
+            j_hi += 1
+        lo[i] = j_lo
+        hi[i] = j_hi - 1
+    return lo, hi
+
+
+def candidate_windows(
+    starts: Sequence[float],
+    ends: Sequence[float],
+    min_duration: float = 15.0,
+    max_duration: float = 60.0,
+) -> WindowCandidates:
+    starts_arr = np.asarray(starts, dtype=np.float64)
+    ends_arr = np.maximum.accumulate(np.asarray(ends, dtype=np.float64))
+    n = len(starts_arr)
+    lo, hi = duration_bounds(starts_arr, ends_arr, min_duration, max_duration)
+    index = np.arange(n)
+    valid = hi >= np.maximum(lo, index)
+    firsts = [np.empty(0, dtype=np.int64)]
+    lasts = [np.empty(0, dtype=np.int64)]
+    if valid.any():
+        for width in range(int((hi - index)[valid].max()) + 1):
+            last = index + width
+            mask = (last >= lo) & (last <= hi)
+            if mask.any():
+                firsts.append(index[mask])
+                lasts.append(last[mask])
+    first = np.concatenate(firsts)
+    last = np.concatenate(lasts)
+    return WindowCandidates(
+        first=first, last=last, start=starts_arr[first], end=ends_arr[last]
+    )
+
+
+def select_windows(
+    candidates: WindowCandidates,
+    scores: Sequence[float],
+    k: int = 5,
+    min_gap: float = 0.0,
+) -> list[ClipWindow]:
+    if len(candidates.first) == 0 or k <= 0:
+        return []
+    prefix = np.concatenate(([0.0], np.cumsum(np.asarray(scores, dtype=np.float64))))
+    cand_score = (prefix[candidates.last + 1] - prefix[candidates.first]) / (
+        candidates.last - candidates.first + 1
+    )
+    order = np.lexsort((candidates.last, candidates.first, -cand_score))
+    cand_first = candidates.first[order]
+    cand_last = candidates.last[order]
+    cand_start = candidates.start[order]
+    cand_end = candidates.end[order]
+    cand_score = cand_score[order]
+    alive = np.ones(len(order), dtype=bool)
+    windows: list[ClipWindow] = []
+    while len(windows) < k:
+        pos = int(np.argmax(alive))
+        if not alive[pos]:
+            break
+        start, end = cand_start[pos], cand_end[pos]
+        windows.append(
+            ClipWindow(
+                first=int(cand_first[pos]),
+                last=int(cand_last[pos]),
+                start=float(start),
+                end=float(end),
+                score=float(cand_score[pos]),
+            )
+        )
+        alive &= (cand_start >= end + min_gap) | (cand_end + min_gap <= start)
+    return windows
+
+
+def find_top_windows(
+    starts: Sequence[float],
+    ends: Sequence[float],
+    scores: Sequence[float],
+    k: int = 5,
+    min_duration: float = 15.0,
+    max_duration: float = 60.0,
+    min_gap: float = 0.0,
+) -> list[ClipWindow]:
+    if len(scores) == 0 or k <= 0:
+        return []
+    return select_windows(
+        candidate_windows(starts, ends, min_duration, max_duration),
+        scores,
+        k=k,
+        min_gap=min_gap,
+    )
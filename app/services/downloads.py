@@ -0,0 +1,56 @@
+import asyncio
+import logging
+import os
+import random
+from typing import Awaitable, Callable, TypeVar
+from urllib.parse import urlsplit
+
+logging.basicConfig(level=logging.INFO)
+
+T = TypeVar("T")
+
+DOWNLOAD_CONCURRENCY = int(os.environ.get("DOWNLOAD_CONCURRENCY", "3"))
+DOWNLOAD_HOST_INTERVAL = float(os.environ.get("DOWNLOAD_HOST_INTERVAL", "1.0"))
+DOWNLOAD_RETRIES = int(os.environ.get("DOWNLOAD_RETRIES", "3"))
+DOWNLOAD_BACKOFF_SECONDS = float(os.environ.get("DOWNLOAD_BACKOFF_SECONDS", "2.0"))
+BATCH_MAX_ENTRIES = int(os.environ.get("BATCH_MAX_ENTRIES", "200"))
+
+
+class HostRateLimiter:
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_start: dict[str, float] = {}
+
+    async def wait(self, url: str) -> None:
+        host = urlsplit(url).hostname or ""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        # Reserve the next start slot before sleeping so concurrent callers for
+        # the same host queue up behind each other instead of all waking at once.
+        start = max(now, self._next_start.get(host, now))
+        self._next_start[host] = start + self.min_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+async def with_retries(
+    attempt: Callable[[], Awaitable[T]],
+    name: str,
+    retries: int = DOWNLOAD_RETRIES,
+    backoff: float = DOWNLOAD_BACKOFF_SECONDS,
+) -> T:
+    for n in range(retries + 1):
+        try:
+            return await attempt()
+        except Exception as e:
+            if n == retries:
+                raise
+            delay = backoff * 2**n * random.uniform(0.5, 1.5)
+            logging.warning(
+                f"{name} failed (attempt {n + 1}/{retries + 1}), retrying in {delay:.1f}s: {e}"
+            )
+            await asyncio.sleep(delay)
+
+
+download_slots = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+host_limiter = HostRateLimiter(DOWNLOAD_HOST_INTERVAL)
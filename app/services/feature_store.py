@@ -0,0 +1,82 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.services.clip_search import ClipWindow, candidate_windows, select_windows
+from app.services.loudness import LoudnessProfile
+from app.services.scoring import (
+    FEATURE_COLUMNS,
+    ScoringWeights,
+    score_features,
+    segment_features,
+)
+
+
+class ProjectFeatures:
+    def __init__(
+        self,
+        segments: list[dict],
+        rows: list[list[float]],
+        min_duration: float = 15.0,
+        max_duration: float = 60.0,
+    ):
+        self.starts = np.array([s["start"] for s in segments], dtype=np.float64)
+        self.ends = np.array([s["end"] for s in segments], dtype=np.float64)
+        self.texts = [s["text"] for s in segments]
+        self.matrix = np.asarray(rows, dtype=np.float64).reshape(
+            len(segments), len(FEATURE_COLUMNS)
+        )
+        # Window bounds only depend on timings, so they are computed once and
+        # every weight change just re-scores the cached candidates.
+        self.candidates = candidate_windows(
+            self.starts, self.ends, min_duration, max_duration
+        )
+
+    def update_column(self, name: str, values: np.ndarray) -> None:
+        self.matrix[:, FEATURE_COLUMNS.index(name)] = values
+
+    def scores(self, weights: ScoringWeights) -> np.ndarray:
+        return score_features(self.matrix, weights)
+
+    def rank(
+        self, weights: ScoringWeights, k: int = 5, min_gap: float = 0.0
+    ) -> list[ClipWindow]:
+        return select_windows(self.candidates, self.scores(weights), k, min_gap)
+
+
+def features_from_segments(
+    segments: list[dict], loudness: LoudnessProfile | None = None
+) -> ProjectFeatures:
+    return ProjectFeatures(segments, segment_features(segments, loudness=loudness))
+
+
+class FeatureStore:
+    def __init__(self, max_projects: int = 64):
+        self.max_projects = max_projects
+        self._features: OrderedDict[str, ProjectFeatures] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, project_id: str) -> ProjectFeatures | None:
+        with self._lock:
+            features = self._features.get(project_id)
+            if features is not None:
+                self._features.move_to_end(project_id)
+            return features
+
+    def put(self, project_id: str, features: ProjectFeatures) -> None:
+        with self._lock:
+            self._features[project_id] = features
+            self._features.move_to_end(project_id)
+            while len(self._features) > self.max_projects:
+                self._features.popitem(last=False)
+
+    def discard(self, project_id: str) -> None:
+        with self._lock:
+            self._features.pop(project_id, None)
+
+
+feature_store = FeatureStore(
+    max_projects=int(os.environ.get("FEATURE_STORE_MAX_PROJECTS", "64"))
+)
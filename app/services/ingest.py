@@ -0,0 +1,213 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import subprocess
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, NamedTuple, TypedDict
+
+from app.services.render import ffmpeg_exe
+
+logging.basicConfig(level=logging.INFO)
+
+UPLOAD_CHUNK_SIZE = int(os.environ.get("UPLOAD_CHUNK_MB", "8")) * 1024 * 1024
+UPLOAD_MAX_BYTES = int(float(os.environ.get("UPLOAD_MAX_GB", "20")) * 1024**3)
+UPLOAD_STAGING_TTL = float(os.environ.get("UPLOAD_STAGING_TTL_HOURS", "6")) * 3600
+VIDEO_SUFFIXES = {".mp4", ".mov", ".mkv", ".webm", ".m4v", ".avi"}
+THUMBNAIL_WIDTH = 480
+FILENAME_MAX_CHARS = 255
+
+UPLOAD_ID = re.compile(r"[0-9a-f]{32}")
+
+_DURATION = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_VIDEO_SIZE = re.compile(r"Stream #\S+.*?: Video: .*?, (\d{2,5})x(\d{2,5})")
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UnknownUpload(LookupError):
+    pass
+
+
+class StagedUpload(TypedDict):
+    upload_id: str
+    filename: str
+    suffix: str
+    digest: str
+    size: int
+
+
+class MediaProbe(NamedTuple):
+    duration: float
+    width: int | None
+    height: int | None
+
+
+def staging_path(staging_dir: Path, upload_id: str) -> Path:
+    if not UPLOAD_ID.fullmatch(upload_id):
+        raise UnknownUpload(f"Invalid upload id: {upload_id!r}")
+    return staging_dir / f"{upload_id}.upload"
+
+
+def manifest_path(staging_dir: Path, upload_id: str) -> Path:
+    return staging_path(staging_dir, upload_id).with_suffix(".json")
+
+
+def clean_filename(filename: str) -> str:
+    name = "".join(ch for ch in Path(filename).name if ch.isprintable()).strip()
+    if not name or name in (".", ".."):
+        raise ValueError("Missing file name.")
+    return name[-FILENAME_MAX_CHARS:]
+
+
+async def stage_upload(
+    chunks: AsyncIterator[bytes],
+    filename: str,
+    staging_dir: Path,
+    ticket: str,
+    max_bytes: int = UPLOAD_MAX_BYTES,
+) -> StagedUpload:
+    if not ticket:
+        raise ValueError("Missing upload ticket.")
+    filename = clean_filename(filename)
+    suffix = Path(filename).suffix.lower()
+    if suffix not in VIDEO_SUFFIXES:
+        raise ValueError(f"Unsupported video type: {suffix or filename}")
+    staging_dir.mkdir(parents=True, exist_ok=True)
+    upload_id = uuid.uuid4().hex
+    path = staging_path(staging_dir, upload_id)
+    part = path.with_suffix(".part")
+    digest = hashlib.blake2b(digest_size=16)
+    size = 0
+    buffer = bytearray()
+    try:
+        with open(part, "wb") as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                buffer += chunk
+                if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                    await asyncio.to_thread(_write_block, f, digest, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await asyncio.to_thread(_write_block, f, digest, bytes(buffer))
+        os.replace(part, path)
+    finally:
+        part.unlink(missing_ok=True)
+    staged = StagedUpload(
+        upload_id=upload_id,
+        filename=filename,
+        suffix=suffix,
+        digest=digest.hexdigest(),
+        size=size,
+    )
+    # The client only gets the id back; everything the import trusts comes
+    # from this record, which only the server writes.
+    manifest_path(staging_dir, upload_id).write_text(
+        json.dumps({**staged, "ticket": ticket})
+    )
+    logging.info(f"Staged upload {filename} ({size} bytes) as {upload_id}")
+    return staged
+
+
+def claim_upload(staging_dir: Path, upload_id: str, ticket: str) -> StagedUpload:
+    manifest = manifest_path(staging_dir, upload_id)
+    try:
+        record = json.loads(manifest.read_text())
+    except (OSError, ValueError):
+        raise UnknownUpload(f"No staged upload {upload_id}") from None
+    if not ticket or not hmac.compare_digest(record.pop("ticket"), ticket):
+        raise UnknownUpload(f"No staged upload {upload_id}")
+    try:
+        # Whoever removes the manifest owns the staged file.
+        manifest.unlink()
+    except FileNotFoundError:
+        raise UnknownUpload(f"Upload {upload_id} was already imported") from None
+    try:
+        # Claimed files are moved in shortly; keep the sweep off them meanwhile.
+        os.utime(staging_path(staging_dir, upload_id))
+    except FileNotFoundError:
+        raise UnknownUpload(f"Staged upload {upload_id} expired") from None
+    return StagedUpload(**record)
+
+
+def staged_bytes(staging_dir: Path) -> int:
+    total = 0
+    for path in staging_dir.glob("*"):
+        try:
+            total += path.stat().st_size
+        except FileNotFoundError:
+            pass
+    return total
+
+
+def sweep_staging(staging_dir: Path, ttl: float = UPLOAD_STAGING_TTL) -> int:
+    # Uploads are claimed as soon as they finish; anything this old was
+    # abandoned (tab closed, callback lost) or is a half-written part.
+    cutoff = time.time() - ttl
+    removed = 0
+    for path in staging_dir.glob("*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _write_block(f, digest, block: bytes) -> None:
+    digest.update(block)
+    f.write(block)
+
+
+def probe_media(media_path: str) -> MediaProbe:
+    # `ffmpeg -i` with no output only parses the container headers.
+    result = subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-nostdin", "-i", media_path],
+        capture_output=True,
+        text=True,
+    )
+    duration = _DURATION.search(result.stderr)
+    if not duration:
+        raise ValueError("Could not read the video duration.")
+    h, m, s = duration.groups()
+    size = _VIDEO_SIZE.search(result.stderr)
+    return MediaProbe(
+        duration=int(h) * 3600 + int(m) * 60 + float(s),
+        width=int(size.group(1)) if size else None,
+        height=int(size.group(2)) if size else None,
+    )
+
+
+def extract_thumbnail(media_path: str, output_path: Path, at: float) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    subprocess.run(
+        [
+            ffmpeg_exe(),
+            "-hide_banner",
+            "-nostdin",
+            "-y",
+            "-v",
+            "error",
+            "-ss",
+            f"{at:.3f}",
+            "-i",
+            media_path,
+            "-frames:v",
+            "1",
+            "-vf",
+            f"scale={THUMBNAIL_WIDTH}:-2",
+            str(output_path),
+        ],
+        check=True,
+        capture_output=True,
+    )
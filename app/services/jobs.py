@@ -0,0 +1,152 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, NamedTuple
+
+logging.basicConfig(level=logging.INFO)
+
+PROCESS_WORKERS = int(os.environ.get("JOB_PROCESSES", os.cpu_count() or 1))
+
+
+class JobTimeout(Exception):
+    pass
+
+
+class JobResult(NamedTuple):
+    name: str
+    ok: bool
+    value: Any
+    error: str | None
+    elapsed: float
+    timed_out: bool
+    exception: BaseException | None
+
+    def unwrap(self) -> Any:
+        if self.ok:
+            return self.value
+        if self.timed_out:
+            raise JobTimeout(self.error)
+        raise self.exception
+
+
+class Job:
+    def __init__(self, name: str, future: asyncio.Future, timeout: float | None):
+        self.name = name
+        self.timeout = timeout
+        self.started = time.perf_counter()
+        self._future = future
+        self._result: JobResult | None = None
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def cancel(self) -> bool:
+        # Only work still queued in the executor can be withdrawn.
+        return self._future.cancel()
+
+    async def wait(self, seconds: float) -> bool:
+        await asyncio.wait({self._future}, timeout=seconds)
+        return self.done()
+
+    async def result(self) -> JobResult:
+        if self._result is not None:
+            return self._result
+        remaining = None
+        if self.timeout is not None:
+            remaining = max(0.0, self.timeout - (time.perf_counter() - self.started))
+        try:
+            value = await asyncio.wait_for(asyncio.shield(self._future), remaining)
+            self._result = self._finish(True, value=value)
+        except asyncio.TimeoutError:
+            # Executor work cannot be interrupted; the caller stops waiting and
+            # the worker finishes in the background.
+            logging.warning(f"Job {self.name} timed out after {self.timeout}s")
+            self._result = self._finish(
+                False,
+                error=f"{self.name} timed out after {self.timeout}s",
+                timed_out=True,
+            )
+        except Exception as e:
+            self._result = self._finish(
+                False, error=str(e) or type(e).__name__, exception=e
+            )
+        return self._result
+
+    async def value(self) -> Any:
+        return (await self.result()).unwrap()
+
+    def __await__(self):
+        return self.value().__await__()
+
+    def _finish(
+        self,
+        ok: bool,
+        value: Any = None,
+        error: str | None = None,
+        timed_out: bool = False,
+        exception: BaseException | None = None,
+    ) -> JobResult:
+        elapsed = time.perf_counter() - self.started
+        logging.info(f"Job {self.name} {'ok' if ok else 'failed'} in {elapsed:.2f}s")
+        return JobResult(
+            name=self.name,
+            ok=ok,
+            value=value,
+            error=error,
+            elapsed=elapsed,
+            timed_out=timed_out,
+            exception=exception,
+        )
+
+
+_thread_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("JOB_THREADS", "16")), thread_name_prefix="job"
+)
+_process_executor: ProcessPoolExecutor | None = None
+
+
+def _get_process_executor() -> ProcessPoolExecutor:
+    global _process_executor
+    if _process_executor is None:
+        _process_executor = ProcessPoolExecutor(
+            max_workers=PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_executor
+
+
+def _submit(
+    executor: Executor,
+    fn: Callable,
+    args: tuple,
+    kwargs: dict,
+    name: str | None,
+    timeout: float | None,
+) -> Job:
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+    return Job(name or getattr(fn, "__name__", "job"), future, timeout)
+
+
+def submit_thread(
+    fn: Callable,
+    *args,
+    name: str | None = None,
+    timeout: float | None = None,
+    **kwargs,
+) -> Job:
+    return _submit(_thread_executor, fn, args, kwargs, name, timeout)
+
+
+def submit_process(
+    fn: Callable,
+    *args,
+    name: str | None = None,
+    timeout: float | None = None,
+    **kwargs,
+) -> Job:
+    return _submit(_get_process_executor(), fn, args, kwargs, name, timeout)
@@ -0,0 +1,157 @@
+import subprocess
+
+import imageio_ffmpeg
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.05
+CHUNK_SECONDS = 30.0
+SILENCE_DB = -90.0
+
+
+class LoudnessProfile:
+    def __init__(self, rms: np.ndarray, peak: np.ndarray, frame_seconds: float):
+        self.rms = rms
+        self.peak = peak
+        self.frame_seconds = frame_seconds
+        self.prefix_power = np.concatenate(
+            ([0.0], np.cumsum(rms.astype(np.float64) ** 2))
+        )
+        frame_db = to_db(rms.astype(np.float64) ** 2)
+        audible = frame_db[frame_db > SILENCE_DB]
+        if len(audible):
+            self.floor_db = float(np.percentile(audible, 10))
+            self.ceiling_db = float(np.percentile(audible, 99))
+        else:
+            self.floor_db = self.ceiling_db = SILENCE_DB
+
+    @property
+    def duration(self) -> float:
+        return len(self.rms) * self.frame_seconds
+
+    def mean_db(self, starts, ends) -> np.ndarray:
+        n = len(self.rms)
+        first = np.clip(
+            np.floor(np.asarray(starts) / self.frame_seconds).astype(np.int64), 0, n
+        )
+        last = np.clip(
+            np.ceil(np.asarray(ends) / self.frame_seconds).astype(np.int64), 0, n
+        )
+        last = np.maximum(last, np.minimum(first + 1, n))
+        frames = np.maximum(last - first, 1)
+        power = (self.prefix_power[last] - self.prefix_power[first]) / frames
+        return to_db(power)
+
+    def segment_scores(self, starts, ends) -> np.ndarray:
+        span = self.ceiling_db - self.floor_db
+        if span <= 0:
+            return np.full(len(starts), 0.5)
+        return np.clip((self.mean_db(starts, ends) - self.floor_db) / span, 0.0, 1.0)
+
+
+def to_db(power: np.ndarray) -> np.ndarray:
+    return 10 * np.log10(np.maximum(power, 10 ** (SILENCE_DB / 10)))
+
+
+def frame_levels(
+    samples: np.ndarray, frame_length: int
+) -> tuple[np.ndarray, np.ndarray]:
+    frames = samples.reshape(-1, frame_length)
+    rms = np.sqrt(np.mean(frames * frames, axis=1, dtype=np.float64)).astype(np.float32)
+    peak = np.max(np.abs(frames), axis=1)
+    return rms, peak
+
+
+def pcm_chunks(
+    media_path: str, sample_rate: int, chunk_bytes: int, sample_format: str = "s16le"
+):
+    process = subprocess.Popen(
+        [
+            imageio_ffmpeg.get_ffmpeg_exe(),
+            "-nostdin",
+            "-v",
+            "error",
+            "-i",
+            media_path,
+            "-vn",
+            "-ac",
+            "1",
+            "-ar",
+            str(sample_rate),
+            "-f",
+            sample_format,
+            "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        while chunk := process.stdout.read(chunk_bytes):
+            yield chunk
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode(errors="replace")
+        process.stderr.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg audio decode failed: {stderr.strip()}")
+
+
+def loudness_from_chunks(
+    chunks, frame_length: int, frame_seconds: float
+) -> LoudnessProfile:
+    rms_parts = []
+    peak_parts = []
+    leftover = np.empty(0, dtype=np.float32)
+    for samples in chunks:
+        if len(leftover):
+            samples = np.concatenate((leftover, samples))
+        usable = len(samples) - len(samples) % frame_length
+        leftover = samples[usable:]
+        if usable:
+            rms, peak = frame_levels(samples[:usable], frame_length)
+            rms_parts.append(rms)
+            peak_parts.append(peak)
+    if len(leftover):
+        padded = np.zeros(frame_length, dtype=np.float32)
+        padded[: len(leftover)] = leftover
+        rms, peak = frame_levels(padded, frame_length)
+        rms_parts.append(rms)
+        peak_parts.append(peak)
+    empty = np.empty(0, dtype=np.float32)
+    return LoudnessProfile(
+        np.concatenate(rms_parts) if rms_parts else empty,
+        np.concatenate(peak_parts) if peak_parts else empty,
+        frame_seconds,
+    )
+
+
+def analyze_loudness(
+    media_path: str,
+    sample_rate: int = SAMPLE_RATE,
+    frame_seconds: float = FRAME_SECONDS,
+    chunk_seconds: float = CHUNK_SECONDS,
+) -> LoudnessProfile:
+    frame_length = int(sample_rate * frame_seconds)
+    frames_per_chunk = max(1, int(chunk_seconds / frame_seconds))
+    chunks = (
+        np.frombuffer(chunk, dtype=np.int16).astype(np.float32) / 32768.0
+        for chunk in pcm_chunks(
+            media_path, sample_rate, frame_length * frames_per_chunk * 2
+        )
+    )
+    return loudness_from_chunks(chunks, frame_length, frame_seconds)
+
+
+def analyze_loudness_array(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_seconds: float = FRAME_SECONDS,
+    chunk_seconds: float = CHUNK_SECONDS,
+) -> LoudnessProfile:
+    frame_length = int(sample_rate * frame_seconds)
+    chunk_length = frame_length * max(1, int(chunk_seconds / frame_seconds))
+    chunks = (
+        np.asarray(samples[i : i + chunk_length], dtype=np.float32)
+        for i in range(0, len(samples), chunk_length)
+    )
+    return loudness_from_chunks(chunks, frame_length, frame_seconds)
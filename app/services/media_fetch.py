@@ -0,0 +1,188 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+
+from app.services.paths import atomic_write, data_dir
+
+logging.basicConfig(level=logging.INFO)
+
+
+@lru_cache(maxsize=1)
+def _extractor_classes() -> tuple:
+    from yt_dlp.extractor import gen_extractor_classes
+
+    return tuple(ie for ie in gen_extractor_classes() if ie.ie_key() != "Generic")
+
+
+def url_key(url: str) -> str | None:
+    for ie in _extractor_classes():
+        if ie.suitable(url):
+            video_id = ie.get_temp_id(url)
+            return f"{ie.ie_key()}:{video_id}" if video_id else None
+    return None
+
+
+def info_key(info: dict) -> str:
+    return f"{info.get('extractor_key')}:{info.get('id')}"
+
+
+class InfoCache:
+    def __init__(self, directory: Path, ttl: float, max_entries: int = 256):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._aliases: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def lookup_key(self, url: str) -> str:
+        with self._lock:
+            alias = self._aliases.get(url)
+        return alias or url_key(url) or f"url:{url}"
+
+    def get(self, url: str) -> dict | None:
+        key = self.lookup_key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            entry = self._read(key)
+        if entry is None:
+            return None
+        fetched_at, info = entry
+        if time.time() - fetched_at > self.ttl:
+            self.invalidate(url)
+            return None
+        self._remember(key, entry)
+        return copy.deepcopy(info)
+
+    def put(self, url: str, info: dict) -> str:
+        key = info_key(info)
+        lookup = self.lookup_key(url)
+        # Callers keep using the info they just extracted; don't share it.
+        entry = (time.time(), copy.deepcopy(info))
+        self._remember(key, entry)
+        with self._lock:
+            self._aliases[url] = key
+        self._write(key, {"fetched_at": entry[0], "info": info})
+        if lookup != key:
+            self._write(lookup, {"alias": key})
+        return key
+
+    def invalidate(self, url: str) -> None:
+        key = self.lookup_key(url)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._aliases.pop(url, None)
+        self._path(key).unlink(missing_ok=True)
+
+    def _remember(self, key: str, entry: tuple[float, dict]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _write(self, key: str, data: dict) -> None:
+        with atomic_write(self._path(key)) as f:
+            f.write(json.dumps(data).encode())
+
+    def _read(self, key: str) -> tuple[float, dict] | None:
+        try:
+            data = json.loads(self._path(key).read_text())
+            if "alias" in data:
+                data = json.loads(self._path(data["alias"]).read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Discarding unreadable info cache entry {key}: {e}")
+            self._path(key).unlink(missing_ok=True)
+            return None
+        return data["fetched_at"], data["info"]
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+
+class MediaFetcher:
+    def __init__(self, cache: InfoCache, ydl_class: type | None = None):
+        self.cache = cache
+        self._ydl_class = ydl_class
+
+    @property
+    def ydl_class(self) -> type:
+        # yt_dlp registers every extractor on import; defer it to the first
+        # download instead of every server start.
+        if self._ydl_class is None:
+            from yt_dlp import YoutubeDL
+
+            self._ydl_class = YoutubeDL
+        return self._ydl_class
+
+    def warm_up(self) -> None:
+        self.ydl_class
+        _extractor_classes()
+
+    def extract(self, url: str, ydl_opts: dict) -> dict:
+        info = self.cache.get(url)
+        if info is not None:
+            logging.info(f"Info cache hit for {url}")
+            return info
+        with self.ydl_class(ydl_opts) as ydl:
+            info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+        self.cache.put(url, info)
+        return info
+
+    def expand(self, url: str, ydl_opts: dict, limit: int | None = None) -> list[dict]:
+        opts = {**ydl_opts, "extract_flat": "in_playlist", "noplaylist": False}
+        if limit:
+            opts["playlistend"] = limit
+        with self.ydl_class(opts) as ydl:
+            info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+        if info.get("_type") not in ("playlist", "multi_video"):
+            self.cache.put(url, info)
+            return [info]
+        entries = []
+        for entry in info.get("entries") or []:
+            if entry.get("_type") == "playlist":
+                # Channels list their tabs as nested playlists.
+                entries.extend(entry.get("entries") or [])
+            else:
+                entries.append(entry)
+        return [e for e in entries if e.get("url") or e.get("webpage_url")][:limit]
+
+    def download(self, url: str, ydl_opts: dict) -> dict:
+        from yt_dlp.utils import DownloadError
+
+        info = self.cache.get(url)
+        with self.ydl_class(ydl_opts) as ydl:
+            if info is None:
+                info = ydl.sanitize_info(ydl.extract_info(url, download=True))
+                self.cache.put(url, info)
+                return info
+            try:
+                # Reusing the extracted info skips a second round of webpage
+                # and player requests; only the media itself is fetched.
+                return ydl.sanitize_info(ydl.process_ie_result(info, download=True))
+            except DownloadError as e:
+                # Signed format URLs can expire before the cache TTL does.
+                logging.warning(f"Cached info failed for {url}, re-extracting: {e}")
+                self.cache.invalidate(url)
+                info = ydl.extract_info(info.get("webpage_url") or url, download=True)
+                return ydl.sanitize_info(info)
+
+
+media_fetcher = MediaFetcher(
+    InfoCache(
+        data_dir("ytdlp_info"),
+        ttl=float(os.environ.get("YTDLP_INFO_TTL", "1800")),
+    )
+)
@@ -0,0 +1,274 @@
+import hashlib
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Literal, TypedDict
+
+import reflex as rx
+
+from app.services.ingest import staged_bytes, sweep_staging
+from app.services.paths import data_dir
+from app.services.project_store import SqliteStore, project_store
+
+logging.basicConfig(level=logging.INFO)
+
+MediaKind = Literal["video", "audio", "short", "waveform"]
+KIND_DIRS: dict[str, str] = {
+    "video": "videos",
+    "audio": "audio",
+    "short": "shorts",
+    "waveform": "waveforms",
+}
+STAGING_DIR = "incoming"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS media_last_used ON media (last_used);
+
+CREATE TABLE IF NOT EXISTS media_refs (
+    media_key TEXT NOT NULL REFERENCES media (key) ON DELETE CASCADE,
+    owner TEXT NOT NULL,
+    PRIMARY KEY (media_key, owner)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS media_refs_owner ON media_refs (owner);
+"""
+
+
+class MediaRecord(TypedDict):
+    key: str
+    kind: MediaKind
+    path: str
+    size: int
+    last_used: float
+    owners: list[str]
+
+
+class StorageStats(TypedDict):
+    files: int
+    total_bytes: int
+    quota_bytes: int
+    staged_bytes: int
+    referenced_bytes: int
+    evictable_bytes: int
+    bytes_by_kind: dict[str, int]
+
+
+def file_digest(path: str | Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def media_filename(key: str, suffix: str) -> str:
+    name = re.sub(r"[^\w.-]+", "_", key).strip("_")
+    if len(name) > 80 or not name:
+        name = hashlib.sha1(key.encode()).hexdigest()
+    return f"{name}{suffix}"
+
+
+class MediaStore(SqliteStore):
+    def __init__(self, root: Path, db_path: Path, quota_bytes: int):
+        super().__init__(db_path, SCHEMA)
+        self.root = Path(root)
+        self.quota_bytes = quota_bytes
+
+    @property
+    def staging_dir(self) -> Path:
+        return self.root / STAGING_DIR
+
+    def path_for(self, kind: MediaKind, key: str, suffix: str) -> str:
+        return f"{KIND_DIRS[kind]}/{media_filename(key, suffix)}"
+
+    def absolute(self, path: str) -> Path:
+        return self.root / path
+
+    def get(self, key: str) -> MediaRecord | None:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT key, kind, path, size, last_used FROM media WHERE key = ?",
+                (key,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        if not self.absolute(row["path"]).exists():
+            # Removed behind our back; forget it so callers re-create it.
+            self._forget(key)
+            return None
+        return self._record(row)
+
+    def add(
+        self, key: str, kind: MediaKind, path: str, owner: str | None = None
+    ) -> MediaRecord:
+        now = time.time()
+        size = self.absolute(path).stat().st_size
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO media (key, kind, path, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                "path = excluded.path, size = excluded.size, last_used = excluded.last_used",
+                (key, kind, path, size, now, now),
+            )
+            if owner is not None:
+                conn.execute(
+                    "INSERT OR IGNORE INTO media_refs (media_key, owner) VALUES (?, ?)",
+                    (key, owner),
+                )
+        return self.get(key)
+
+    def acquire(self, key: str, owner: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO media_refs (media_key, owner) VALUES (?, ?)",
+                (key, owner),
+            )
+            conn.execute(
+                "UPDATE media SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+
+    def release(self, key: str, owner: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM media_refs WHERE media_key = ? AND owner = ?", (key, owner)
+            )
+
+    def release_owner(self, owner: str) -> int:
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM media_refs WHERE owner = ?", (owner,)
+            ).rowcount
+
+    def touch(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE media SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+
+    def touch_path(self, path: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE media SET last_used = ? WHERE path = ?", (time.time(), path)
+            )
+
+    def total_bytes(self) -> int:
+        # Staged uploads are not media yet, but they use the same disk.
+        return (
+            self._connect()
+            .execute("SELECT COALESCE(SUM(size), 0) FROM media")
+            .fetchone()[0]
+        ) + staged_bytes(self.staging_dir)
+
+    def enforce_quota(self) -> list[MediaRecord]:
+        excess = self.total_bytes() - self.quota_bytes
+        if excess <= 0:
+            return []
+        # Unreferenced media goes first, then rendered shorts, which can always
+        # be re-rendered from their source; source media in use is never evicted.
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT key, kind, path, size, last_used, "
+                "EXISTS (SELECT 1 FROM media_refs r WHERE r.media_key = m.key) AS referenced "
+                "FROM media m WHERE kind = 'short' OR NOT EXISTS "
+                "(SELECT 1 FROM media_refs r WHERE r.media_key = m.key) "
+                "ORDER BY referenced, last_used"
+            )
+            .fetchall()
+        )
+        evicted = []
+        for row in rows:
+            if excess <= 0:
+                break
+            record = self._record(row)
+            self.absolute(record["path"]).unlink(missing_ok=True)
+            self._forget(record["key"])
+            excess -= record["size"]
+            evicted.append(record)
+            logging.info(
+                f"Evicted {record['kind']} {record['key']} ({record['size']} bytes)"
+            )
+        return evicted
+
+    def stats(self) -> StorageStats:
+        conn = self._connect()
+        by_kind = {
+            row["kind"]: row["size"]
+            for row in conn.execute(
+                "SELECT kind, SUM(size) AS size FROM media GROUP BY kind"
+            )
+        }
+        files, total, referenced, evictable = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), "
+            "COALESCE(SUM(CASE WHEN referenced THEN size END), 0), "
+            "COALESCE(SUM(CASE WHEN kind = 'short' OR NOT referenced THEN size END), 0) "
+            "FROM (SELECT kind, size, EXISTS "
+            "(SELECT 1 FROM media_refs r WHERE r.media_key = m.key) AS referenced "
+            "FROM media m)"
+        ).fetchone()
+        staged = staged_bytes(self.staging_dir)
+        return StorageStats(
+            files=files,
+            total_bytes=total + staged,
+            quota_bytes=self.quota_bytes,
+            staged_bytes=staged,
+            referenced_bytes=referenced,
+            evictable_bytes=evictable,
+            bytes_by_kind=by_kind,
+        )
+
+    def _record(self, row) -> MediaRecord:
+        owners = [
+            r[0]
+            for r in self._connect().execute(
+                "SELECT owner FROM media_refs WHERE media_key = ?", (row["key"],)
+            )
+        ]
+        return MediaRecord(
+            key=row["key"],
+            kind=row["kind"],
+            path=row["path"],
+            size=row["size"],
+            last_used=row["last_used"],
+            owners=owners,
+        )
+
+    def _forget(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM media WHERE key = ?", (key,))
+
+
+media_store = MediaStore(
+    rx.get_upload_dir(),
+    data_dir() / "media.db",
+    quota_bytes=int(float(os.environ.get("MEDIA_QUOTA_GB", "20")) * 1024**3),
+)
+
+
+def reclaim_storage() -> list[MediaRecord]:
+    evicted = media_store.enforce_quota()
+    for record in evicted:
+        if record["kind"] == "short":
+            for clip_id in record["owners"]:
+                project_store.update_clip(clip_id, "pending", 0)
+    return evicted
+
+
+def sweep_staged_uploads() -> int:
+    removed = sweep_staging(media_store.staging_dir)
+    if removed:
+        logging.info(f"Removed {removed} abandoned staged upload files")
+    return removed
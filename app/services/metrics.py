@@ -0,0 +1,182 @@
+import bisect
+import contextlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, TypeVar
+
+from app.services.project_store import project_store
+
+logging.basicConfig(level=logging.INFO)
+
+T = TypeVar("T")
+
+# Upper bounds in seconds, wide enough for both a metadata lookup and a
+# multi-hour transcription.
+STAGE_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+METRIC_PREFIX = "shorts"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class StageMetrics:
+    def __init__(self, buckets: tuple[float, ...] = STAGE_BUCKETS):
+        self.buckets = buckets
+        self._durations: dict[tuple[str, str], Histogram] = {}
+        self._items: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(
+        self, stage: str, seconds: float, status: str, counts: dict[str, float]
+    ) -> None:
+        with self._lock:
+            histogram = self._durations.get((stage, status))
+            if histogram is None:
+                histogram = self._durations[(stage, status)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            for unit, value in counts.items():
+                self._items[(stage, unit)] = self._items.get((stage, unit), 0) + value
+
+    def prometheus_text(self) -> str:
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Wall time spent in each pipeline stage.",
+            f"# TYPE {name} histogram",
+        ]
+        with self._lock:
+            durations = sorted(self._durations.items())
+            items = sorted(self._items.items())
+            for (stage, status), histogram in durations:
+                labels = f'stage="{stage}",status="{status}"'
+                cumulative = 0
+                for bound, count in zip(self.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+        name = f"{METRIC_PREFIX}_stage_items_total"
+        lines += [
+            f"# HELP {name} Work done per stage, such as bytes or segments.",
+            f"# TYPE {name} counter",
+        ]
+        for (stage, unit), value in items:
+            lines.append(f'{name}{{stage="{stage}",unit="{unit}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+stage_metrics = StageMetrics()
+# Spans close on the event loop too, so timings are stored from one writer
+# thread in the order they were recorded.
+_timing_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="stage-timings")
+
+
+def _store_timing(
+    project_id: str,
+    stage: str,
+    seconds: float,
+    status: str,
+    clip_id: str | None,
+    counts: dict[str, float],
+) -> None:
+    try:
+        project_store.add_stage_timing(
+            project_id, stage, seconds, status, clip_id, counts
+        )
+    except Exception as e:
+        logging.exception(f"Could not store timing for {project_id}: {e}")
+
+
+def record_stage(
+    stage: str,
+    seconds: float,
+    project_id: str | None = None,
+    clip_id: str | None = None,
+    status: str = "ok",
+    counts: dict[str, float] | None = None,
+) -> None:
+    counts = counts or {}
+    stage_metrics.observe(stage, seconds, status, counts)
+    details = "".join(f" {k}={v}" for k, v in counts.items())
+    logging.info(
+        f"stage={stage} project={project_id} clip={clip_id} status={status} "
+        f"seconds={seconds:.3f}{details}"
+    )
+    if project_id is not None:
+        _timing_writer.submit(
+            _store_timing, project_id, stage, seconds, status, clip_id, dict(counts)
+        )
+
+
+class Span:
+    def __init__(self, counts: dict[str, float]):
+        self.counts = counts
+
+    def add(self, **counts: float) -> None:
+        for unit, value in counts.items():
+            self.counts[unit] = self.counts.get(unit, 0) + value
+
+
+@contextlib.contextmanager
+def stage_span(
+    stage: str,
+    project_id: str | None = None,
+    clip_id: str | None = None,
+    **counts: float,
+) -> Iterator[Span]:
+    span = Span(dict(counts))
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield span
+    except BaseException:
+        # Cancellation counts too: the time was spent either way.
+        status = "error"
+        raise
+    finally:
+        record_stage(
+            stage,
+            time.perf_counter() - started,
+            project_id,
+            clip_id,
+            status,
+            span.counts,
+        )
+
+
+class StageClock:
+    # Accumulates time for stages that run interleaved inside one loop, so
+    # they can be reported separately once the loop is done.
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed
+
+    def total(self) -> float:
+        return sum(self.seconds.values())
+
+
+def timed(
+    stage: str, project_id: str | None, fn: Callable[..., T], *args, **kwargs
+) -> T:
+    with stage_span(stage, project_id):
+        return fn(*args, **kwargs)
@@ -0,0 +1,144 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, NamedTuple, TypedDict
+
+if TYPE_CHECKING:
+    from faster_whisper import WhisperModel
+
+logging.basicConfig(level=logging.INFO)
+
+
+class ModelKey(NamedTuple):
+    model_size: str
+    device: str
+    compute_type: str
+    cpu_threads: int
+
+    def label(self) -> str:
+        return f"{self.model_size}/{self.device}/{self.compute_type}/{self.cpu_threads}"
+
+
+class RegistryStats(TypedDict):
+    hits: int
+    misses: int
+    evictions: int
+    resident: list[str]
+    load_seconds: dict[str, float]
+    total_load_seconds: float
+    total_wait_seconds: float
+
+
+DEFAULT_MODEL_KEY = ModelKey(
+    model_size=os.environ.get("WHISPER_MODEL_SIZE", "tiny"),
+    device=os.environ.get("WHISPER_DEVICE", "cpu"),
+    compute_type=os.environ.get("WHISPER_COMPUTE_TYPE", "int8"),
+    cpu_threads=int(os.environ.get("WHISPER_CPU_THREADS", "0")),
+)
+
+
+class ModelRegistry:
+    def __init__(self, max_models: int = 2):
+        self.max_models = max(1, max_models)
+        self._models: OrderedDict[ModelKey, "WhisperModel"] = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: dict[ModelKey, threading.Lock] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._load_seconds: dict[ModelKey, float] = {}
+        self._total_wait_seconds = 0.0
+
+    def get(
+        self,
+        model_size: str = DEFAULT_MODEL_KEY.model_size,
+        device: str = DEFAULT_MODEL_KEY.device,
+        compute_type: str = DEFAULT_MODEL_KEY.compute_type,
+        cpu_threads: int = DEFAULT_MODEL_KEY.cpu_threads,
+    ) -> "WhisperModel":
+        key = ModelKey(model_size, device, compute_type, cpu_threads)
+        started = time.perf_counter()
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self._hits += 1
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Loads of different keys run in parallel; concurrent requests for the
+        # same key wait for the first load instead of loading a second copy.
+        with key_lock:
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self._models.move_to_end(key)
+                    self._hits += 1
+                    self._total_wait_seconds += time.perf_counter() - started
+                    return model
+                self._misses += 1
+            model = self._load(key)
+            with self._lock:
+                self._models[key] = model
+                self._models.move_to_end(key)
+                self._evict()
+        return model
+
+    def preload(self, keys: list[ModelKey]) -> None:
+        for key in keys[: self.max_models]:
+            try:
+                self.get(*key)
+            except Exception as e:
+                logging.exception(f"Failed to preload Whisper model {key.label()}: {e}")
+
+    def evict(self, key: ModelKey) -> bool:
+        with self._lock:
+            if self._models.pop(key, None) is None:
+                return False
+            self._evictions += 1
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._evictions += len(self._models)
+            self._models.clear()
+
+    def stats(self) -> RegistryStats:
+        with self._lock:
+            return RegistryStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                resident=[k.label() for k in self._models],
+                load_seconds={k.label(): v for k, v in self._load_seconds.items()},
+                total_load_seconds=sum(self._load_seconds.values()),
+                total_wait_seconds=self._total_wait_seconds,
+            )
+
+    def _load(self, key: ModelKey) -> "WhisperModel":
+        from faster_whisper import WhisperModel
+
+        started = time.perf_counter()
+        model = WhisperModel(
+            key.model_size,
+            device=key.device,
+            compute_type=key.compute_type,
+            cpu_threads=key.cpu_threads,
+        )
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._load_seconds[key] = self._load_seconds.get(key, 0.0) + elapsed
+        logging.info(f"Loaded Whisper model {key.label()} in {elapsed:.2f}s")
+        return model
+
+    def _evict(self) -> None:
+        while len(self._models) > self.max_models:
+            key, _ = self._models.popitem(last=False)
+            self._evictions += 1
+            logging.info(f"Evicted Whisper model {key.label()}")
+
+
+model_registry = ModelRegistry(
+    max_models=int(os.environ.get("WHISPER_MAX_MODELS", "2"))
+)
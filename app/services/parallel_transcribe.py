@@ -0,0 +1,207 @@
+import logging
+import os
+import re
+from pathlib import Path
+from typing import AsyncIterator, NamedTuple
+
+import numpy as np
+
+from app.services.audio_ingest import open_pcm
+from app.services.jobs import PROCESS_WORKERS, submit_process
+from app.services.loudness import FRAME_SECONDS, SAMPLE_RATE
+from app.services.model_registry import DEFAULT_MODEL_KEY, ModelKey, model_registry
+from app.services.transcript_cache import SegmentRecord, WordRecord, segment_record
+
+logging.basicConfig(level=logging.INFO)
+
+TRANSCRIBE_CHUNK_SECONDS = float(os.environ.get("TRANSCRIBE_CHUNK_SECONDS", "300"))
+TRANSCRIBE_CHUNK_OVERLAP = float(os.environ.get("TRANSCRIBE_CHUNK_OVERLAP", "2.0"))
+TRANSCRIBE_SPLIT_SEARCH = float(os.environ.get("TRANSCRIBE_SPLIT_SEARCH", "10.0"))
+PARALLEL_TRANSCRIBE_MIN_SECONDS = float(
+    os.environ.get("PARALLEL_TRANSCRIBE_MIN_SECONDS", "600")
+)
+CHUNK_TIMEOUT = float(os.environ.get("TRANSCRIBE_CHUNK_TIMEOUT", "1800"))
+SILENCE_SMOOTHING_SECONDS = 0.3
+SEAM_TAIL_WORDS = 8
+
+_WORD = re.compile(r"\w+")
+
+
+class AudioChunk(NamedTuple):
+    # Sample offsets: the chunk is transcribed over [start, end) but only owns
+    # the words that fall in [keep_start, keep_end).
+    start: int
+    end: int
+    keep_start: int
+    keep_end: int
+
+
+def chunk_model_key(workers: int = PROCESS_WORKERS) -> ModelKey:
+    # Split the cores between the workers instead of letting every model
+    # spin up a thread per core.
+    threads = max(1, (os.cpu_count() or 1) // max(1, workers))
+    return DEFAULT_MODEL_KEY._replace(cpu_threads=threads)
+
+
+def should_parallelize(samples: int, workers: int = PROCESS_WORKERS) -> bool:
+    return workers > 1 and samples >= PARALLEL_TRANSCRIBE_MIN_SECONDS * SAMPLE_RATE
+
+
+def _quietest_point(audio: np.ndarray, lo: int, hi: int, sample_rate: int) -> int:
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+    frames = (hi - lo) // frame
+    if frames < 1:
+        return (lo + hi) // 2
+    window = np.asarray(audio[lo : lo + frames * frame], dtype=np.float32)
+    energy = np.square(window).reshape(frames, frame).mean(axis=1)
+    # Smoothing favours a sustained pause over a single quiet frame mid-word.
+    width = max(1, int(SILENCE_SMOOTHING_SECONDS / FRAME_SECONDS))
+    if frames > width:
+        energy = np.convolve(energy, np.ones(width) / width, mode="same")
+    return lo + int(np.argmin(energy)) * frame + frame // 2
+
+
+def plan_chunks(
+    audio: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    chunk_seconds: float = TRANSCRIBE_CHUNK_SECONDS,
+    overlap: float = TRANSCRIBE_CHUNK_OVERLAP,
+    search: float = TRANSCRIBE_SPLIT_SEARCH,
+) -> list[AudioChunk]:
+    total = len(audio)
+    size = int(chunk_seconds * sample_rate)
+    reach = int(search * sample_rate)
+    cuts = [0]
+    # Stop once the remainder is short enough to fold into the last chunk.
+    while total - cuts[-1] > size + size // 2:
+        target = cuts[-1] + size
+        lo = max(cuts[-1] + size // 2, target - reach)
+        hi = min(total, target + reach)
+        cuts.append(_quietest_point(audio, lo, hi, sample_rate))
+    cuts.append(total)
+    pad = int(overlap * sample_rate)
+    return [
+        AudioChunk(
+            start=max(0, a - pad), end=min(total, b + pad), keep_start=a, keep_end=b
+        )
+        for a, b in zip(cuts, cuts[1:])
+    ]
+
+
+def _shift(record: SegmentRecord, offset: float) -> SegmentRecord:
+    return SegmentRecord(
+        start=record["start"] + offset,
+        end=record["end"] + offset,
+        text=record["text"],
+        words=[
+            WordRecord(
+                start=w["start"] + offset,
+                end=w["end"] + offset,
+                word=w["word"],
+                probability=w["probability"],
+            )
+            for w in record["words"]
+        ],
+    )
+
+
+def transcribe_chunk(
+    pcm_path: str,
+    chunk: AudioChunk,
+    model_key: ModelKey,
+    options: dict,
+    sample_rate: int = SAMPLE_RATE,
+) -> list[SegmentRecord]:
+    # Runs in a worker process; the registry there is per process, so each
+    # worker loads its model once and keeps it for later chunks.
+    model = model_registry.get(*model_key)
+    audio = np.array(open_pcm(Path(pcm_path))[chunk.start : chunk.end])
+    segments, _ = model.transcribe(audio, **options)
+    offset = chunk.start / sample_rate
+    return [_shift(segment_record(s), offset) for s in segments]
+
+
+def _midpoint(item: dict) -> float:
+    return (item["start"] + item["end"]) / 2
+
+
+def _normalized(word: str) -> str:
+    return "".join(_WORD.findall(word.lower()))
+
+
+class SeamStitcher:
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self._tail: list[WordRecord] = []
+
+    def add(
+        self, chunk: AudioChunk, records: list[SegmentRecord]
+    ) -> list[SegmentRecord]:
+        lo = chunk.keep_start / self.sample_rate
+        hi = chunk.keep_end / self.sample_rate
+        kept = []
+        for record in records:
+            if not record["words"]:
+                if lo <= _midpoint(record) < hi:
+                    kept.append(record)
+                continue
+            words = [
+                w
+                for w in record["words"]
+                if lo <= _midpoint(w) < hi and not self._repeats(w)
+            ]
+            if not words:
+                continue
+            if len(words) != len(record["words"]):
+                record = SegmentRecord(
+                    start=words[0]["start"],
+                    end=words[-1]["end"],
+                    text="".join(w["word"] for w in words),
+                    words=words,
+                )
+            kept.append(record)
+            self._tail = (self._tail + words)[-SEAM_TAIL_WORDS:]
+        return kept
+
+    def _repeats(self, word: WordRecord) -> bool:
+        # Both sides of a seam can place the same spoken word on opposite sides
+        # of the cut; a matching word overlapping in time is the same one.
+        text = _normalized(word["word"])
+        return any(
+            _normalized(t["word"]) == text
+            and word["start"] < t["end"]
+            and word["end"] > t["start"]
+            for t in self._tail
+        )
+
+
+async def transcribe_parallel(
+    pcm_path: str,
+    chunks: list[AudioChunk],
+    model_key: ModelKey,
+    options: dict,
+    timeout: float = CHUNK_TIMEOUT,
+) -> AsyncIterator[SegmentRecord]:
+    jobs = [
+        submit_process(
+            transcribe_chunk,
+            pcm_path,
+            chunk,
+            model_key,
+            options,
+            name=f"whisper.chunk[{i + 1}/{len(chunks)}]",
+            # Later chunks queue behind earlier ones for a free worker.
+            timeout=timeout * (i // PROCESS_WORKERS + 1),
+        )
+        for i, chunk in enumerate(chunks)
+    ]
+    stitcher = SeamStitcher()
+    try:
+        # Chunks are consumed in order so segments stream out as soon as every
+        # earlier chunk is done.
+        for chunk, job in zip(chunks, jobs):
+            for record in stitcher.add(chunk, await job):
+                yield record
+    finally:
+        for job in jobs:
+            job.cancel()
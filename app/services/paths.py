@@ -0,0 +1,29 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+DATA_DIR = Path(os.environ.get("SHORTS_DATA_DIR", ".data"))
+
+
+def data_dir(*parts: str) -> Path:
+    path = DATA_DIR.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@contextmanager
+def atomic_write(path: Path) -> Iterator[IO[bytes]]:
+    # Concurrent writers of the same path each get their own temp file, so
+    # readers only ever see a complete file and the last replace wins.
+    f = tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f"{path.stem}.", suffix=".part", delete=False
+    )
+    tmp_path = Path(f.name)
+    try:
+        with f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,31 @@
+import math
+import os
+import time
+
+PROGRESS_MAX_HZ = float(os.environ.get("PROGRESS_MAX_HZ", "4"))
+PROGRESS_MIN_STEP = int(os.environ.get("PROGRESS_MIN_STEP", "1"))
+
+
+class ProgressThrottle:
+    def __init__(
+        self, max_hz: float = PROGRESS_MAX_HZ, min_step: int = PROGRESS_MIN_STEP
+    ):
+        self.min_interval = 1.0 / max_hz if max_hz > 0 else 0.0
+        self.min_step = min_step
+        self.last_value: int | None = None
+        self.last_time = -math.inf
+
+    def ready(self, value: int, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        if self.last_value is not None:
+            if value == self.last_value:
+                return False
+            # Completion always goes out so the bar never stalls just short of 100.
+            if value < 100 and (
+                abs(value - self.last_value) < self.min_step
+                or now - self.last_time < self.min_interval
+            ):
+                return False
+        self.last_value = value
+        self.last_time = now
+        return True
@@ -0,0 +1,473 @@
+import json
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from app.services.paths import data_dir
+
+logging.basicConfig(level=logging.INFO)
+
+PROJECT_COLUMNS = (
+    "id",
+    "url",
+    "title",
+    "thumbnail",
+    "duration",
+    "status",
+    "progress",
+    "file_path",
+    "audio_path",
+    "error_message",
+    "video_status",
+)
+CLIP_COLUMNS = (
+    "id",
+    "video_id",
+    "start",
+    "end",
+    "text",
+    "score",
+    "status",
+    "progress",
+)
+INTERRUPTED_PROJECT_STATUSES = ("downloading", "processing", "analyzing")
+INTERRUPTED_CLIP_STATUSES = ("queued", "generating")
+# Rows in flight carry a lease held by the worker running them. Workers renew
+# their own leases, so only rows whose worker stopped renewing get failed.
+LEASE_SECONDS = float(os.environ.get("PROJECT_LEASE_SECONDS", "60"))
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+# Columns added after the first release, with the statements that backfill them.
+MIGRATIONS = {
+    "projects": {
+        "video_status": (
+            "ALTER TABLE projects ADD COLUMN video_status TEXT NOT NULL DEFAULT 'missing'",
+            "UPDATE projects SET video_status = 'ready' WHERE file_path IS NOT NULL",
+        ),
+        "lease_owner": ("ALTER TABLE projects ADD COLUMN lease_owner TEXT",),
+        "lease_until": ("ALTER TABLE projects ADD COLUMN lease_until REAL",),
+    },
+    "clips": {
+        "lease_owner": ("ALTER TABLE clips ADD COLUMN lease_owner TEXT",),
+        "lease_until": ("ALTER TABLE clips ADD COLUMN lease_until REAL",),
+    },
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    thumbnail TEXT NOT NULL,
+    duration REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    file_path TEXT,
+    audio_path TEXT,
+    error_message TEXT,
+    video_status TEXT NOT NULL DEFAULT 'missing',
+    segment_count INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_created ON projects (created_at DESC);
+CREATE INDEX IF NOT EXISTS projects_status ON projects (status);
+
+CREATE TABLE IF NOT EXISTS segments (
+    project_id TEXT NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    start REAL NOT NULL,
+    "end" REAL NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (project_id, idx)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS words (
+    project_id TEXT NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    start REAL NOT NULL,
+    "end" REAL NOT NULL,
+    word TEXT NOT NULL,
+    PRIMARY KEY (project_id, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS words_start ON words (project_id, start);
+
+CREATE TABLE IF NOT EXISTS clips (
+    id TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    rank INTEGER NOT NULL,
+    start REAL NOT NULL,
+    "end" REAL NOT NULL,
+    text TEXT NOT NULL,
+    score REAL NOT NULL,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS clips_project ON clips (video_id, rank);
+CREATE INDEX IF NOT EXISTS clips_status ON clips (status);
+
+CREATE TABLE IF NOT EXISTS stage_timings (
+    project_id TEXT NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    clip_id TEXT,
+    seconds REAL NOT NULL,
+    status TEXT NOT NULL,
+    counts TEXT NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stage_timings_project ON stage_timings (project_id);
+"""
+
+
+def _quoted(columns: Iterable[str]) -> str:
+    return ", ".join(f'"{c}"' for c in columns)
+
+
+def _lease(in_flight: bool) -> tuple[str | None, float | None]:
+    if not in_flight:
+        return None, None
+    return WORKER_ID, time.time() + LEASE_SECONDS
+
+
+def _project_in_flight(fields: dict) -> bool:
+    return (
+        fields.get("status") in INTERRUPTED_PROJECT_STATUSES
+        or fields.get("video_status") == "downloading"
+    )
+
+
+class SqliteStore:
+    def __init__(self, path: Path, schema: str):
+        self.path = Path(path)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(schema)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+
+class ProjectStore(SqliteStore):
+    def __init__(self, path: Path):
+        super().__init__(path, SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        with self._connect() as conn:
+            for table, migrations in MIGRATIONS.items():
+                existing = {
+                    row["name"] for row in conn.execute(f"PRAGMA table_info({table})")
+                }
+                for column, statements in migrations.items():
+                    if column not in existing:
+                        for statement in statements:
+                            conn.execute(statement)
+
+    def create_project(self, project: dict) -> None:
+        now = time.time()
+        values = [project.get(c) for c in PROJECT_COLUMNS]
+        lease = _lease(_project_in_flight(project))
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO projects ({_quoted(PROJECT_COLUMNS)}, lease_owner, "
+                "lease_until, created_at, updated_at) "
+                f"VALUES ({', '.join('?' * len(PROJECT_COLUMNS))}, ?, ?, ?, ?)",
+                (*values, *lease, now, now),
+            )
+
+    def create_projects(self, projects: list[dict]) -> None:
+        for project in projects:
+            self.create_project(project)
+
+    def update_project(self, project_id: str, **fields: Any) -> None:
+        fields = {k: v for k, v in fields.items() if k in PROJECT_COLUMNS}
+        if not fields:
+            return
+        if _project_in_flight(fields):
+            fields["lease_owner"], fields["lease_until"] = _lease(True)
+        assignments = ", ".join(f'"{k}" = ?' for k in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE projects SET {assignments}, updated_at = ? WHERE id = ?",
+                (*fields.values(), time.time(), project_id),
+            )
+
+    def delete_project(self, project_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM projects WHERE id = ?", (project_id,))
+
+    def count_projects(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM projects").fetchone()[0]
+
+    def get_project(self, project_id: str) -> dict | None:
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT {_quoted(PROJECT_COLUMNS)}, segment_count FROM projects WHERE id = ?",
+                (project_id,),
+            )
+            .fetchall()
+        )
+        projects = self._with_clips(rows)
+        return projects[0] if projects else None
+
+    def list_projects(self, offset: int = 0, limit: int = 12) -> list[dict]:
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT {_quoted(PROJECT_COLUMNS)}, segment_count FROM projects "
+                "ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                (limit, offset),
+            )
+            .fetchall()
+        )
+        return self._with_clips(rows)
+
+    def _with_clips(self, rows: list[sqlite3.Row]) -> list[dict]:
+        projects = [dict(row) | {"clips": []} for row in rows]
+        if not projects:
+            return projects
+        by_id = {p["id"]: p for p in projects}
+        clip_rows = (
+            self._connect()
+            .execute(
+                f"SELECT {_quoted(CLIP_COLUMNS)} FROM clips WHERE video_id IN "
+                f"({', '.join('?' * len(by_id))}) ORDER BY video_id, rank",
+                tuple(by_id),
+            )
+            .fetchall()
+        )
+        for row in clip_rows:
+            by_id[row["video_id"]]["clips"].append(dict(row))
+        return projects
+
+    def segments(self, project_id: str) -> list[dict]:
+        rows = (
+            self._connect()
+            .execute(
+                'SELECT start, "end", text FROM segments WHERE project_id = ? ORDER BY idx',
+                (project_id,),
+            )
+            .fetchall()
+        )
+        return [dict(row) for row in rows]
+
+    def replace_segments(self, project_id: str, segments: list[dict]) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM segments WHERE project_id = ?", (project_id,))
+            conn.execute(
+                "UPDATE projects SET segment_count = 0 WHERE id = ?", (project_id,)
+            )
+            self._insert_segments(conn, project_id, segments)
+
+    def append_segments(self, project_id: str, segments: list[dict]) -> None:
+        if not segments:
+            return
+        with self._connect() as conn:
+            self._insert_segments(conn, project_id, segments)
+
+    def _insert_segments(
+        self, conn: sqlite3.Connection, project_id: str, segments: list[dict]
+    ) -> None:
+        offset = conn.execute(
+            "SELECT segment_count FROM projects WHERE id = ?", (project_id,)
+        ).fetchone()[0]
+        conn.executemany(
+            'INSERT INTO segments (project_id, idx, start, "end", text) VALUES (?, ?, ?, ?, ?)',
+            [
+                (project_id, offset + i, s["start"], s["end"], s["text"])
+                for i, s in enumerate(segments)
+            ],
+        )
+        conn.execute(
+            "UPDATE projects SET segment_count = ?, updated_at = ? WHERE id = ?",
+            (offset + len(segments), time.time(), project_id),
+        )
+
+    def words(self, project_id: str, start: float, end: float) -> list[dict]:
+        rows = (
+            self._connect()
+            .execute(
+                'SELECT start, "end", word FROM words WHERE project_id = ? '
+                "AND start >= ? AND start < ? ORDER BY start",
+                (project_id, start, end),
+            )
+            .fetchall()
+        )
+        return [dict(row) for row in rows]
+
+    def replace_words(self, project_id: str, words: list[dict]) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM words WHERE project_id = ?", (project_id,))
+            conn.executemany(
+                'INSERT INTO words (project_id, idx, start, "end", word) VALUES (?, ?, ?, ?, ?)',
+                [
+                    (project_id, i, w["start"], w["end"], w["word"])
+                    for i, w in enumerate(words)
+                ],
+            )
+
+    def replace_clips(self, project_id: str, clips: list[dict]) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM clips WHERE video_id = ?", (project_id,))
+            conn.executemany(
+                f"INSERT INTO clips ({_quoted(CLIP_COLUMNS)}, rank, lease_owner, "
+                f"lease_until) VALUES ({', '.join('?' * len(CLIP_COLUMNS))}, ?, ?, ?)",
+                [
+                    (
+                        *(clip[c] for c in CLIP_COLUMNS),
+                        rank,
+                        *_lease(clip["status"] in INTERRUPTED_CLIP_STATUSES),
+                    )
+                    for rank, clip in enumerate(clips)
+                ],
+            )
+
+    def update_clip(
+        self, clip_id: str, status: str, progress: int | None = None
+    ) -> None:
+        lease = _lease(status in INTERRUPTED_CLIP_STATUSES)
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE clips SET status = ?, progress = COALESCE(?, progress), "
+                "lease_owner = COALESCE(?, lease_owner), "
+                "lease_until = COALESCE(?, lease_until) WHERE id = ?",
+                (status, progress, *lease, clip_id),
+            )
+
+    def clips_by_status(self, status: str) -> list[dict]:
+        rows = (
+            self._connect()
+            .execute(
+                f"SELECT {_quoted(CLIP_COLUMNS)} FROM clips WHERE status = ?",
+                (status,),
+            )
+            .fetchall()
+        )
+        return [dict(row) for row in rows]
+
+    def add_stage_timing(
+        self,
+        project_id: str,
+        stage: str,
+        seconds: float,
+        status: str,
+        clip_id: str | None = None,
+        counts: dict[str, float] | None = None,
+    ) -> None:
+        # Spans can outlive their project (deleted mid-download), so the row is
+        # only written while the project still exists.
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO stage_timings "
+                "(project_id, stage, clip_id, seconds, status, counts, started_at) "
+                "SELECT ?, ?, ?, ?, ?, ?, ? WHERE EXISTS "
+                "(SELECT 1 FROM projects WHERE id = ?)",
+                (
+                    project_id,
+                    stage,
+                    clip_id,
+                    seconds,
+                    status,
+                    json.dumps(counts or {}),
+                    time.time() - seconds,
+                    project_id,
+                ),
+            )
+
+    def stage_breakdown(self, project_id: str) -> list[dict]:
+        rows = (
+            self._connect()
+            .execute(
+                "SELECT stage, SUM(seconds) AS seconds, COUNT(*) AS runs, "
+                "SUM(status != 'ok') AS errors FROM stage_timings "
+                "WHERE project_id = ? GROUP BY stage ORDER BY MIN(started_at)",
+                (project_id,),
+            )
+            .fetchall()
+        )
+        return [dict(row) for row in rows]
+
+    def renew_leases(self, worker_id: str = WORKER_ID) -> None:
+        until = time.time() + LEASE_SECONDS
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE projects SET lease_until = ? WHERE lease_owner = ? AND "
+                f"(status IN ({', '.join('?' * len(INTERRUPTED_PROJECT_STATUSES))}) "
+                "OR video_status = 'downloading')",
+                (until, worker_id, *INTERRUPTED_PROJECT_STATUSES),
+            )
+            conn.execute(
+                "UPDATE clips SET lease_until = ? WHERE lease_owner = ? AND "
+                f"status IN ({', '.join('?' * len(INTERRUPTED_CLIP_STATUSES))})",
+                (until, worker_id, *INTERRUPTED_CLIP_STATUSES),
+            )
+
+    def recover_interrupted(self) -> int:
+        # Background tasks do not survive their worker, so anything whose
+        # lease lapsed is surfaced as failed/pending instead of spinning
+        # forever. Rows from before leases existed count as lapsed.
+        now = time.time()
+        lapsed = "(lease_until IS NULL OR lease_until < ?)"
+        with self._connect() as conn:
+            projects = conn.execute(
+                "UPDATE projects SET status = 'error', "
+                "error_message = 'Interrupted by server restart.' "
+                f"WHERE status IN ({', '.join('?' * len(INTERRUPTED_PROJECT_STATUSES))}) "
+                f"AND {lapsed}",
+                (*INTERRUPTED_PROJECT_STATUSES, now),
+            ).rowcount
+            conn.execute(
+                "UPDATE projects SET video_status = 'missing' "
+                f"WHERE video_status = 'downloading' AND {lapsed}",
+                (now,),
+            )
+            conn.execute(
+                "UPDATE clips SET status = 'pending', progress = 0 "
+                f"WHERE status IN ({', '.join('?' * len(INTERRUPTED_CLIP_STATUSES))}) "
+                f"AND {lapsed}",
+                (*INTERRUPTED_CLIP_STATUSES, now),
+            )
+        return projects
+
+
+project_store = ProjectStore(
+    Path(os.environ.get("PROJECT_DB_PATH", data_dir() / "projects.db"))
+)
+
+
+async def recover_interrupted_projects(upkeep: Iterable[Callable[[], Any]] = ()):
+    # Runs for the worker's lifetime: renewing keeps this worker's jobs alive
+    # for the others, and the sweep picks up jobs of workers that went away.
+    while True:
+        try:
+            await asyncio.to_thread(project_store.renew_leases)
+            interrupted = await asyncio.to_thread(project_store.recover_interrupted)
+            if interrupted:
+                logging.info(f"Marked {interrupted} interrupted projects as failed")
+        except Exception as e:
+            logging.exception(f"Lease upkeep failed: {e}")
+        for step in upkeep:
+            try:
+                await asyncio.to_thread(step)
+            except Exception as e:
+                logging.exception(f"Upkeep step {step.__name__} failed: {e}")
+        await asyncio.sleep(LEASE_SECONDS / 3)
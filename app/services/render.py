@@ -0,0 +1,297 @@
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Literal, NamedTuple, TypedDict
+
+import imageio_ffmpeg
+
+if TYPE_CHECKING:
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+
+logging.basicConfig(level=logging.INFO)
+
+RenderMode = Literal["smart", "snap", "reencode"]
+Effect = Callable[["VideoFileClip"], "VideoFileClip"]
+ProgressFn = Callable[[float], None]
+
+KEYFRAME_MARGIN = 12.0
+MIN_COPY_SECONDS = 1.0
+# Seek just past a keyframe so rounding in the probed timestamp never lands
+# the stream copy on the previous GOP.
+SEEK_EPSILON = 0.001
+COPYABLE_CODECS = {"h264"}
+
+_PTS_TIME = re.compile(r"pts_time:([0-9.]+)")
+_VIDEO_STREAM = re.compile(r"Stream #\S+.*?: Video: (\w+)(.*)")
+_FPS = re.compile(r", ([0-9.]+) fps")
+
+
+class RenderResult(TypedDict):
+    mode: RenderMode
+    start: float
+    end: float
+    seconds: float
+
+
+class VideoInfo(NamedTuple):
+    codec: str | None
+    fps: float | None
+
+
+class FastPathUnavailable(Exception):
+    pass
+
+
+def ffmpeg_exe() -> str:
+    return imageio_ffmpeg.get_ffmpeg_exe()
+
+
+def run_ffmpeg(
+    args: list[str], duration: float = 0.0, progress: ProgressFn | None = None
+) -> None:
+    process = subprocess.Popen(
+        [ffmpeg_exe(), "-hide_banner", "-nostdin", "-y", "-v", "error"]
+        + ["-progress", "pipe:1", *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    for line in process.stdout:
+        if progress is None or duration <= 0 or not line.startswith("out_time_us="):
+            continue
+        value = line.split("=", 1)[1].strip()
+        if value.isdigit():
+            progress(min(int(value) / 1e6 / duration, 1.0))
+    stderr = process.stderr.read()
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr.strip()[-500:]}")
+
+
+def mux_streams(video_path: str, audio_path: str, output_path: Path) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f"{output_path.stem}.part{output_path.suffix}")
+    try:
+        run_ffmpeg(
+            ["-i", video_path, "-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+            + ["-c", "copy", "-movflags", "+faststart", str(tmp_path)]
+        )
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def probe_video(video_path: str) -> VideoInfo:
+    result = subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-nostdin", "-i", video_path],
+        capture_output=True,
+        text=True,
+    )
+    match = _VIDEO_STREAM.search(result.stderr)
+    if not match:
+        return VideoInfo(codec=None, fps=None)
+    fps = _FPS.search(match.group(2))
+    return VideoInfo(codec=match.group(1), fps=float(fps.group(1)) if fps else None)
+
+
+def probe_keyframes(video_path: str, start: float, end: float) -> list[float]:
+    probe_start = max(0.0, start - KEYFRAME_MARGIN)
+    result = subprocess.run(
+        [
+            ffmpeg_exe(),
+            "-hide_banner",
+            "-nostdin",
+            "-skip_frame",
+            "nokey",
+            "-ss",
+            f"{probe_start:.3f}",
+            "-t",
+            f"{end - probe_start + KEYFRAME_MARGIN:.3f}",
+            "-copyts",
+            "-i",
+            video_path,
+            "-map",
+            "0:v:0",
+            "-an",
+            "-vf",
+            "showinfo",
+            "-f",
+            "null",
+            "-",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise FastPathUnavailable(f"Keyframe probe failed: {result.stderr[-300:]}")
+    return sorted(float(t) for t in _PTS_TIME.findall(result.stderr))
+
+
+def _encode_video_part(video_path: str, start: float, end: float, output: Path) -> None:
+    run_ffmpeg(
+        ["-ss", f"{start:.6f}", "-i", video_path, "-t", f"{end - start:.6f}"]
+        + ["-map", "0:v:0", "-an", "-c:v", "libx264", "-preset", "veryfast"]
+        + ["-crf", "18", "-pix_fmt", "yuv420p", str(output)]
+    )
+
+
+def _copy_video_part(video_path: str, start: float, frames: int, output: Path) -> None:
+    # Copying a whole number of closed GOPs by frame count (rather than -t)
+    # keeps trailing B-frames of the next GOP out of the copied part.
+    run_ffmpeg(
+        ["-ss", f"{start + SEEK_EPSILON:.6f}", "-i", video_path]
+        + ["-frames:v", str(frames), "-map", "0:v:0", "-an", "-c", "copy"]
+        + ["-avoid_negative_ts", "make_zero", str(output)]
+    )
+
+
+def render_smart(
+    video_path: str,
+    start: float,
+    end: float,
+    output_path: str,
+    keyframes: list[float],
+    fps: float,
+    progress: ProgressFn | None = None,
+) -> RenderResult:
+    inside = [k for k in keyframes if start <= k <= end]
+    if len(inside) < 2 or inside[-1] - inside[0] < MIN_COPY_SECONDS:
+        raise FastPathUnavailable("No full GOP between the cut points")
+    first_key, last_key = inside[0], inside[-1]
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(dir=Path(output_path).parent) as tmp:
+        tmp_dir = Path(tmp)
+        report = progress or (lambda fraction: None)
+        parts = []
+        if first_key - start > SEEK_EPSILON:
+            parts.append(tmp_dir / "head.mp4")
+            _encode_video_part(video_path, start, first_key, parts[-1])
+        report(0.2)
+        parts.append(tmp_dir / "middle.mp4")
+        _copy_video_part(
+            video_path, first_key, round((last_key - first_key) * fps), parts[-1]
+        )
+        report(0.5)
+        if end - last_key > SEEK_EPSILON:
+            parts.append(tmp_dir / "tail.mp4")
+            _encode_video_part(video_path, last_key, end, parts[-1])
+        report(0.7)
+        audio = tmp_dir / "audio.m4a"
+        run_ffmpeg(
+            ["-ss", f"{start:.6f}", "-i", video_path, "-t", f"{end - start:.6f}"]
+            + ["-vn", "-c:a", "aac", "-b:a", "192k", str(audio)]
+        )
+        report(0.85)
+        concat_list = tmp_dir / "parts.txt"
+        concat_list.write_text("".join(f"file '{p.name}'\n" for p in parts))
+        # The concat demuxer converts each part to Annex B, so the re-encoded
+        # edges keep their own SPS/PPS next to the copied source GOPs.
+        run_ffmpeg(
+            ["-f", "concat", "-safe", "0", "-i", str(concat_list), "-i", str(audio)]
+            + ["-map", "0:v:0", "-map", "1:a:0?", "-c", "copy"]
+            + ["-movflags", "+faststart", output_path]
+        )
+    report(1.0)
+    return RenderResult(
+        mode="smart", start=start, end=end, seconds=time.perf_counter() - started
+    )
+
+
+def render_snap(
+    video_path: str,
+    start: float,
+    end: float,
+    output_path: str,
+    keyframes: list[float],
+    progress: ProgressFn | None = None,
+) -> RenderResult:
+    before = [k for k in keyframes if k <= start + SEEK_EPSILON]
+    if not before:
+        raise FastPathUnavailable("No keyframe at or before the clip start")
+    snapped = before[-1]
+    started = time.perf_counter()
+    run_ffmpeg(
+        ["-ss", f"{snapped + SEEK_EPSILON:.6f}", "-i", video_path]
+        + ["-t", f"{end - snapped:.6f}", "-map", "0:v:0", "-map", "0:a:0?"]
+        + ["-c", "copy", "-avoid_negative_ts", "make_zero"]
+        + ["-movflags", "+faststart", output_path],
+        duration=end - snapped,
+        progress=progress,
+    )
+    return RenderResult(
+        mode="snap", start=snapped, end=end, seconds=time.perf_counter() - started
+    )
+
+
+def moviepy_progress(progress: ProgressFn):
+    # moviepy and proglog load only in the render workers that re-encode.
+    from proglog import ProgressBarLogger
+
+    class MoviepyProgress(ProgressBarLogger):
+        def bars_callback(self, bar, attr, value, old_value=None):
+            total = self.bars[bar].get("total")
+            if bar == "t" and attr == "index" and total:
+                progress(min(value / total, 1.0))
+
+    return MoviepyProgress()
+
+
+def render_reencode(
+    video_path: str,
+    start: float,
+    end: float,
+    output_path: str,
+    effects: list[Effect] | None = None,
+    progress: ProgressFn | None = None,
+) -> RenderResult:
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+
+    started = time.perf_counter()
+    with VideoFileClip(video_path) as source:
+        video_clip = source.subclip(start, end)
+        for effect in effects or []:
+            video_clip = effect(video_clip)
+        video_clip.write_videofile(
+            output_path,
+            codec="libx264",
+            audio_codec="aac",
+            logger=moviepy_progress(progress) if progress else "bar",
+        )
+    return RenderResult(
+        mode="reencode", start=start, end=end, seconds=time.perf_counter() - started
+    )
+
+
+def render_clip(
+    video_path: str,
+    start: float,
+    end: float,
+    output_path: str,
+    mode: RenderMode = "smart",
+    effects: list[Effect] | None = None,
+    progress: ProgressFn | None = None,
+) -> RenderResult:
+    if mode != "reencode" and not effects:
+        try:
+            info = probe_video(video_path)
+            if info.codec not in COPYABLE_CODECS or not info.fps:
+                raise FastPathUnavailable("Source codec cannot be stream-copied")
+            keyframes = probe_keyframes(video_path, start, end)
+            if mode == "snap":
+                result = render_snap(
+                    video_path, start, end, output_path, keyframes, progress
+                )
+            else:
+                result = render_smart(
+                    video_path, start, end, output_path, keyframes, info.fps, progress
+                )
+            logging.info(f"Rendered {output_path} via {result['mode']} cut")
+            return result
+        except FastPathUnavailable as e:
+            logging.info(f"Falling back to full re-encode for {output_path}: {e}")
+        except Exception as e:
+            logging.exception(f"Fast render failed for {output_path}: {e}")
+    return render_reencode(video_path, start, end, output_path, effects, progress)
@@ -0,0 +1,273 @@
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Literal
+
+from app.services.render import RenderMode, RenderResult, render_clip
+
+logging.basicConfig(level=logging.INFO)
+
+JobStatus = Literal["queued", "running", "complete", "error"]
+PROGRESS_STEP = 0.01
+
+
+class RenderJob:
+    def __init__(
+        self,
+        job_id: str,
+        project_id: str,
+        video_path: str,
+        start: float,
+        end: float,
+        output_path: str,
+        mode: RenderMode,
+        priority: int,
+        crop: bool = False,
+        captions: list[dict] | None = None,
+    ):
+        self.job_id = job_id
+        self.project_id = project_id
+        self.video_path = video_path
+        self.start = start
+        self.end = end
+        self.output_path = output_path
+        self.mode = mode
+        self.priority = priority
+        self.crop = crop
+        self.captions = captions
+        self.status: JobStatus = "queued"
+        self.progress = 0.0
+        self.result: RenderResult | None = None
+        self.error: str | None = None
+        self.submitted_at = time.monotonic()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("complete", "error")
+
+
+def _render_worker(
+    job_id, video_path, start, end, output_path, mode, crop, captions, progress_queue
+):
+    last = -1.0
+
+    def report(fraction: float):
+        nonlocal last
+        if fraction - last >= PROGRESS_STEP or fraction >= 1.0:
+            last = fraction
+            progress_queue.put((job_id, fraction))
+
+    # Imported here so only the spawned workers load PIL and the crop planner.
+    from app.services.captions import caption_effect
+    from app.services.smart_crop import crop_effect, plan_crop
+
+    effects = []
+    if crop:
+        plan = plan_crop(video_path, start, end)
+        if plan is not None:
+            effects.append(crop_effect(plan))
+    if captions:
+        effects.append(caption_effect(captions, offset=start))
+    return render_clip(
+        video_path, start, end, output_path, mode, effects or None, progress=report
+    )
+
+
+class RenderScheduler:
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._jobs: dict[str, RenderJob] = {}
+        self._queue: list[tuple[int, int, str]] = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._progress_queue = None
+
+    def submit(
+        self,
+        job_id: str,
+        project_id: str,
+        video_path: str,
+        start: float,
+        end: float,
+        output_path: str,
+        mode: RenderMode = "smart",
+        priority: int = 0,
+        crop: bool = False,
+        captions: list[dict] | None = None,
+    ) -> RenderJob:
+        with self._lock:
+            existing = self._jobs.get(job_id)
+            if existing is not None and not existing.done:
+                return existing
+            job = RenderJob(
+                job_id,
+                project_id,
+                video_path,
+                start,
+                end,
+                output_path,
+                mode,
+                priority,
+                crop,
+                captions,
+            )
+            self._jobs[job_id] = job
+            heapq.heappush(self._queue, (priority, next(self._sequence), job_id))
+        self._dispatch()
+        return job
+
+    def job(self, job_id: str) -> RenderJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def queue_position(self, job_id: str) -> int | None:
+        with self._lock:
+            ordered = sorted(self._queue)
+            for position, (_, _, queued_id) in enumerate(ordered):
+                if queued_id == job_id:
+                    return position
+        return None
+
+    def forget(self, job_id: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.done:
+                del self._jobs[job_id]
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            self._queue = [entry for entry in self._queue if entry[2] != job_id]
+            heapq.heapify(self._queue)
+            job.status = "error"
+            job.error = "Cancelled"
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queued": len(self._queue),
+            }
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn keeps the workers free of the web server's threads and loop.
+            context = multiprocessing.get_context("spawn")
+            if self._progress_queue is None:
+                self._progress_queue = context.Manager().Queue()
+                threading.Thread(
+                    target=self._pump_progress, name="render-progress", daemon=True
+                ).start()
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=context
+            )
+        return self._executor
+
+    def _drop_executor(self, executor: ProcessPoolExecutor) -> None:
+        # A worker killed mid-render (OOM, a crash in ffmpeg) breaks the whole
+        # pool; the next dispatch starts a fresh one.
+        if self._executor is executor:
+            self._executor = None
+
+    def _start(self, executor: ProcessPoolExecutor, job: RenderJob) -> Future:
+        return executor.submit(
+            _render_worker,
+            job.job_id,
+            job.video_path,
+            job.start,
+            job.end,
+            job.output_path,
+            job.mode,
+            job.crop,
+            job.captions,
+            self._progress_queue,
+        )
+
+    def _submit(self, job: RenderJob) -> tuple[ProcessPoolExecutor, Future]:
+        executor = self._ensure_executor()
+        try:
+            return executor, self._start(executor, job)
+        except BrokenProcessPool as e:
+            logging.warning(f"Render pool broke, starting a new one: {e}")
+            self._drop_executor(executor)
+        # Only a pool left broken by an earlier crash refuses work.
+        executor = self._ensure_executor()
+        return executor, self._start(executor, job)
+
+    def _dispatch(self) -> None:
+        started = []
+        with self._lock:
+            while self._running < self.max_workers and self._queue:
+                _, _, job_id = heapq.heappop(self._queue)
+                job = self._jobs[job_id]
+                try:
+                    executor, future = self._submit(job)
+                except Exception as e:
+                    logging.exception(f"Could not start render job {job_id}: {e}")
+                    job.error = str(e)
+                    job.status = "error"
+                    job.finished_at = time.monotonic()
+                    continue
+                job.status = "running"
+                job.started_at = time.monotonic()
+                self._running += 1
+                started.append((job, executor, future))
+        # Outside the lock: a future that already failed runs its callback
+        # right here, and the callback takes the lock.
+        for job, executor, future in started:
+            future.add_done_callback(
+                lambda f, job=job, executor=executor: self._on_done(job, executor, f)
+            )
+
+    def _on_done(
+        self, job: RenderJob, executor: ProcessPoolExecutor, future: Future
+    ) -> None:
+        with self._lock:
+            self._running -= 1
+            job.finished_at = time.monotonic()
+            try:
+                job.result = future.result()
+                job.progress = 1.0
+                job.status = "complete"
+            except BrokenProcessPool as e:
+                logging.error(f"Render worker for {job.job_id} died: {e}")
+                job.error = "Render worker crashed"
+                job.status = "error"
+                self._drop_executor(executor)
+            except Exception as e:
+                logging.exception(f"Render job {job.job_id} failed: {e}")
+                job.error = str(e)
+                job.status = "error"
+        self._dispatch()
+
+    def _pump_progress(self) -> None:
+        while True:
+            try:
+                job_id, fraction = self._progress_queue.get()
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None and job.status == "running":
+                    job.progress = max(job.progress, fraction)
+
+
+render_scheduler = RenderScheduler(
+    max_workers=int(
+        os.environ.get("RENDER_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+    )
+)
@@ -0,0 +1,53 @@
+from typing import TypedDict
+
+import numpy as np
+
+from app.services.loudness import LoudnessProfile
+from app.services.sentiment import SentimentEngine, sentiment_engine
+
+FEATURE_COLUMNS = ("sentiment", "subjectivity", "wps", "loudness")
+NEUTRAL_LOUDNESS = 0.5
+
+
+class ScoringWeights(TypedDict):
+    sentiment: float
+    subjectivity: float
+    wps: float
+    loudness: float
+
+
+def segment_features(
+    segments: list[dict],
+    engine: SentimentEngine = sentiment_engine,
+    loudness: LoudnessProfile | None = None,
+) -> np.ndarray:
+    if not segments:
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float64)
+    sentiment = engine.score([s["text"] for s in segments])
+    word_counts = np.array([len(s["text"].split()) for s in segments], dtype=np.float64)
+    durations = np.array([s["end"] - s["start"] for s in segments], dtype=np.float64)
+    wps = np.divide(
+        word_counts, durations, out=np.zeros_like(word_counts), where=durations > 0
+    )
+    if loudness is not None:
+        loudness_score = loudness.segment_scores(
+            [s["start"] for s in segments], [s["end"] for s in segments]
+        )
+    else:
+        loudness_score = np.full(len(segments), NEUTRAL_LOUDNESS)
+    return np.column_stack(
+        (
+            (sentiment[:, 0] + 1) / 2,
+            sentiment[:, 1],
+            np.minimum(wps / 5, 1.0),
+            loudness_score,
+        )
+    )
+
+
+def weight_vector(weights: ScoringWeights) -> np.ndarray:
+    return np.array([weights[c] for c in FEATURE_COLUMNS], dtype=np.float64)
+
+
+def score_features(matrix: np.ndarray, weights: ScoringWeights) -> np.ndarray:
+    return matrix @ weight_vector(weights)
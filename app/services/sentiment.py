@@ -0,0 +1,225 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+class SentimentBackend:
+    name = "base"
+
+    def score_batch(self, texts: list[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def warm_up(self) -> None:
+        pass
+
+
+class TextBlobBackend(SentimentBackend):
+    name = "textblob"
+
+    def score_batch(self, texts: list[str]) -> np.ndarray:
+        from textblob import TextBlob
+
+        rows = []
+        for text in texts:
+            sentiment = TextBlob(text).sentiment
+            rows.append((sentiment.polarity, sentiment.subjectivity))
+        return np.array(rows, dtype=np.float64).reshape(len(texts), 2)
+
+    def warm_up(self) -> None:
+        self.score_batch(["warm up"])
+
+
+class LexiconBackend(SentimentBackend):
+    # Same lexicon, tokenizer and modifier/negation rules as TextBlob's
+    # PatternAnalyzer, with the lexicon flattened into a plain dict and the
+    # per-text averaging done for the whole batch at once.
+    name = "lexicon"
+
+    def __init__(self):
+        self._entries: dict[str, tuple[float, float, float, bool]] | None = None
+
+    def _load(self) -> None:
+        # TextBlob and its lexicon are only pulled in on first use, so the
+        # web process does not pay for them at startup.
+        from textblob._text import EMOTICONS, PUNCTUATION, find_tokens
+        from textblob.en import sentiment as pattern_lexicon
+
+        entries = {}
+        for word in pattern_lexicon.keys():
+            tags = pattern_lexicon[word]
+            if None in tags:
+                p, s, i = tags[None]
+                is_modifier = any(m in tags for m in pattern_lexicon.modifiers)
+                entries[word] = (p, s, i, is_modifier)
+        self._negations = frozenset(pattern_lexicon.negations)
+        self._emoticons: dict[str, float] = {}
+        for (_type, p), faces in EMOTICONS.items():
+            for face in faces:
+                self._emoticons.setdefault(face.lower(), p)
+        self._punctuation = PUNCTUATION
+        self._find_tokens = find_tokens
+        self._entries = entries
+
+    def warm_up(self) -> None:
+        if self._entries is None:
+            self._load()
+
+    def _assess(self, text: str) -> list[list[float]]:
+        entries = self._entries
+        negations = self._negations
+        a: list[list[float]] = []
+        m = None
+        n = None
+        for w in " ".join(self._find_tokens(text)).split():
+            w = w.lower()
+            entry = entries.get(w)
+            if entry is not None:
+                p, s, i, is_modifier = entry
+                if m is None:
+                    a.append([p, s, i, 1])
+                else:
+                    last = a[-1]
+                    last[0] = max(-1.0, min(p * last[2], 1.0))
+                    last[1] = max(-1.0, min(s * last[2], 1.0))
+                    last[2] = i
+                if n is not None:
+                    a[-1][2] = 1.0 / a[-1][2]
+                    a[-1][3] = -1
+                m = w if is_modifier else None
+                n = w if w in negations else None
+                continue
+            if w in negations:
+                n = w
+            elif n and len(w.strip("'")) > 1:
+                n = None
+            if n is not None and m is not None and m.endswith("ly"):
+                a[-1][3] = -1
+                n = None
+            elif m and len(w) > 2:
+                m = None
+            if w == "!" and a:
+                a[-1][0] = max(-1.0, min(a[-1][0] * 1.25, 1.0))
+            if w == "(!)":
+                a.append([0.0, 1.0, 1.0, 1])
+            if not w.isalpha() and len(w) <= 5 and w not in self._punctuation:
+                face = self._emoticons.get(w)
+                if face is not None:
+                    a.append([face, 1.0, 1.0, 1])
+        return a
+
+    def score_batch(self, texts: list[str]) -> np.ndarray:
+        self.warm_up()
+        assessments = [self._assess(text) for text in texts]
+        counts = np.array([len(a) for a in assessments], dtype=np.int64)
+        flat = np.array(
+            [row for a in assessments for row in a], dtype=np.float64
+        ).reshape(-1, 4)
+        owner = np.repeat(np.arange(len(texts)), counts)
+        polarity = np.where(flat[:, 3] < 0, flat[:, 0] * -0.5, flat[:, 0])
+        denominator = np.maximum(counts, 1)
+        return np.column_stack(
+            (
+                np.bincount(owner, weights=polarity, minlength=len(texts))
+                / denominator,
+                np.bincount(owner, weights=flat[:, 1], minlength=len(texts))
+                / denominator,
+            )
+        )
+
+
+BACKENDS: dict[str, type[SentimentBackend]] = {
+    TextBlobBackend.name: TextBlobBackend,
+    LexiconBackend.name: LexiconBackend,
+}
+_worker_backends: dict[str, SentimentBackend] = {}
+
+
+def _score_in_worker(backend_name: str, texts: list[str]) -> np.ndarray:
+    backend = _worker_backends.get(backend_name)
+    if backend is None:
+        backend = _worker_backends[backend_name] = BACKENDS[backend_name]()
+    return backend.score_batch(texts)
+
+
+class SentimentEngine:
+    def __init__(
+        self,
+        backend: SentimentBackend,
+        cache_size: int = 20000,
+        batch_size: int = 256,
+        workers: int = 0,
+    ):
+        self.backend = backend
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self._cache: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: ProcessPoolExecutor | None = None
+
+    def score(self, texts: list[str]) -> np.ndarray:
+        result = np.empty((len(texts), 2), dtype=np.float64)
+        missing: dict[str, list[int]] = {}
+        with self._lock:
+            for idx, text in enumerate(texts):
+                key = " ".join(text.split())
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    result[idx] = cached
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(idx)
+        if not missing:
+            return result
+        unique = list(missing)
+        scored = self._compute(unique)
+        with self._lock:
+            self.misses += len(unique)
+            for key, row in zip(unique, scored):
+                result[missing[key]] = row
+                self._cache[key] = (float(row[0]), float(row[1]))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _compute(self, texts: list[str]) -> np.ndarray:
+        batches = [
+            texts[i : i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        if self.workers > 0 and len(batches) > 1:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            results = list(
+                self._pool.map(
+                    _score_in_worker, [self.backend.name] * len(batches), batches
+                )
+            )
+        else:
+            results = [self.backend.score_batch(batch) for batch in batches]
+        return np.concatenate(results)
+
+    def warm_up(self) -> None:
+        self.backend.warm_up()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+sentiment_engine = SentimentEngine(
+    BACKENDS[os.environ.get("SENTIMENT_BACKEND", LexiconBackend.name)](),
+    cache_size=int(os.environ.get("SENTIMENT_CACHE_SIZE", "20000")),
+    workers=int(os.environ.get("SENTIMENT_WORKERS", "0")),
+)
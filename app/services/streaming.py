@@ -0,0 +1,53 @@
+import time
+from typing import Callable
+
+import numpy as np
+
+
+class StreamingAnalysis:
+    def __init__(
+        self,
+        feature_fn: Callable[..., np.ndarray],
+        weights: np.ndarray,
+        min_flush_interval: float = 1.0,
+        batch_size: int = 32,
+    ):
+        self.feature_fn = feature_fn
+        self.weights = weights
+        self.min_flush_interval = min_flush_interval
+        self.batch_size = batch_size
+        self.segments: list[dict] = []
+        self.feature_rows: list[list[float]] = []
+        self.scored_segments: list[dict] = []
+        self.feature_kwargs: dict = {}
+        self._flushed = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, segment: dict) -> None:
+        self.segments.append(segment)
+
+    def batch_ready(self) -> bool:
+        return len(self.segments) - len(self.scored_segments) >= self.batch_size
+
+    def score_pending(self) -> None:
+        pending = self.segments[len(self.scored_segments) :]
+        if not pending:
+            return
+        rows = self.feature_fn(pending, **self.feature_kwargs)
+        scores = rows @ self.weights
+        self.feature_rows.extend(rows.tolist())
+        self.scored_segments.extend(
+            {**seg, "score": float(score)} for seg, score in zip(pending, scores)
+        )
+
+    def should_flush(self) -> bool:
+        return (
+            self._flushed < len(self.segments)
+            and time.monotonic() - self._last_flush >= self.min_flush_interval
+        )
+
+    def take_batch(self) -> list[dict]:
+        batch = self.segments[self._flushed :]
+        self._flushed = len(self.segments)
+        self._last_flush = time.monotonic()
+        return batch
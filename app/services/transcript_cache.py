@@ -0,0 +1,175 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import TypedDict
+
+import numpy as np
+
+from app.services.paths import atomic_write, data_dir
+
+logging.basicConfig(level=logging.INFO)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class WordRecord(TypedDict):
+    start: float
+    end: float
+    word: str
+    probability: float
+
+
+class SegmentRecord(TypedDict):
+    start: float
+    end: float
+    text: str
+    words: list[WordRecord]
+
+
+def segment_record(segment) -> SegmentRecord:
+    return SegmentRecord(
+        start=segment.start,
+        end=segment.end,
+        text=segment.text,
+        words=[
+            WordRecord(start=w.start, end=w.end, word=w.word, probability=w.probability)
+            for w in segment.words or []
+        ],
+    )
+
+
+def _pack_strings(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(data: np.ndarray, offsets: np.ndarray) -> list[str]:
+    raw = data.tobytes()
+    return [
+        raw[offsets[i] : offsets[i + 1]].decode("utf-8")
+        for i in range(len(offsets) - 1)
+    ]
+
+
+def pack_segments(records: list[SegmentRecord]) -> dict[str, np.ndarray]:
+    words = [w for r in records for w in r["words"]]
+    seg_text, seg_text_offsets = _pack_strings([r["text"] for r in records])
+    word_text, word_text_offsets = _pack_strings([w["word"] for w in words])
+    word_offsets = np.zeros(len(records) + 1, dtype=np.int64)
+    np.cumsum([len(r["words"]) for r in records], out=word_offsets[1:])
+    return {
+        "seg_start": np.array([r["start"] for r in records], dtype=np.float64),
+        "seg_end": np.array([r["end"] for r in records], dtype=np.float64),
+        "seg_text": seg_text,
+        "seg_text_offsets": seg_text_offsets,
+        "seg_word_offsets": word_offsets,
+        "word_start": np.array([w["start"] for w in words], dtype=np.float64),
+        "word_end": np.array([w["end"] for w in words], dtype=np.float64),
+        "word_probability": np.array(
+            [w["probability"] for w in words], dtype=np.float32
+        ),
+        "word_text": word_text,
+        "word_text_offsets": word_text_offsets,
+    }
+
+
+def unpack_segments(columns) -> list[SegmentRecord]:
+    seg_text = _unpack_strings(columns["seg_text"], columns["seg_text_offsets"])
+    word_text = _unpack_strings(columns["word_text"], columns["word_text_offsets"])
+    word_start = columns["word_start"].tolist()
+    word_end = columns["word_end"].tolist()
+    word_probability = columns["word_probability"].tolist()
+    word_offsets = columns["seg_word_offsets"].tolist()
+    return [
+        SegmentRecord(
+            start=start,
+            end=end,
+            text=text,
+            words=[
+                WordRecord(
+                    start=word_start[j],
+                    end=word_end[j],
+                    word=word_text[j],
+                    probability=word_probability[j],
+                )
+                for j in range(word_offsets[i], word_offsets[i + 1])
+            ],
+        )
+        for i, (start, end, text) in enumerate(
+            zip(columns["seg_start"].tolist(), columns["seg_end"].tolist(), seg_text)
+        )
+    ]
+
+
+class TranscriptCache:
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._digests: dict[tuple[str, int, int], str] = {}
+
+    def content_hash(self, media_path: str) -> str:
+        st = os.stat(media_path)
+        stat_key = (os.path.abspath(media_path), st.st_size, st.st_mtime_ns)
+        digest = self._digests.get(stat_key)
+        if digest is None:
+            h = hashlib.blake2b(digest_size=20)
+            with open(media_path, "rb") as f:
+                while chunk := f.read(HASH_CHUNK_SIZE):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            self._digests[stat_key] = digest
+        return digest
+
+    def key_for(self, media_path: str, model_label: str, options: dict) -> str:
+        params = json.dumps({"model": model_label, **options}, sort_keys=True)
+        h = hashlib.blake2b(digest_size=20)
+        h.update(self.content_hash(media_path).encode())
+        h.update(params.encode())
+        return h.hexdigest()
+
+    def get(self, key: str) -> list[SegmentRecord] | None:
+        path = self._path(key)
+        try:
+            with np.load(path) as columns:
+                records = unpack_segments(columns)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.exception(f"Dropping unreadable transcript cache entry {key}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return records
+
+    def put(self, key: str, records: list[SegmentRecord]) -> None:
+        with atomic_write(self._path(key)) as f:
+            np.savez_compressed(f, **pack_segments(records))
+        self.enforce_quota()
+
+    def enforce_quota(self) -> int:
+        with self._lock:
+            entries = [(p, p.stat()) for p in self.directory.glob("*.npz")]
+            total = sum(st.st_size for _, st in entries)
+            removed = 0
+            for p, st in sorted(entries, key=lambda e: e[1].st_mtime):
+                if total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                total -= st.st_size
+                removed += 1
+            return removed
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+
+transcript_cache = TranscriptCache(
+    data_dir("transcripts"),
+    max_bytes=int(os.environ.get("TRANSCRIPT_CACHE_MAX_MB", "512")) * 1024 * 1024,
+)
@@ -0,0 +1,45 @@
+import asyncio
+import logging
+import os
+
+from app.services.media_fetch import media_fetcher
+from app.services.metrics import stage_span
+from app.services.model_registry import DEFAULT_MODEL_KEY, model_registry
+from app.services.sentiment import sentiment_engine
+
+logging.basicConfig(level=logging.INFO)
+
+WARMUP_ENABLED = os.environ.get("STARTUP_WARMUP", "1") != "0"
+WARMUP_DELAY_SECONDS = float(os.environ.get("STARTUP_WARMUP_DELAY", "2.0"))
+
+
+def _import_whisper() -> None:
+    import faster_whisper  # noqa: F401
+
+
+async def warm_up_heavy_imports():
+    # Heavy stacks load lazily on first use; this pays for them in the
+    # background once the server is serving, so the first Analyze click
+    # does not have to.
+    if not WARMUP_ENABLED:
+        return
+    await asyncio.sleep(WARMUP_DELAY_SECONDS)
+    steps = [
+        ("warmup.sentiment", sentiment_engine.warm_up),
+        ("warmup.yt_dlp", media_fetcher.warm_up),
+        ("warmup.whisper_import", _import_whisper),
+    ]
+    if os.environ.get("WHISPER_PRELOAD", "1") != "0":
+        steps.append(
+            (
+                "warmup.whisper_model",
+                lambda: model_registry.preload([DEFAULT_MODEL_KEY]),
+            )
+        )
+    for stage, step in steps:
+        try:
+            with stage_span(stage):
+                await asyncio.to_thread(step)
+        except Exception as e:
+            logging.exception(f"Warm-up step {stage} failed: {e}")
+    logging.info(f"Warm-up done, Whisper registry: {model_registry.stats()}")
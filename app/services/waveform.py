@@ -0,0 +1,129 @@
+import math
+import os
+from pathlib import Path
+from typing import TypedDict
+
+import numpy as np
+
+from app.services.audio_ingest import open_pcm
+from app.services.loudness import SAMPLE_RATE
+from app.services.media_store import media_store
+from app.services.paths import atomic_write
+from app.services.project_store import project_store
+
+PEAK_BLOCK = int(os.environ.get("WAVEFORM_BLOCK", "256"))
+TILE_PEAKS = 1024
+BUILD_BLOCKS = 4096
+PEAK_MAGIC = b"PEAK"
+HEADER_DTYPE = np.dtype(
+    [("magic", "S4"), ("block", "<u4"), ("sample_rate", "<u4"), ("count", "<u8")]
+)
+
+
+class WaveformMeta(TypedDict):
+    sample_rate: int
+    block: int
+    tile_size: int
+    levels: list[int]
+    duration: float
+
+
+def level_lengths(count: int) -> list[int]:
+    # Each level halves the one below until a single tile covers everything.
+    lengths = [count]
+    while lengths[-1] > TILE_PEAKS:
+        lengths.append(math.ceil(lengths[-1] / 2))
+    return lengths
+
+
+def _downsample(peaks: np.ndarray) -> np.ndarray:
+    if len(peaks) % 2:
+        peaks = np.concatenate([peaks, peaks[-1:]])
+    pairs = peaks.reshape(-1, 2, 2)
+    return np.stack([pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)], axis=1)
+
+
+def build_peaks(
+    pcm_path: Path,
+    output_path: Path,
+    block: int = PEAK_BLOCK,
+    sample_rate: int = SAMPLE_RATE,
+) -> int:
+    audio = open_pcm(pcm_path)
+    count = math.ceil(len(audio) / block)
+    base = np.zeros((count, 2), dtype=np.float32)
+    step = block * BUILD_BLOCKS
+    for offset in range(0, len(audio), step):
+        chunk = np.asarray(audio[offset : offset + step])
+        first = offset // block
+        blocks = math.ceil(len(chunk) / block)
+        padded = np.pad(chunk, (0, blocks * block - len(chunk)), mode="edge")
+        frames = padded.reshape(blocks, block)
+        base[first : first + blocks, 0] = frames.min(axis=1)
+        base[first : first + blocks, 1] = frames.max(axis=1)
+    levels = [base]
+    for _ in level_lengths(count)[1:]:
+        levels.append(_downsample(levels[-1]))
+    header = np.array([(PEAK_MAGIC, block, sample_rate, count)], dtype=HEADER_DTYPE)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with atomic_write(output_path) as f:
+        f.write(header.tobytes())
+        for level in levels:
+            f.write(np.clip(np.round(level * 127), -127, 127).astype(np.int8))
+    return count
+
+
+class PeakPyramid:
+    def __init__(self, path: Path):
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) != 1 or header[0]["magic"] != PEAK_MAGIC:
+            raise ValueError(f"Not a peak file: {path}")
+        self.block = int(header[0]["block"])
+        self.sample_rate = int(header[0]["sample_rate"])
+        self.lengths = level_lengths(int(header[0]["count"]))
+        self.offsets = np.concatenate(([0], np.cumsum(self.lengths)))
+        if not self.offsets[-1]:
+            self.data = np.empty((0, 2), dtype=np.int8)
+            return
+        self.data = np.memmap(
+            path, dtype=np.int8, mode="r", offset=HEADER_DTYPE.itemsize
+        ).reshape(-1, 2)
+
+    def tile(self, level: int, index: int) -> np.ndarray:
+        if not 0 <= level < len(self.lengths):
+            raise IndexError(f"No level {level}")
+        start = index * TILE_PEAKS
+        if not 0 <= start < self.lengths[level]:
+            raise IndexError(f"No tile {index} at level {level}")
+        end = min(start + TILE_PEAKS, self.lengths[level])
+        return self.data[self.offsets[level] + start : self.offsets[level] + end]
+
+    def meta(self) -> WaveformMeta:
+        return WaveformMeta(
+            sample_rate=self.sample_rate,
+            block=self.block,
+            tile_size=TILE_PEAKS,
+            levels=self.lengths,
+            duration=self.lengths[0] * self.block / self.sample_rate,
+        )
+
+
+def ensure_peaks(audio_path: str, owner: str | None = None) -> str:
+    key = f"peaks:{audio_path}"
+    record = media_store.get(key)
+    if record is not None:
+        if owner is not None and owner not in record["owners"]:
+            media_store.acquire(key, owner)
+        return record["path"]
+    path = media_store.path_for("waveform", key, ".peaks")
+    build_peaks(media_store.absolute(audio_path), media_store.absolute(path))
+    return media_store.add(key, "waveform", path, owner=owner)["path"]
+
+
+def project_peaks(project_id: str) -> PeakPyramid:
+    project = project_store.get_project(project_id)
+    if project is None or not project["audio_path"]:
+        raise LookupError("No decoded audio for this project.")
+    # Projects decoded before peaks existed get theirs on first view.
+    path = ensure_peaks(project["audio_path"], owner=project_id)
+    return PeakPyramid(media_store.absolute(path))
@@ -1,15 +1,82 @@
 import reflex as rx
+import asyncio
 import logging
-from faster_whisper import WhisperModel
-from textblob import TextBlob
+import os
+import time
 import numpy as np
-import uuid
-from app.states.video_state import VideoState, TranscriptionSegment, Clip
-from moviepy.video.io.VideoFileClip import VideoFileClip
-from moviepy.video.VideoClip import TextClip
-from moviepy.video.compositing.CompositeVideoClip import CompositeVideoClip
+from typing import AsyncIterator, Iterator
+from app.states.video_state import (
+    DOWNLOAD_TIMEOUT,
+    VideoState,
+    TranscriptionSegment,
+    Clip,
+    clips_from_windows,
+    commit_ranking,
+)
+from app.services.jobs import PROCESS_WORKERS, submit_thread
+from app.services.model_registry import DEFAULT_MODEL_KEY, model_registry
+from app.services.clip_search import find_top_windows
+from app.services.feature_store import ProjectFeatures, feature_store
+from app.services.audio_ingest import open_pcm
+from app.services.media_store import media_store, reclaim_storage
+from app.services.loudness import (
+    SAMPLE_RATE,
+    LoudnessProfile,
+    analyze_loudness,
+    analyze_loudness_array,
+)
+from app.services.metrics import StageClock, record_stage, stage_span, timed
+from app.services.parallel_transcribe import (
+    TRANSCRIBE_CHUNK_SECONDS,
+    chunk_model_key,
+    plan_chunks,
+    should_parallelize,
+    transcribe_parallel,
+)
+from app.services.progress import ProgressThrottle
+from app.services.project_store import project_store
+from app.services.render_queue import RenderJob, render_scheduler
+from app.services.scoring import segment_features, weight_vector
+from app.services.streaming import StreamingAnalysis
+from app.services.transcript_cache import (
+    SegmentRecord,
+    segment_record,
+    transcript_cache,
+)
 
 logging.basicConfig(level=logging.INFO)
+TRANSCRIBE_OPTIONS = {"word_timestamps": True}
+RENDER_POLL_SECONDS = 0.1
+RENDER_TIMEOUT = float(os.environ.get("RENDER_TIMEOUT", "1800"))
+VIDEO_POLL_SECONDS = 1.0
+RENDER_ALL_PRIORITY = 10
+MODEL_LOAD_TIMEOUT = 600.0
+TRANSCRIBE_STEP_TIMEOUT = 300.0
+
+
+async def _records_in_thread(
+    records: Iterator[SegmentRecord],
+) -> AsyncIterator[SegmentRecord]:
+    # faster-whisper decodes lazily, so each step runs off the event loop.
+    while True:
+        record = await submit_thread(
+            next,
+            records,
+            None,
+            name="whisper.segment",
+            timeout=TRANSCRIBE_STEP_TIMEOUT,
+        )
+        if record is None:
+            return
+        yield record
+
+
+async def _cached_records(
+    records: list[SegmentRecord],
+) -> AsyncIterator[SegmentRecord]:
+    # Already in memory; a thread hop per record would only add latency.
+    for record in records:
+        yield record
 
 
 class AnalysisState(rx.State):
@@ -18,55 +85,193 @@ class AnalysisState(rx.State):
         async with self:
             vs = await self.get_state(VideoState)
             vs.set_processing_video_id(project_id)
-            vs._update_project_status(project_id, status="analyzing")
+            await vs._update_project_status(project_id, status="analyzing", segments=[])
             yield rx.toast.info("Starting analysis...")
-        project = next((p for p in vs.video_projects if p["id"] == project_id), None)
-        if not project or not project.get("file_path"):
+        project = await vs._project(project_id)
+        audio = self._open_audio(project) if project else None
+        if audio is None and not (project and project.get("file_path")):
             async with self:
                 vs.set_processing_video_id(None)
-                vs._update_project_status(
+                await vs._update_project_status(
                     project_id,
                     status="error",
-                    error_message="Video file not found for analysis.",
+                    error_message="Audio not found for analysis.",
                 )
-                yield rx.toast.error("Analysis failed: Video file missing.")
+                yield rx.toast.error("Analysis failed: Audio missing.")
             return
         try:
-            video_path = str(rx.get_upload_dir() / project["file_path"])
-            model = WhisperModel("tiny", device="cpu", compute_type="int8")
-            segments, _ = model.transcribe(video_path, word_timestamps=True)
-            transcription_segments = [
-                TranscriptionSegment(start=s.start, end=s.end, text=s.text)
-                for s in segments
-            ]
-            async with self:
-                vs = await self.get_state(VideoState)
-                vs._update_project_status(project_id, segments=transcription_segments)
-                yield rx.toast.info("Transcription complete. Scoring segments...")
-            scored_segments = []
-            for seg in transcription_segments:
-                blob = TextBlob(seg["text"])
-                sentiment = blob.sentiment.polarity
-                subjectivity = blob.sentiment.subjectivity
-                sentiment_score = (sentiment + 1) / 2
-                subjectivity_score = subjectivity
-                word_count = len(seg["text"].split())
-                duration = seg["end"] - seg["start"]
-                wps = word_count / duration if duration > 0 else 0
-                wps_score = min(wps / 5, 1.0)
-                loudness_score = 0.5
-                engagement_score = (
-                    sentiment_score * vs.sentiment_weight
-                    + subjectivity_score * vs.subjectivity_weight
-                    + wps_score * vs.wps_weight
+            # Audio-first downloads may not have the video yet; the decoded
+            # track is all transcription and loudness need.
+            media_path = (
+                project["audio_path"] if audio is not None else project["file_path"]
+            )
+            await asyncio.to_thread(media_store.touch_path, media_path)
+            media_file = str(rx.get_upload_dir() / media_path)
+            weights = vs._scoring_weights()
+            if audio is not None:
+                loudness_task = asyncio.create_task(
+                    asyncio.to_thread(
+                        timed, "loudness", project_id, analyze_loudness_array, audio
+                    )
+                )
+            else:
+                loudness_task = asyncio.create_task(
+                    asyncio.to_thread(
+                        timed, "loudness", project_id, analyze_loudness, media_file
+                    )
+                )
+            parallel = audio is not None and should_parallelize(len(audio))
+            options = TRANSCRIBE_OPTIONS
+            if parallel:
+                # Chunk seams change the output slightly, so chunked and
+                # sequential transcripts are cached separately.
+                options = {**options, "chunk_seconds": TRANSCRIBE_CHUNK_SECONDS}
+            cache_key = await asyncio.to_thread(
+                transcript_cache.key_for,
+                media_file,
+                DEFAULT_MODEL_KEY.label(),
+                options,
+            )
+            cached = await asyncio.to_thread(transcript_cache.get, cache_key)
+            transcribe_stage = "transcribe"
+            if cached is not None:
+                logging.info(f"Transcript cache hit for {project_id}")
+                transcribe_stage = "transcribe.cached"
+                records = _cached_records(cached)
+            elif parallel:
+                transcribe_stage = "transcribe.parallel"
+                chunks = await asyncio.to_thread(plan_chunks, audio)
+                logging.info(
+                    f"Transcribing {project_id} in {len(chunks)} chunks "
+                    f"across {PROCESS_WORKERS} workers"
+                )
+                records = transcribe_parallel(
+                    media_file, chunks, chunk_model_key(), TRANSCRIBE_OPTIONS
+                )
+            else:
+                with stage_span("model_load", project_id):
+                    model = await submit_thread(
+                        model_registry.get,
+                        *DEFAULT_MODEL_KEY,
+                        name="whisper.load",
+                        timeout=MODEL_LOAD_TIMEOUT,
+                    )
+                segments, _ = await submit_thread(
+                    model.transcribe,
+                    audio if audio is not None else media_file,
+                    name="whisper.transcribe",
+                    timeout=TRANSCRIBE_STEP_TIMEOUT,
+                    **TRANSCRIBE_OPTIONS,
+                )
+                records = _records_in_thread(segment_record(s) for s in segments)
+            transcribed: list[SegmentRecord] = []
+            stream = StreamingAnalysis(segment_features, weight_vector(weights))
+            clips: list[Clip] = []
+            # Re-analysis keeps the ids, and with them the rendered shorts, of
+            # every clip whose window comes back.
+            listed: dict[str, Clip] = {c["id"]: c for c in project["clips"]}
+            # Scoring and clip search run between transcribed segments; the
+            # clock keeps their time out of the transcription figure.
+            clock = StageClock()
+            transcribe_started = time.perf_counter()
+            transcribe_status = "error"
+            try:
+                async for record in records:
+                    transcribed.append(record)
+                    stream.add(
+                        TranscriptionSegment(
+                            start=record["start"],
+                            end=record["end"],
+                            text=record["text"],
+                        )
+                    )
+                    if "loudness" not in stream.feature_kwargs and loudness_task.done():
+                        stream.feature_kwargs["loudness"] = self._loudness_result(
+                            loudness_task, project_id
+                        )
+                    if stream.batch_ready():
+                        with clock.measure("scoring"):
+                            await asyncio.to_thread(stream.score_pending)
+                    if stream.should_flush():
+                        with clock.measure("scoring"):
+                            await asyncio.to_thread(stream.score_pending)
+                        with clock.measure("clip_search"):
+                            clips = self._find_best_clips(
+                                stream.scored_segments,
+                                project["duration"],
+                                project_id,
+                                previous=list(listed.values()),
+                            )
+                        listed.update((c["id"], c) for c in clips)
+                        # Nothing is released until the final ranking, so a
+                        # clip that drops out and comes back keeps its short.
+                        committed = await asyncio.to_thread(
+                            commit_ranking, project_id, clips, release=False
+                        )
+                        async with self:
+                            vs = await self.get_state(VideoState)
+                            await vs._append_project_segments(
+                                project_id, stream.take_batch()
+                            )
+                            vs._set_project_clips(project_id, committed)
+                transcribe_status = "ok"
+            finally:
+                counts = {"segments": len(transcribed)}
+                if audio is not None:
+                    counts["audio_seconds"] = len(audio) / SAMPLE_RATE
+                record_stage(
+                    transcribe_stage,
+                    time.perf_counter() - transcribe_started - clock.total(),
+                    project_id,
+                    status=transcribe_status,
+                    counts=counts,
+                )
+            with clock.measure("scoring"):
+                await asyncio.to_thread(stream.score_pending)
+            if cached is None:
+                await asyncio.to_thread(transcript_cache.put, cache_key, transcribed)
+            # Kept for caption burn-in so rendering never needs Whisper again.
+            await asyncio.to_thread(
+                project_store.replace_words,
+                project_id,
+                [w for r in transcribed for w in r["words"]],
+            )
+            features = ProjectFeatures(stream.segments, stream.feature_rows)
+            if "loudness" not in stream.feature_kwargs:
+                await asyncio.wait([loudness_task])
+                stream.feature_kwargs["loudness"] = self._loudness_result(
+                    loudness_task, project_id
+                )
+            loudness = stream.feature_kwargs["loudness"]
+            if loudness is not None:
+                features.update_column(
+                    "loudness", loudness.segment_scores(features.starts, features.ends)
+                )
+            feature_store.put(project_id, features)
+            with clock.measure("clip_search"):
+                clips = clips_from_windows(
+                    project_id,
+                    features.rank(weights),
+                    features.texts,
+                    list(listed.values()),
                 )
-                scored_segments.append({**seg, "score": engagement_score})
-            clips = self._find_best_clips(
-                scored_segments, project["duration"], project_id
+            for stage, seconds in clock.seconds.items():
+                record_stage(
+                    stage, seconds, project_id, counts={"segments": len(transcribed)}
+                )
+            committed = await asyncio.to_thread(
+                commit_ranking, project_id, clips, retired=set(listed)
             )
+            released = bool(listed.keys() - {c["id"] for c in committed})
+            if released:
+                await submit_thread(reclaim_storage, name="media.reclaim")
             async with self:
                 vs = await self.get_state(VideoState)
-                vs._update_project_status(project_id, status="complete", clips=clips)
+                await vs._append_project_segments(project_id, stream.take_batch())
+                await vs._update_project_status(project_id, status="complete")
+                vs._set_project_clips(project_id, committed)
+                if released:
+                    await vs._refresh_storage_stats()
                 vs.set_processing_video_id(None)
                 yield rx.toast.success("Analysis complete! Found best clips.")
         except Exception as e:
@@ -74,94 +279,193 @@ class AnalysisState(rx.State):
             async with self:
                 vs = await self.get_state(VideoState)
                 vs.set_processing_video_id(None)
-                vs._update_project_status(
+                await vs._update_project_status(
                     project_id, status="error", error_message=str(e)
                 )
                 yield rx.toast.error(f"Analysis failed: {e}")
 
+    def _open_audio(self, project: dict) -> np.ndarray | None:
+        if not project.get("audio_path"):
+            return None
+        audio_path = rx.get_upload_dir() / project["audio_path"]
+        if not audio_path.exists():
+            return None
+        return open_pcm(audio_path)
+
+    def _loudness_result(
+        self, task: asyncio.Task, project_id: str
+    ) -> LoudnessProfile | None:
+        try:
+            return task.result()
+        except Exception as e:
+            logging.exception(f"Loudness analysis failed for {project_id}: {e}")
+            return None
+
     def _find_best_clips(
         self,
         scored_segments: list[dict],
         video_duration: float,
         project_id: str,
         num_clips=5,
+        min_duration: float = 15.0,
+        max_duration: float = 60.0,
+        min_gap: float = 0.0,
+        previous: list[Clip] | None = None,
     ) -> list[Clip]:
-        if not scored_segments:
-            return []
-        scores = np.array([s["score"] for s in scored_segments])
-        cumsum_scores = np.cumsum(scores)
-        best_clips = []
-        for _ in range(num_clips):
-            best_score = -1
-            best_clip_info = None
-            for i in range(len(scored_segments)):
-                for j in range(i, len(scored_segments)):
-                    start_time = scored_segments[i]["start"]
-                    end_time = scored_segments[j]["end"]
-                    duration = end_time - start_time
-                    if 15 <= duration <= 60:
-                        total_score = cumsum_scores[j] - (
-                            cumsum_scores[i - 1] if i > 0 else 0
-                        )
-                        avg_score = total_score / (j - i + 1)
-                        if avg_score > best_score:
-                            text = " ".join(
-                                [s["text"] for s in scored_segments[i : j + 1]]
-                            )
-                            best_score = avg_score
-                            best_clip_info = {
-                                "start": start_time,
-                                "end": end_time,
-                                "text": text,
-                                "score": avg_score,
-                            }
-            if best_clip_info:
-                best_clips.append(
-                    Clip(
-                        id=str(uuid.uuid4()),
-                        start=best_clip_info["start"],
-                        end=best_clip_info["end"],
-                        text=best_clip_info["text"],
-                        score=best_clip_info["score"],
-                        duration_str="",
-                        video_id=project_id,
-                        status="pending",
-                    )
-                )
-        return sorted(best_clips, key=lambda x: x["score"], reverse=True)
+        windows = find_top_windows(
+            [s["start"] for s in scored_segments],
+            [s["end"] for s in scored_segments],
+            [s["score"] for s in scored_segments],
+            k=num_clips,
+            min_duration=min_duration,
+            max_duration=max_duration,
+            min_gap=min_gap,
+        )
+        return clips_from_windows(
+            project_id, windows, [s["text"] for s in scored_segments], previous
+        )
 
     @rx.event(background=True)
-    async def generate_short(self, clip_info: dict):
+    async def generate_short(self, clip_info: dict, priority: int = 0):
         video_id = clip_info["video_id"]
         clip_id = clip_info["id"]
         async with self:
             vs = await self.get_state(VideoState)
-            vs._update_clip_status(video_id, clip_id, "generating")
+            await vs._update_clip_status(video_id, clip_id, "queued", progress=0)
             yield rx.toast.info(f"Generating short for clip...")
         try:
             async with self:
                 vs = await self.get_state(VideoState)
-                project = next(
-                    (p for p in vs.video_projects if p["id"] == video_id), None
-                )
-            if not project or not project.get("file_path"):
+                project = await vs._project(video_id)
+                render_mode = "snap" if vs.snap_to_keyframes else "smart"
+                crop = vs.crop_to_vertical
+                burn_captions = vs.burn_captions
+            if not project:
                 raise ValueError("Original video file not found.")
+            if not project.get("file_path"):
+                async with self:
+                    vs = await self.get_state(VideoState)
+                    if vs.project_video_status.get(video_id) != "downloading":
+                        await vs._update_project_status(
+                            video_id, video_status="downloading", video_progress=0
+                        )
+                yield VideoState.fetch_video(video_id)
+                with stage_span("video_wait", video_id, clip_id):
+                    project = await self._wait_for_video(video_id)
             video_path = str(rx.get_upload_dir() / project["file_path"])
-            video_clip = VideoFileClip(video_path).subclip(
-                clip_info["start"], clip_info["end"]
+            await asyncio.to_thread(media_store.touch_path, project["file_path"])
+            captions = None
+            if burn_captions:
+                captions = await asyncio.to_thread(
+                    project_store.words, video_id, clip_info["start"], clip_info["end"]
+                )
+            short_path = media_store.path_for("short", f"{video_id}_{clip_id}", ".mp4")
+            output_path = str(media_store.absolute(short_path))
+            await asyncio.to_thread(
+                os.makedirs, os.path.dirname(output_path), exist_ok=True
+            )
+            # The first submit starts the Manager and the worker pool.
+            job = await asyncio.to_thread(
+                render_scheduler.submit,
+                clip_id,
+                video_id,
+                video_path,
+                clip_info["start"],
+                clip_info["end"],
+                output_path,
+                render_mode,
+                priority,
+                crop,
+                captions,
+            )
+            reported = "queued"
+            throttle = ProgressThrottle()
+            throttle.ready(0)
+            deadline = time.monotonic() + RENDER_TIMEOUT
+            while not job.done:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(
+                        f"Render did not finish within {RENDER_TIMEOUT:.0f}s."
+                    )
+                await asyncio.sleep(RENDER_POLL_SECONDS)
+                status = "generating" if job.status == "running" else "queued"
+                progress = int(job.progress * 100)
+                if job.done:
+                    break
+                if throttle.ready(progress) or status != reported:
+                    reported = status
+                    async with self:
+                        vs = await self.get_state(VideoState)
+                        await vs._update_clip_status(
+                            video_id, clip_id, status, progress=progress
+                        )
+            render_scheduler.forget(clip_id)
+            self._record_render(job)
+            if job.status == "error":
+                raise RuntimeError(job.error)
+            await asyncio.to_thread(
+                media_store.add,
+                f"short:{video_id}_{clip_id}",
+                "short",
+                short_path,
+                owner=clip_id,
             )
-            output_dir = rx.get_upload_dir() / "shorts"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            output_filename = f"{video_id}_{clip_id}.mp4"
-            output_path = str(output_dir / output_filename)
-            video_clip.write_videofile(output_path, codec="libx264", audio_codec="aac")
+            await submit_thread(reclaim_storage, name="media.reclaim")
             async with self:
                 vs = await self.get_state(VideoState)
-                vs._update_clip_status(video_id, clip_id, "complete")
+                await vs._update_clip_status(
+                    video_id, clip_id, "complete", progress=100
+                )
+                await vs._refresh_storage_stats()
                 yield rx.toast.success("Short generated successfully!")
         except Exception as e:
             logging.exception(f"Error generating short: {e}")
             async with self:
                 vs = await self.get_state(VideoState)
-                vs._update_clip_status(video_id, clip_id, "error")
-                yield rx.toast.error(f"Failed to generate short: {e}")
\ No newline at end of file
+                await vs._update_clip_status(video_id, clip_id, "error")
+                yield rx.toast.error(f"Failed to generate short: {e}")
+
+    def _record_render(self, job: RenderJob) -> None:
+        if job.started_at is None or job.finished_at is None:
+            return
+        record_stage(
+            "render.queue",
+            job.started_at - job.submitted_at,
+            job.project_id,
+            job.job_id,
+        )
+        # The mode actually used, since fast paths fall back to a re-encode.
+        mode = job.result["mode"] if job.result else job.mode
+        record_stage(
+            f"render.{mode}",
+            job.finished_at - job.started_at,
+            job.project_id,
+            job.job_id,
+            status="ok" if job.status == "complete" else "error",
+            counts={"clip_seconds": job.end - job.start},
+        )
+
+    async def _wait_for_video(self, video_id: str) -> dict:
+        deadline = asyncio.get_running_loop().time() + DOWNLOAD_TIMEOUT
+        while asyncio.get_running_loop().time() < deadline:
+            project = await asyncio.to_thread(project_store.get_project, video_id)
+            if project is None:
+                raise ValueError("Project was deleted.")
+            if project["file_path"]:
+                return project
+            if project["video_status"] == "error":
+                raise RuntimeError("Video download failed.")
+            await asyncio.sleep(VIDEO_POLL_SECONDS)
+        raise TimeoutError("Timed out waiting for the video download.")
+
+    @rx.event
+    async def render_all_clips(self, project_id: str):
+        vs = await self.get_state(VideoState)
+        project = await vs._project(project_id)
+        if not project:
+            return
+        return [
+            AnalysisState.generate_short(clip, RENDER_ALL_PRIORITY)
+            for clip in project["clips"]
+            if clip["status"] in ("pending", "error")
+        ]
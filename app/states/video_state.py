@@ -1,16 +1,66 @@
 import reflex as rx
-from typing import TypedDict, Literal
+from reflex.config import get_config
+from typing import Iterable, TypedDict, Literal
 import time
-import yt_dlp
+import asyncio
+import json
 import os
+import secrets
 import uuid
 import logging
+from pathlib import Path
+from app.services.audio_ingest import decode_pcm, open_pcm
+from app.services.clip_search import ClipWindow
+from app.services.feature_store import feature_store, features_from_segments
+from app.services.downloads import (
+    BATCH_MAX_ENTRIES,
+    download_slots,
+    host_limiter,
+    with_retries,
+)
+from app.services.ingest import (
+    UnknownUpload,
+    claim_upload,
+    extract_thumbnail,
+    probe_media,
+    staging_path,
+)
+from app.services.jobs import submit_thread
+from app.services.loudness import SAMPLE_RATE, analyze_loudness, analyze_loudness_array
+from app.services.media_fetch import media_fetcher
+from app.services.media_store import (
+    MediaKind,
+    MediaRecord,
+    media_store,
+    reclaim_storage,
+)
+from app.services.metrics import stage_span
+from app.services.progress import ProgressThrottle
+from app.services.project_store import project_store
+from app.services.render import mux_streams
+from app.services.scoring import ScoringWeights
+from app.services.waveform import ensure_peaks
 
 logging.basicConfig(level=logging.INFO)
 Status = Literal[
     "pending", "downloading", "processing", "analyzing", "complete", "error"
 ]
 
+VideoStatus = Literal["missing", "downloading", "ready", "error"]
+DownloadPhase = Literal["audio", "video"]
+ClipStatus = Literal["pending", "queued", "generating", "complete", "error"]
+EXTRACT_INFO_TIMEOUT = 120.0
+DOWNLOAD_TIMEOUT = 3600.0
+DECODE_TIMEOUT = 900.0
+PROGRESS_POLL_SECONDS = 0.1
+PROJECTS_PAGE_SIZE = int(os.environ.get("PROJECTS_PAGE_SIZE", "12"))
+# "background" fetches the video right after the audio; "render" waits until a
+# clip is actually rendered.
+VIDEO_FETCH_MODE = os.environ.get("VIDEO_FETCH_MODE", "background")
+FULL_FORMAT = "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best"
+AUDIO_FORMAT = "bestaudio[ext=m4a]/bestaudio/best[ext=mp4]/best"
+VIDEO_FORMAT = "bestvideo[ext=mp4]/bestvideo/best[ext=mp4]/best"
+
 
 class TranscriptionSegment(TypedDict):
     start: float
@@ -18,6 +68,14 @@ class TranscriptionSegment(TypedDict):
     text: str
 
 
+class StageTiming(TypedDict):
+    stage: str
+    seconds_str: str
+    runs: int
+    errors: int
+    share: int
+
+
 class Clip(TypedDict):
     id: str
     start: float
@@ -26,7 +84,8 @@ class Clip(TypedDict):
     score: float
     duration_str: str
     video_id: str
-    status: Literal["pending", "generating", "complete", "error"]
+    status: ClipStatus
+    progress: int
 
 
 class Video(TypedDict):
@@ -39,13 +98,237 @@ class Video(TypedDict):
     status: Status
     progress: int
     file_path: str | None
+    audio_path: str | None
     error_message: str | None
-    segments: list[TranscriptionSegment]
+    video_status: VideoStatus
+    segment_count: int
     clips: list[Clip]
 
 
+class ProjectInfo(TypedDict):
+    id: str
+    url: str
+    title: str
+    thumbnail: str
+    duration: int
+    duration_str: str
+    file_path: str | None
+    audio_path: str | None
+    error_message: str | None
+
+
+UPLOAD_SCRIPT = """
+(async (ticket) => {
+  const input = document.getElementById("local-video-input");
+  const file = input && input.files[0];
+  if (!file) return {error: "Choose a video file first."};
+  try {
+    const base = new URL(getBackendURL(env.UPLOAD)).origin;
+    const response = await fetch(
+      `${base}/api/uploads/video?filename=${encodeURIComponent(file.name)}` +
+        `&ticket=${encodeURIComponent(ticket)}`,
+      {method: "PUT", body: file},
+    );
+    const staged = await response.json();
+    return staged.error ? staged : {upload_id: staged.upload_id};
+  } catch (e) {
+    return {error: String(e)};
+  }
+})(%s)
+"""
+
+TIMELINE_SCRIPT = """
+shortsWaveform.open(
+  "waveform-canvas", new URL(getBackendURL(env.UPLOAD)).origin, %s, %s
+)
+"""
+
+_media_locks: dict[str, asyncio.Lock] = {}
+
+
+def _media_lock(key: str) -> asyncio.Lock:
+    return _media_locks.setdefault(key, asyncio.Lock())
+
+
+def _downloaded_path(template: str, info: dict) -> str:
+    downloads = info.get("requested_downloads") or [{}]
+    filepath = downloads[0].get("filepath") or downloads[0].get("filename")
+    if filepath:
+        return str(Path(template).with_name(Path(filepath).name))
+    return template.replace("%(ext)s", info.get("ext") or "mp4")
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_duration(seconds: int | float) -> str:
+    if not isinstance(seconds, (int, float)):
+        return "00:00"
+    m, s = divmod(seconds, 60)
+    h, m = divmod(m, 60)
+    return (
+        f"{int(h):02d}:{int(m):02d}:{int(s):02d}"
+        if h > 0
+        else f"{int(m):02d}:{int(s):02d}"
+    )
+
+
+def stage_timings(breakdown: list[dict]) -> list[StageTiming]:
+    longest = max((row["seconds"] for row in breakdown), default=0)
+    return [
+        StageTiming(
+            stage=row["stage"],
+            seconds_str=f"{row['seconds']:.2f}s",
+            runs=row["runs"],
+            errors=row["errors"],
+            share=round(100 * row["seconds"] / longest) if longest else 0,
+        )
+        for row in breakdown
+    ]
+
+
+def format_clip_range(start: float, end: float) -> str:
+    def mm_ss(seconds: float) -> str:
+        m, s = divmod(seconds, 60)
+        return f"{int(m):02d}:{int(s):02d}"
+
+    return f"{mm_ss(start)} - {mm_ss(end)}"
+
+
+def clips_from_windows(
+    project_id: str,
+    windows: list[ClipWindow],
+    texts: list[str],
+    previous: list[Clip] | None = None,
+) -> list[Clip]:
+    known = {(c["start"], c["end"]): c for c in previous or []}
+    return [
+        Clip(
+            id=known.get((w.start, w.end), {}).get("id", str(uuid.uuid4())),
+            start=w.start,
+            end=w.end,
+            text=" ".join(texts[w.first : w.last + 1]),
+            score=w.score,
+            duration_str=format_clip_range(w.start, w.end),
+            video_id=project_id,
+            status=known.get((w.start, w.end), {}).get("status", "pending"),
+            progress=known.get((w.start, w.end), {}).get("progress", 0),
+        )
+        for w in windows
+    ]
+
+
+def restore_features(project_id: str, media_path: str | None) -> None:
+    # The feature cache is in memory only; projects analyzed before a restart
+    # get theirs back from the stored segments.
+    segments = project_store.segments(project_id)
+    if not segments:
+        return
+    loudness = None
+    if media_path:
+        path = media_store.absolute(media_path)
+        if path.suffix == ".pcm" and path.exists():
+            loudness = analyze_loudness_array(open_pcm(path))
+        elif path.exists():
+            loudness = analyze_loudness(str(path))
+    feature_store.put(project_id, features_from_segments(segments, loudness))
+
+
+def commit_ranking(
+    project_id: str,
+    clips: list[Clip],
+    release: bool = True,
+    retired: Iterable[str] = (),
+) -> list[Clip]:
+    stored = {
+        c["id"]: c
+        for c in (project_store.get_project(project_id) or {"clips": []})["clips"]
+    }
+    # Clip status is only current in the store; the ranking came from memory.
+    ranked = [
+        {**c, **{k: stored[c["id"]][k] for k in ("status", "progress")}}
+        if c["id"] in stored
+        else c
+        for c in clips
+    ]
+    kept = {c["id"] for c in ranked}
+    # A clip that is still rendering stays listed until it finishes.
+    in_flight = [
+        {**c, "duration_str": format_clip_range(c["start"], c["end"])}
+        for c in stored.values()
+        if c["id"] not in kept and c["status"] in ("queued", "generating")
+    ]
+    ranked += in_flight
+    project_store.replace_clips(project_id, ranked)
+    if not release:
+        return ranked
+    kept |= {c["id"] for c in in_flight}
+    # Retired ids were listed by earlier, unreleased commits.
+    for clip_id in (stored.keys() | set(retired)) - kept:
+        media_store.release_owner(clip_id)
+    return ranked
+
+
+def store_project_status(
+    project_id: str,
+    fields: dict,
+    segments: list[TranscriptionSegment] | None = None,
+    clips: list[Clip] | None = None,
+) -> None:
+    project_store.update_project(project_id, **fields)
+    if segments is not None:
+        project_store.replace_segments(project_id, segments)
+    if clips is not None:
+        project_store.replace_clips(project_id, clips)
+
+
+def project_page(page: int) -> tuple[int, int, list[dict]]:
+    count = project_store.count_projects()
+    page = min(page, max(0, -(-count // PROJECTS_PAGE_SIZE) - 1))
+    rows = project_store.list_projects(page * PROJECTS_PAGE_SIZE, PROJECTS_PAGE_SIZE)
+    return count, page, rows
+
+
+def claim_media(key: str, owner: str) -> MediaRecord | None:
+    record = media_store.get(key)
+    if record is not None:
+        media_store.acquire(key, owner)
+    return record
+
+
+def move_into_store(
+    source: Path, key: str, kind: MediaKind, file_path: str, owner: str
+) -> MediaRecord:
+    target = media_store.absolute(file_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, target)
+    return media_store.add(key, kind, file_path, owner=owner)
+
+
+def forget_project(project_id: str, clip_ids: list[str]) -> None:
+    media_store.release_owner(project_id)
+    for clip_id in clip_ids:
+        media_store.release_owner(clip_id)
+    project_store.delete_project(project_id)
+
+
 class VideoState(rx.State):
-    video_projects: list[Video] = []
+    project_ids: list[str] = []
+    projects: dict[str, ProjectInfo] = {}
+    project_status: dict[str, Status] = {}
+    project_progress: dict[str, int] = {}
+    project_video_status: dict[str, VideoStatus] = {}
+    project_video_progress: dict[str, int] = {}
+    project_segment_counts: dict[str, int] = {}
+    project_clips: dict[str, list[Clip]] = {}
+    clip_status: dict[str, ClipStatus] = {}
+    clip_progress: dict[str, int] = {}
+    project_page: int = 0
+    project_count: int = 0
     video_url: str = ""
     is_loading: bool = False
     error: str | None = None
@@ -54,58 +337,287 @@ class VideoState(rx.State):
     sentiment_weight: float = 0.4
     subjectivity_weight: float = 0.3
     wps_weight: float = 0.3
+    loudness_weight: float = 0.2
+    snap_to_keyframes: bool = False
+    # Either effect forces a full re-encode, so both start off and plain
+    # cuts keep the stream-copy path.
+    crop_to_vertical: bool = False
+    burn_captions: bool = False
+    timeline_project_id: str | None = None
+    timings_project_id: str | None = None
+    project_timings: list[StageTiming] = []
+    storage_label: str = ""
+    batch_mode: bool = False
+    batch_text: str = ""
+    batch_auto_analyze: bool = False
+    batch_project_ids: list[str] = []
+    batch_done: int = 0
+    batch_failed: int = 0
+    _upload_ticket: str = ""
+    _ranked_from: dict[str, list[Clip]] = {}
 
     @rx.var
     def has_projects(self) -> bool:
-        return len(self.video_projects) > 0
+        return len(self.project_ids) > 0
 
-    def _format_duration(self, seconds: int | float) -> str:
-        if not isinstance(seconds, (int, float)):
-            return "00:00"
-        m, s = divmod(seconds, 60)
-        h, m = divmod(m, 60)
-        return (
-            f"{int(h):02d}:{int(m):02d}:{int(s):02d}"
-            if h > 0
-            else f"{int(m):02d}:{int(s):02d}"
-        )
+    @rx.var
+    def has_render_effects(self) -> bool:
+        return self.crop_to_vertical or self.burn_captions
 
-    def _format_duration_str(self, seconds: float) -> str:
-        m, s = divmod(seconds, 60)
-        return f"{int(m):02d}:{int(s):02d}"
+    @rx.var
+    def batch_total(self) -> int:
+        return len(self.batch_project_ids)
 
     @rx.var
-    def formatted_video_projects(self) -> list[Video]:
-        formatted_projects = []
-        for p in self.video_projects:
-            project_copy = p.copy()
-            project_copy["duration_str"] = self._format_duration(p["duration"])
-            project_copy["clips"] = [
+    def batch_percent(self) -> int:
+        if not self.batch_project_ids:
+            return 0
+        return int(100 * (self.batch_done + self.batch_failed) / self.batch_total)
+
+    @rx.var
+    def page_count(self) -> int:
+        return max(1, -(-self.project_count // PROJECTS_PAGE_SIZE))
+
+    @rx.var
+    def has_previous_page(self) -> bool:
+        return self.project_page > 0
+
+    @rx.var
+    def has_next_page(self) -> bool:
+        return (self.project_page + 1) * PROJECTS_PAGE_SIZE < self.project_count
+
+    async def _load_project_page(self):
+        self.project_count, self.project_page, rows = await asyncio.to_thread(
+            project_page, self.project_page
+        )
+        self.project_ids = [p["id"] for p in rows]
+        self.projects = {
+            p["id"]: ProjectInfo(
+                id=p["id"],
+                url=p["url"],
+                title=p["title"],
+                thumbnail=p["thumbnail"],
+                duration=p["duration"],
+                duration_str=format_duration(p["duration"]),
+                file_path=p["file_path"],
+                audio_path=p["audio_path"],
+                error_message=p["error_message"],
+            )
+            for p in rows
+        }
+        self.project_status = {p["id"]: p["status"] for p in rows}
+        self.project_progress = {p["id"]: p["progress"] for p in rows}
+        self.project_video_status = {p["id"]: p["video_status"] for p in rows}
+        self.project_video_progress = {
+            p["id"]: 100 if p["video_status"] == "ready" else 0 for p in rows
+        }
+        self.project_segment_counts = {p["id"]: p["segment_count"] for p in rows}
+        self.project_clips = {
+            p["id"]: [
+                {**c, "duration_str": format_clip_range(c["start"], c["end"])}
+                for c in p["clips"]
+            ]
+            for p in rows
+        }
+        self.clip_status = {c["id"]: c["status"] for p in rows for c in p["clips"]}
+        self.clip_progress = {c["id"]: c["progress"] for p in rows for c in p["clips"]}
+
+    async def _refresh_storage_stats(self):
+        stats = await asyncio.to_thread(media_store.stats)
+        self.storage_label = (
+            f"{format_bytes(stats['total_bytes'])} of "
+            f"{format_bytes(stats['quota_bytes'])} used, "
+            f"{format_bytes(stats['evictable_bytes'])} reclaimable"
+        )
+
+    @rx.event
+    async def load_projects(self):
+        await self._load_project_page()
+        await self._refresh_storage_stats()
+        return VideoState.restore_page_features
+
+    @rx.event
+    async def next_page(self):
+        if self.has_next_page:
+            self.project_page += 1
+            await self._load_project_page()
+            return VideoState.restore_page_features
+
+    @rx.event
+    async def previous_page(self):
+        if self.project_page > 0:
+            self.project_page -= 1
+            await self._load_project_page()
+            return VideoState.restore_page_features
+
+    @rx.event(background=True)
+    async def restore_page_features(self):
+        async with self:
+            missing = [
+                (project_id, self.projects[project_id]["audio_path"])
+                for project_id in self.project_ids
+                if self.project_status[project_id] == "complete"
+                and feature_store.get(project_id) is None
+            ]
+        for project_id, media_path in missing:
+            try:
+                await submit_thread(
+                    restore_features,
+                    project_id,
+                    media_path,
+                    name="features.restore",
+                    timeout=DECODE_TIMEOUT,
+                )
+            except Exception as e:
+                logging.exception(f"Could not restore features for {project_id}: {e}")
+
+    async def _project(self, project_id: str) -> Video | None:
+        if project_id not in self.projects:
+            return await asyncio.to_thread(project_store.get_project, project_id)
+        return Video(
+            **self.projects[project_id],
+            status=self.project_status[project_id],
+            progress=self.project_progress[project_id],
+            video_status=self.project_video_status[project_id],
+            segment_count=self.project_segment_counts[project_id],
+            clips=[
                 {
                     **c,
-                    "duration_str": f"{self._format_duration_str(c['start'])} - {self._format_duration_str(c['end'])}",
+                    "status": self.clip_status[c["id"]],
+                    "progress": self.clip_progress[c["id"]],
                 }
-                for c in p["clips"]
-            ]
-            formatted_projects.append(project_copy)
-        return formatted_projects
+                for c in self.project_clips[project_id]
+            ],
+        )
 
     @rx.event
     def set_video_url(self, url: str):
         self.video_url = url
         self.error = None
 
+    @rx.event
+    def set_batch_mode(self, value: bool):
+        self.batch_mode = value
+        self.error = None
+
+    @rx.event
+    def set_batch_text(self, text: str):
+        self.batch_text = text
+        self.error = None
+
+    @rx.event
+    def set_batch_auto_analyze(self, value: bool):
+        self.batch_auto_analyze = value
+
     @rx.event
     def set_sentiment_weight(self, value: float):
         self.sentiment_weight = float(value)
+        self._rerank_clips()
 
     @rx.event
     def set_subjectivity_weight(self, value: float):
         self.subjectivity_weight = float(value)
+        self._rerank_clips()
 
     @rx.event
     def set_wps_weight(self, value: float):
         self.wps_weight = float(value)
+        self._rerank_clips()
+
+    @rx.event
+    def set_loudness_weight(self, value: float):
+        self.loudness_weight = float(value)
+        self._rerank_clips()
+
+    @rx.event
+    def set_snap_to_keyframes(self, value: bool):
+        self.snap_to_keyframes = value
+
+    @rx.event
+    def set_crop_to_vertical(self, value: bool):
+        self.crop_to_vertical = value
+
+    @rx.event
+    def set_burn_captions(self, value: bool):
+        self.burn_captions = value
+
+    @rx.event
+    def show_timeline(self, project_id: str):
+        self.timeline_project_id = project_id
+        clips = [[c["start"], c["end"]] for c in self.project_clips.get(project_id, [])]
+        return rx.call_script(
+            TIMELINE_SCRIPT % (json.dumps(project_id), json.dumps(clips))
+        )
+
+    @rx.event
+    def hide_timeline(self):
+        self.timeline_project_id = None
+
+    @rx.event
+    async def toggle_timings(self, project_id: str):
+        if self.timings_project_id == project_id:
+            self.timings_project_id = None
+            return
+        self.timings_project_id = project_id
+        breakdown = await asyncio.to_thread(project_store.stage_breakdown, project_id)
+        self.project_timings = stage_timings(breakdown)
+
+    def _scoring_weights(self) -> ScoringWeights:
+        return ScoringWeights(
+            sentiment=self.sentiment_weight,
+            subjectivity=self.subjectivity_weight,
+            wps=self.wps_weight,
+            loudness=self.loudness_weight,
+        )
+
+    def _rerank_clips(self):
+        # Runs on every slider tick, so it stays in memory; commit_weights
+        # stores the ranking once the slider settles.
+        weights = self._scoring_weights()
+        ranked_from = dict(self._ranked_from)
+        for project_id in self.project_ids:
+            if self.project_status[project_id] != "complete":
+                continue
+            features = feature_store.get(project_id)
+            if features is None:
+                continue
+            # Render updates only touch clip_status/clip_progress.
+            current = [
+                {
+                    **c,
+                    "status": self.clip_status.get(c["id"], c["status"]),
+                    "progress": self.clip_progress.get(c["id"], c["progress"]),
+                }
+                for c in self.project_clips.get(project_id, [])
+            ]
+            ranked_from.setdefault(project_id, current)
+            # Clips that leave and re-enter the top-N while dragging keep
+            # their ids, and with them their rendered shorts.
+            clips = clips_from_windows(
+                project_id,
+                features.rank(weights),
+                features.texts,
+                ranked_from[project_id] + current,
+            )
+            self._set_project_clips(project_id, clips)
+        self._ranked_from = ranked_from
+
+    @rx.event
+    async def commit_weights(self):
+        ranked_from, self._ranked_from = self._ranked_from, {}
+        released = False
+        for project_id, before in ranked_from.items():
+            clips = self.project_clips.get(project_id)
+            if clips is None or [c["id"] for c in clips] == [c["id"] for c in before]:
+                continue
+            committed = await asyncio.to_thread(commit_ranking, project_id, clips)
+            self._set_project_clips(project_id, committed)
+            released = released or bool(
+                {c["id"] for c in before} - {c["id"] for c in committed}
+            )
+        if released:
+            await submit_thread(reclaim_storage, name="media.reclaim")
+            await self._refresh_storage_stats()
 
     @rx.event
     async def handle_cookie_upload(self, files: list[rx.UploadFile]):
@@ -114,10 +626,8 @@ class VideoState(rx.State):
         file = files[0]
         upload_data = await file.read()
         upload_dir = rx.get_upload_dir() / "cookies"
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        file_path = upload_dir / file.name
-        with file_path.open("wb") as f:
-            f.write(upload_data)
+        await asyncio.to_thread(upload_dir.mkdir, parents=True, exist_ok=True)
+        await asyncio.to_thread((upload_dir / file.name).write_bytes, upload_data)
         self.cookie_file_path = f"cookies/{file.name}"
         yield rx.toast.info(f"Uploaded cookie file: {file.name}")
 
@@ -135,32 +645,45 @@ class VideoState(rx.State):
                 "quiet": True,
                 "no_warnings": True,
                 "extract_flat": False,
-                "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+                "format": FULL_FORMAT,
                 "noplaylist": True,
             }
             if self.cookie_file_path:
                 cookie_path = rx.get_upload_dir() / self.cookie_file_path
                 if cookie_path.exists():
                     ydl_opts["cookies"] = str(cookie_path)
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(self.video_url, download=False)
             project_id = str(uuid.uuid4())
-            new_project = Video(
-                id=project_id,
-                url=self.video_url,
-                title=info.get("title", "Untitled Video"),
-                thumbnail=info.get("thumbnail", "/placeholder.svg"),
-                duration=info.get("duration", 0),
-                duration_str="",
-                status="pending",
-                progress=0,
-                file_path=None,
-                error_message=None,
-                segments=[],
-                clips=[],
-            )
+            # The project row is created inside the span so its timing sticks.
+            with stage_span("metadata", project_id):
+                info = await submit_thread(
+                    media_fetcher.extract,
+                    self.video_url,
+                    ydl_opts,
+                    name="yt_dlp.extract_info",
+                    timeout=EXTRACT_INFO_TIMEOUT,
+                )
+                await asyncio.to_thread(
+                    project_store.create_project,
+                    Video(
+                        id=project_id,
+                        url=self.video_url,
+                        title=info.get("title", "Untitled Video"),
+                        thumbnail=info.get("thumbnail", "/placeholder.svg"),
+                        duration=info.get("duration", 0),
+                        duration_str="",
+                        status="pending",
+                        progress=0,
+                        file_path=None,
+                        audio_path=None,
+                        error_message=None,
+                        video_status="missing",
+                        segment_count=0,
+                        clips=[],
+                    ),
+                )
             async with self:
-                self.video_projects.insert(0, new_project)
+                self.project_page = 0
+                await self._load_project_page()
                 self.video_url = ""
                 self.is_loading = False
             yield VideoState.download_video(project_id)
@@ -172,45 +695,181 @@ class VideoState(rx.State):
                 )
                 self.is_loading = False
 
-    def _update_project_status(
+    @rx.event(background=True)
+    async def add_batch(self):
+        sources = [
+            line.strip() for line in self.batch_text.splitlines() if line.strip()
+        ]
+        if not sources:
+            async with self:
+                self.error = "Enter at least one URL, playlist or channel."
+            return
+        async with self:
+            self.is_loading = True
+            self.error = None
+        ydl_opts = {"quiet": True, "no_warnings": True}
+        if self.cookie_file_path:
+            cookie_path = rx.get_upload_dir() / self.cookie_file_path
+            if cookie_path.exists():
+                ydl_opts["cookies"] = str(cookie_path)
+        entries = []
+        failed = []
+        for source in sources:
+            try:
+                with stage_span("metadata.expand") as span:
+                    expanded = await submit_thread(
+                        media_fetcher.expand,
+                        source,
+                        ydl_opts,
+                        BATCH_MAX_ENTRIES,
+                        name="yt_dlp.expand",
+                        timeout=EXTRACT_INFO_TIMEOUT,
+                    )
+                    span.add(entries=len(expanded))
+                entries.extend(expanded)
+            except Exception as e:
+                logging.exception(f"Failed to expand {source}: {e}")
+                failed.append(source)
+        videos = []
+        seen = set()
+        for entry in entries[:BATCH_MAX_ENTRIES]:
+            url = entry.get("webpage_url") or entry.get("url")
+            if url in seen:
+                continue
+            seen.add(url)
+            thumbnails = entry.get("thumbnails") or [{}]
+            videos.append(
+                Video(
+                    id=str(uuid.uuid4()),
+                    url=url,
+                    title=entry.get("title") or url,
+                    thumbnail=entry.get("thumbnail")
+                    or thumbnails[-1].get("url")
+                    or "/placeholder.svg",
+                    duration=entry.get("duration") or 0,
+                    duration_str="",
+                    status="pending",
+                    progress=0,
+                    file_path=None,
+                    audio_path=None,
+                    error_message=None,
+                    video_status="missing",
+                    segment_count=0,
+                    clips=[],
+                )
+            )
+        await asyncio.to_thread(project_store.create_projects, videos)
+        project_ids = [video["id"] for video in videos]
+        async with self:
+            self.batch_project_ids = project_ids
+            self.batch_done = 0
+            self.batch_failed = 0
+            self.batch_text = ""
+            self.is_loading = False
+            self.project_page = 0
+            await self._load_project_page()
+            if failed:
+                self.error = f"Could not read {len(failed)} of {len(sources)} sources."
+            yield rx.toast.info(f"Queued {len(project_ids)} videos for download.")
+        for project_id in project_ids:
+            yield VideoState.download_video(project_id)
+
+    async def _update_project_status(
         self,
         project_id: str,
         status: Status | None = None,
         progress: int | None = None,
         file_path: str | None = None,
+        audio_path: str | None = None,
         error_message: str | None = None,
+        video_status: VideoStatus | None = None,
+        video_progress: int | None = None,
         segments: list[TranscriptionSegment] | None = None,
         clips: list[Clip] | None = None,
     ):
-        for i, proj in enumerate(self.video_projects):
-            if proj["id"] == project_id:
-                if status is not None:
-                    self.video_projects[i]["status"] = status
-                if progress is not None:
-                    self.video_projects[i]["progress"] = progress
-                if file_path is not None:
-                    self.video_projects[i]["file_path"] = file_path
-                if error_message is not None:
-                    self.video_projects[i]["error_message"] = error_message
-                if segments is not None:
-                    self.video_projects[i]["segments"] = segments
-                if clips is not None:
-                    self.video_projects[i]["clips"] = clips
-                break
-
-    def _update_clip_status(
+        info = {
+            k: v
+            for k, v in (
+                ("file_path", file_path),
+                ("audio_path", audio_path),
+                ("error_message", error_message),
+            )
+            if v is not None
+        }
+        fields = dict(info)
+        if status is not None:
+            fields["status"] = status
+        if progress is not None:
+            fields["progress"] = progress
+        if video_status is not None:
+            fields["video_status"] = video_status
+        # Progress-only ticks for the video stream have nothing to store.
+        if fields or segments is not None or clips is not None:
+            await asyncio.to_thread(
+                store_project_status, project_id, fields, segments, clips
+            )
+        if project_id not in self.projects:
+            return
+        # Each field lives in its own var so a progress tick only diffs the
+        # small progress map rather than every project on the page.
+        if status is not None and self.project_status[project_id] != status:
+            self.project_status[project_id] = status
+        if progress is not None and self.project_progress[project_id] != progress:
+            self.project_progress[project_id] = progress
+        if (
+            video_status is not None
+            and self.project_video_status[project_id] != video_status
+        ):
+            self.project_video_status[project_id] = video_status
+        if (
+            video_progress is not None
+            and self.project_video_progress[project_id] != video_progress
+        ):
+            self.project_video_progress[project_id] = video_progress
+        if info:
+            self.projects[project_id] = {**self.projects[project_id], **info}
+        if segments is not None:
+            self.project_segment_counts[project_id] = len(segments)
+        if clips is not None:
+            self._set_project_clips(project_id, clips)
+
+    def _set_project_clips(self, project_id: str, clips: list[Clip]):
+        stale = {c["id"] for c in self.project_clips.get(project_id, [])} - {
+            c["id"] for c in clips
+        }
+        for clip_id in stale:
+            self.clip_status.pop(clip_id, None)
+            self.clip_progress.pop(clip_id, None)
+        for clip in clips:
+            if self.clip_status.get(clip["id"]) != clip["status"]:
+                self.clip_status[clip["id"]] = clip["status"]
+            if self.clip_progress.get(clip["id"]) != clip["progress"]:
+                self.clip_progress[clip["id"]] = clip["progress"]
+        self.project_clips[project_id] = clips
+
+    async def _append_project_segments(
+        self, project_id: str, segments: list[TranscriptionSegment]
+    ):
+        if not segments:
+            return
+        await asyncio.to_thread(project_store.append_segments, project_id, segments)
+        if project_id in self.project_segment_counts:
+            self.project_segment_counts[project_id] += len(segments)
+
+    async def _update_clip_status(
         self,
         video_id: str,
         clip_id: str,
-        status: Literal["pending", "generating", "complete", "error"],
+        status: ClipStatus,
+        progress: int | None = None,
     ):
-        for proj in self.video_projects:
-            if proj["id"] == video_id:
-                for i, clip in enumerate(proj["clips"]):
-                    if clip["id"] == clip_id:
-                        proj["clips"][i]["status"] = status
-                        break
-                break
+        await asyncio.to_thread(project_store.update_clip, clip_id, status, progress)
+        if clip_id not in self.clip_status:
+            return
+        if self.clip_status[clip_id] != status:
+            self.clip_status[clip_id] = status
+        if progress is not None and self.clip_progress[clip_id] != progress:
+            self.clip_progress[clip_id] = progress
 
     @rx.event
     def set_processing_video_id(self, video_id: str | None):
@@ -218,32 +877,239 @@ class VideoState(rx.State):
 
     @rx.event(background=True)
     async def download_video(self, project_id: str):
-        async with self:
-            self._update_project_status(project_id, "downloading", 0)
-        project = next((p for p in self.video_projects if p["id"] == project_id), None)
+        project = await self._project(project_id)
         if not project:
             return
-        upload_dir = rx.get_upload_dir() / "videos"
-        upload_dir.mkdir(parents=True, exist_ok=True)
-        filename = f"{project_id}.mp4"
-        output_path = upload_dir / filename
-        progress_hook_self = self
+        video_key = f"video:{media_fetcher.cache.lookup_key(project['url'])}"
+        try:
+            video = await asyncio.to_thread(claim_media, video_key, project_id)
+            if video is not None:
+                logging.info(f"Reusing stored media {video_key} for {project_id}")
+                source = video
+            else:
+                # Analysis only needs the audio track, so fetch that first and
+                # leave the (much larger) video stream for later.
+                source = await self._fetch_audio_source(project, video_key)
+                if source["kind"] == "video":
+                    video = source
+            async with self:
+                await self._update_project_status(
+                    project_id,
+                    "processing",
+                    100,
+                    video_status="ready" if video is not None else None,
+                )
+            audio_path = await self._prepare_audio(
+                project_id, video_key, source["path"]
+            )
+            if audio_path is None and video is None:
+                raise RuntimeError("Could not decode the audio track.")
+            await submit_thread(reclaim_storage, name="media.reclaim")
+            async with self:
+                await self._update_project_status(
+                    project_id,
+                    "complete",
+                    100,
+                    file_path=video["path"] if video is not None else None,
+                    audio_path=audio_path,
+                )
+                await self._refresh_storage_stats()
+                in_batch = project_id in self.batch_project_ids
+                if in_batch:
+                    self.batch_done += 1
+                else:
+                    yield rx.toast.success(
+                        f"Video '{project['title']}' is ready for analysis!"
+                    )
+            if video is None and VIDEO_FETCH_MODE == "background":
+                yield VideoState.fetch_video(project_id)
+            if in_batch and self.batch_auto_analyze:
+                from app.states.analysis_state import AnalysisState
+
+                yield AnalysisState.analyze_video(project_id)
+        except Exception as e:
+            logging.exception(f"Download failed for {project['url']}: {e}")
+            async with self:
+                await self._update_project_status(
+                    project_id, "error", error_message=str(e)
+                )
+                if project_id in self.batch_project_ids:
+                    self.batch_failed += 1
+                yield rx.toast.error(f"Download failed: {str(e)}")
+
+    @rx.event(background=True)
+    async def fetch_video(self, project_id: str):
+        project = await self._project(project_id)
+        if not project or project["file_path"]:
+            return
+        video_key = f"video:{media_fetcher.cache.lookup_key(project['url'])}"
+        try:
+            async with _media_lock(video_key):
+                video = await asyncio.to_thread(claim_media, video_key, project_id)
+                if video is None:
+                    video = await self._fetch_video_stream(project, video_key)
+            # The muxed file carries the audio now; the source is only kept
+            # around while other projects still need it.
+            await asyncio.to_thread(
+                media_store.release, f"source:{video_key}", project_id
+            )
+            await submit_thread(reclaim_storage, name="media.reclaim")
+            async with self:
+                await self._update_project_status(
+                    project_id,
+                    file_path=video["path"],
+                    video_status="ready",
+                    video_progress=100,
+                )
+                await self._refresh_storage_stats()
+        except Exception as e:
+            logging.exception(f"Video download failed for {project['url']}: {e}")
+            async with self:
+                await self._update_project_status(project_id, video_status="error")
+                yield rx.toast.error(f"Video download failed: {str(e)}")
+
+    async def _prepare_audio(
+        self, project_id: str, video_key: str, media_path: str
+    ) -> str | None:
+        audio_key = f"audio:{video_key}"
+        try:
+            async with _media_lock(audio_key):
+                audio = await asyncio.to_thread(claim_media, audio_key, project_id)
+                if audio is not None:
+                    audio_path = audio["path"]
+                else:
+                    audio_path = media_store.path_for("audio", video_key, ".pcm")
+                    with stage_span("decode", project_id) as span:
+                        samples = await submit_thread(
+                            decode_pcm,
+                            str(media_store.absolute(media_path)),
+                            media_store.absolute(audio_path),
+                            name="ffmpeg.decode_pcm",
+                            timeout=DECODE_TIMEOUT,
+                        )
+                        span.add(audio_seconds=samples / SAMPLE_RATE)
+                    await asyncio.to_thread(
+                        media_store.add,
+                        audio_key,
+                        "audio",
+                        audio_path,
+                        owner=project_id,
+                    )
+        except Exception as e:
+            logging.exception(f"Audio decode failed for {project_id}: {e}")
+            return None
+        try:
+            with stage_span("waveform", project_id):
+                await submit_thread(
+                    ensure_peaks, audio_path, project_id, name="waveform.peaks"
+                )
+        except Exception as e:
+            # The timeline builds peaks on first view if this fails.
+            logging.exception(f"Waveform peaks failed for {project_id}: {e}")
+        return audio_path
+
+    async def _fetch_audio_source(self, project: Video, video_key: str) -> MediaRecord:
+        source_key = f"source:{video_key}"
+        async with _media_lock(source_key):
+            source = await asyncio.to_thread(claim_media, source_key, project["id"])
+            if source is not None:
+                return source
+            template = media_store.path_for("audio", source_key, ".%(ext)s")
+            info = await self._fetch_media(
+                project["id"], project["url"], template, AUDIO_FORMAT, "audio"
+            )
+            async with self:
+                await self._backfill_project_info(project, info)
+            path = _downloaded_path(template, info)
+            if info.get("vcodec") == "none":
+                return await asyncio.to_thread(
+                    media_store.add, source_key, "audio", path, owner=project["id"]
+                )
+        # No audio-only stream was offered, so the fallback format already is
+        # the full video.
+        async with _media_lock(video_key):
+            return await asyncio.to_thread(
+                move_into_store,
+                media_store.absolute(path),
+                video_key,
+                "video",
+                media_store.path_for("video", video_key, Path(path).suffix),
+                project["id"],
+            )
+
+    async def _fetch_video_stream(self, project: Video, video_key: str) -> MediaRecord:
+        source = await asyncio.to_thread(media_store.get, f"source:{video_key}")
+        template = media_store.path_for("video", f"stream:{video_key}", ".%(ext)s")
+        info = await self._fetch_media(
+            project["id"],
+            project["url"],
+            template,
+            VIDEO_FORMAT if source is not None else FULL_FORMAT,
+            "video",
+        )
+        stream_path = _downloaded_path(template, info)
+        if info.get("acodec") != "none" or source is None:
+            return await asyncio.to_thread(
+                move_into_store,
+                media_store.absolute(stream_path),
+                video_key,
+                "video",
+                media_store.path_for("video", video_key, Path(stream_path).suffix),
+                project["id"],
+            )
+        file_path = media_store.path_for("video", video_key, ".mp4")
+        try:
+            with stage_span("mux", project["id"]):
+                await submit_thread(
+                    mux_streams,
+                    str(media_store.absolute(stream_path)),
+                    str(media_store.absolute(source["path"])),
+                    media_store.absolute(file_path),
+                    name="ffmpeg.mux",
+                    timeout=DECODE_TIMEOUT,
+                )
+        finally:
+            await asyncio.to_thread(
+                media_store.absolute(stream_path).unlink, missing_ok=True
+            )
+        return await asyncio.to_thread(
+            media_store.add, video_key, "video", file_path, owner=project["id"]
+        )
+
+    async def _fetch_media(
+        self,
+        project_id: str,
+        url: str,
+        template: str,
+        fmt: str,
+        phase: DownloadPhase,
+    ) -> dict:
+        output_path = media_store.absolute(template)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        latest = {"progress": 0}
 
-        @rx.event
         def progress_hook(d):
             if d["status"] == "downloading":
                 progress_str = d.get("_percent_str", "0%").strip().replace("%", "")
                 try:
-                    progress = int(float(progress_str))
-                    progress_hook_self.video_projects = [
-                        {**p, "progress": progress} if p["id"] == project_id else p
-                        for p in progress_hook_self.video_projects
-                    ]
+                    latest["progress"] = int(float(progress_str))
                 except (ValueError, TypeError) as e:
                     logging.exception(f"Error parsing progress: {e}")
 
+        async def report(progress: int, started: bool = False):
+            if phase == "audio":
+                await self._update_project_status(
+                    project_id, "downloading" if started else None, progress
+                )
+            else:
+                await self._update_project_status(
+                    project_id,
+                    video_status="downloading" if started else None,
+                    video_progress=progress,
+                )
+
         ydl_opts = {
-            "format": "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best",
+            "format": fmt,
             "outtmpl": str(output_path),
             "progress_hooks": [progress_hook],
             "noplaylist": True,
@@ -252,18 +1118,176 @@ class VideoState(rx.State):
             cookie_path = rx.get_upload_dir() / self.cookie_file_path
             if cookie_path.exists():
                 ydl_opts["cookies"] = str(cookie_path)
+
+        async def attempt() -> dict:
+            await host_limiter.wait(url)
+            job = submit_thread(
+                media_fetcher.download,
+                url,
+                ydl_opts,
+                name=f"yt_dlp.download_{phase}",
+                timeout=DOWNLOAD_TIMEOUT,
+            )
+            throttle = ProgressThrottle()
+            throttle.ready(0)
+            while not await job.wait(PROGRESS_POLL_SECONDS):
+                progress = latest["progress"]
+                if throttle.ready(progress):
+                    async with self:
+                        await report(progress)
+            return await job
+
+        async with download_slots:
+            async with self:
+                await report(0, started=True)
+            with stage_span(f"download.{phase}", project_id) as span:
+                info = await with_retries(attempt, name=f"Download of {url} ({phase})")
+                downloaded = media_store.absolute(_downloaded_path(template, info))
+                if downloaded.exists():
+                    span.add(bytes=downloaded.stat().st_size)
+            return info
+
+    async def _backfill_project_info(self, project: Video, info: dict):
+        # Flat playlist entries can lack a thumbnail or duration; the full info
+        # from the download fills them in.
+        fields = {}
+        if not project["duration"] and info.get("duration"):
+            fields["duration"] = info["duration"]
+        if project["thumbnail"] == "/placeholder.svg" and info.get("thumbnail"):
+            fields["thumbnail"] = info["thumbnail"]
+        if not fields:
+            return
+        await asyncio.to_thread(project_store.update_project, project["id"], **fields)
+        if project["id"] in self.projects:
+            if "duration" in fields:
+                fields["duration_str"] = format_duration(fields["duration"])
+            self.projects[project["id"]] = {**self.projects[project["id"]], **fields}
+
+    @rx.event
+    def upload_local_video(self):
+        self.is_loading = True
+        self.error = None
+        if not self._upload_ticket:
+            # Ties staged uploads to this session: only the session that
+            # uploaded a file can import it.
+            self._upload_ticket = secrets.token_hex(16)
+        return rx.call_script(
+            UPLOAD_SCRIPT % json.dumps(self._upload_ticket),
+            callback=VideoState.import_local_upload,
+        )
+
+    @rx.event(background=True)
+    async def import_local_upload(self, result: dict):
+        async with self:
+            ticket = self._upload_ticket
+        staging_dir = media_store.staging_dir
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([project["url"]])
+            if "error" in result:
+                raise UnknownUpload(result["error"])
+            upload_id = str(result.get("upload_id", ""))
+            staged = await asyncio.to_thread(
+                claim_upload, staging_dir, upload_id, ticket
+            )
+        except UnknownUpload as e:
             async with self:
-                self._update_project_status(
-                    project_id, "complete", 100, file_path=f"videos/{filename}"
+                self.error = f"Upload failed: {e}"
+                self.is_loading = False
+            return
+        video_key = f"video:sha:{staged['digest']}"
+        project_id = str(uuid.uuid4())
+        incoming = staging_path(staging_dir, staged["upload_id"])
+        try:
+            async with _media_lock(video_key):
+                video = await asyncio.to_thread(claim_media, video_key, project_id)
+                if video is not None:
+                    await asyncio.to_thread(incoming.unlink, missing_ok=True)
+                else:
+                    video = await asyncio.to_thread(
+                        move_into_store,
+                        incoming,
+                        video_key,
+                        "video",
+                        media_store.path_for("video", video_key, staged["suffix"]),
+                        project_id,
+                    )
+            video_path = str(media_store.absolute(video["path"]))
+            probe = await submit_thread(
+                probe_media, video_path, name="ffmpeg.probe", timeout=60
+            )
+            thumbnail_path = f"thumbnails/{staged['digest']}.jpg"
+            try:
+                await submit_thread(
+                    extract_thumbnail,
+                    video_path,
+                    rx.get_upload_dir() / thumbnail_path,
+                    min(1.0, probe.duration / 10),
+                    name="ffmpeg.thumbnail",
+                    timeout=60,
                 )
-                yield rx.toast.success(
-                    f"Video '{project['title']}' downloaded successfully!"
+                thumbnail = f"{get_config().api_url}/_upload/{thumbnail_path}"
+            except Exception as e:
+                logging.exception(f"Thumbnail extraction failed: {e}")
+                thumbnail = "/placeholder.svg"
+            await asyncio.to_thread(
+                project_store.create_project,
+                Video(
+                    id=project_id,
+                    url=f"file://{staged['filename']}",
+                    title=Path(staged["filename"]).stem,
+                    thumbnail=thumbnail,
+                    duration=probe.duration,
+                    duration_str="",
+                    status="processing",
+                    progress=100,
+                    file_path=None,
+                    audio_path=None,
+                    error_message=None,
+                    video_status="ready",
+                    segment_count=0,
+                    clips=[],
+                ),
+            )
+            async with self:
+                self.project_page = 0
+                await self._load_project_page()
+                self.is_loading = False
+            audio_path = await self._prepare_audio(project_id, video_key, video["path"])
+            await submit_thread(reclaim_storage, name="media.reclaim")
+            async with self:
+                await self._update_project_status(
+                    project_id,
+                    "complete",
+                    100,
+                    file_path=video["path"],
+                    audio_path=audio_path,
                 )
+                await self._refresh_storage_stats()
+                yield rx.toast.success(f"Uploaded '{staged['filename']}'.")
         except Exception as e:
-            logging.exception(f"Download failed for {project['url']}: {e}")
+            logging.exception(f"Local import failed for {staged['filename']}: {e}")
+            await asyncio.to_thread(incoming.unlink, missing_ok=True)
             async with self:
-                self._update_project_status(project_id, "error", error_message=str(e))
-                yield rx.toast.error(f"Download failed: {str(e)}")
\ No newline at end of file
+                self.is_loading = False
+                if project_id in self.projects:
+                    await self._update_project_status(
+                        project_id, "error", error_message=str(e)
+                    )
+                else:
+                    await asyncio.to_thread(media_store.release_owner, project_id)
+                    self.error = f"Upload failed: {e}"
+
+    @rx.event(background=True)
+    async def delete_project(self, project_id: str):
+        async with self:
+            project = await self._project(project_id)
+        if project is None:
+            return
+        await asyncio.to_thread(
+            forget_project, project_id, [clip["id"] for clip in project["clips"]]
+        )
+        feature_store.discard(project_id)
+        async with self:
+            await self._load_project_page()
+        await submit_thread(reclaim_storage, name="media.reclaim")
+        async with self:
+            await self._refresh_storage_stats()
@@ -0,0 +1,137 @@
+// Zoomable waveform timeline backed by the /api/waveform peak tiles. Only the
+// tiles covering the visible range at the current zoom are fetched, so an hour
+// of audio costs a few kilobytes per view.
+(() => {
+  const MIN_PIXELS_PER_PEAK = 1;
+  let view = null;
+
+  function chooseLevel(meta, secondsPerPixel) {
+    const base = meta.block / meta.sample_rate;
+    let level = 0;
+    while (
+      level + 1 < meta.levels.length &&
+      base * 2 ** (level + 1) <= secondsPerPixel * MIN_PIXELS_PER_PEAK
+    ) {
+      level += 1;
+    }
+    return level;
+  }
+
+  function tile(v, level, index) {
+    const key = `${level}/${index}`;
+    if (!v.tiles.has(key)) {
+      v.tiles.set(key, null);
+      fetch(`${v.base}/api/waveform/${v.projectId}/${key}`)
+        .then((r) => (r.ok ? r.arrayBuffer() : null))
+        .then((buffer) => {
+          if (buffer === null) return;
+          v.tiles.set(key, new Int8Array(buffer));
+          if (view === v) draw(v);
+        });
+    }
+    return v.tiles.get(key);
+  }
+
+  function draw(v) {
+    const canvas = v.canvas;
+    const ctx = canvas.getContext("2d");
+    const width = canvas.width;
+    const height = canvas.height;
+    const mid = height / 2;
+    ctx.clearRect(0, 0, width, height);
+    ctx.fillStyle = "rgba(239, 68, 68, 0.15)";
+    for (const [start, end] of v.clips) {
+      const x0 = (start - v.start) / v.secondsPerPixel;
+      const x1 = (end - v.start) / v.secondsPerPixel;
+      if (x1 >= 0 && x0 <= width) ctx.fillRect(x0, 0, x1 - x0, height);
+    }
+    const level = chooseLevel(v.meta, v.secondsPerPixel);
+    const peakSeconds = (v.meta.block / v.meta.sample_rate) * 2 ** level;
+    const count = v.meta.levels[level];
+    const size = v.meta.tile_size;
+    ctx.fillStyle = "#4b5563";
+    for (let x = 0; x < width; x++) {
+      const first = Math.floor((v.start + x * v.secondsPerPixel) / peakSeconds);
+      const last = Math.floor((v.start + (x + 1) * v.secondsPerPixel) / peakSeconds);
+      let lo = 127;
+      let hi = -127;
+      for (let p = Math.max(first, 0); p <= Math.min(last, count - 1); p++) {
+        const peaks = tile(v, level, Math.floor(p / size));
+        if (!peaks) continue;
+        const i = (p % size) * 2;
+        lo = Math.min(lo, peaks[i]);
+        hi = Math.max(hi, peaks[i + 1]);
+      }
+      if (hi < lo) continue;
+      const top = mid - (hi / 127) * mid;
+      ctx.fillRect(x, top, 1, Math.max(1, mid - (lo / 127) * mid - top));
+    }
+  }
+
+  function clamp(v) {
+    const span = v.canvas.width * v.secondsPerPixel;
+    v.start = Math.min(Math.max(0, v.start), Math.max(0, v.meta.duration - span));
+  }
+
+  function attach(v) {
+    const canvas = v.canvas;
+    canvas.onwheel = (event) => {
+      event.preventDefault();
+      const x = event.offsetX * (canvas.width / canvas.clientWidth);
+      const at = v.start + x * v.secondsPerPixel;
+      const factor = event.deltaY > 0 ? 1.25 : 0.8;
+      v.secondsPerPixel = Math.min(
+        Math.max(v.secondsPerPixel * factor, v.minSecondsPerPixel),
+        v.maxSecondsPerPixel,
+      );
+      v.start = at - x * v.secondsPerPixel;
+      clamp(v);
+      draw(v);
+    };
+    let dragX = null;
+    canvas.onpointerdown = (event) => {
+      dragX = event.clientX;
+      canvas.setPointerCapture(event.pointerId);
+    };
+    canvas.onpointermove = (event) => {
+      if (dragX === null) return;
+      const scale = canvas.width / canvas.clientWidth;
+      v.start -= (event.clientX - dragX) * scale * v.secondsPerPixel;
+      dragX = event.clientX;
+      clamp(v);
+      draw(v);
+    };
+    canvas.onpointerup = () => {
+      dragX = null;
+    };
+  }
+
+  async function open(canvasId, base, projectId, clips) {
+    const canvas = document.getElementById(canvasId);
+    if (!canvas) {
+      requestAnimationFrame(() => open(canvasId, base, projectId, clips));
+      return;
+    }
+    const response = await fetch(`${base}/api/waveform/${projectId}`);
+    if (!response.ok) return;
+    const meta = await response.json();
+    canvas.width = canvas.clientWidth;
+    const maxSecondsPerPixel = Math.max(meta.duration / canvas.width, 1e-4);
+    view = {
+      canvas,
+      base,
+      projectId,
+      clips,
+      meta,
+      tiles: new Map(),
+      start: 0,
+      secondsPerPixel: maxSecondsPerPixel,
+      minSecondsPerPixel: meta.block / meta.sample_rate / 4,
+      maxSecondsPerPixel,
+    };
+    attach(view);
+    draw(view);
+  }
+
+  window.shortsWaveform = { open };
+})();
@@ -0,0 +1,130 @@
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from app.services.audio_ingest import decode_pcm, open_pcm
+from app.services.loudness import SAMPLE_RATE
+from app.services.model_registry import DEFAULT_MODEL_KEY, ModelKey, model_registry
+from app.services.parallel_transcribe import (
+    SeamStitcher,
+    chunk_model_key,
+    plan_chunks,
+    transcribe_chunk,
+)
+from app.services.transcript_cache import segment_record
+
+OPTIONS = {"word_timestamps": True}
+
+
+def synthetic_pcm(path: Path, minutes: float, seed: int = 0) -> None:
+    # Bursts of noise separated by short pauses, roughly the rhythm of speech.
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    audio = np.zeros(total, dtype=np.float32)
+    t = 0
+    while t < total:
+        n = int(rng.uniform(2.0, 8.0) * SAMPLE_RATE)
+        audio[t : t + n] = rng.normal(0, 0.1, len(audio[t : t + n]))
+        t += n + int(rng.uniform(0.3, 1.2) * SAMPLE_RATE)
+    audio.tofile(path)
+
+
+def _load(model_key: ModelKey) -> None:
+    model_registry.get(*model_key)
+
+
+def _worker_pid(_: int) -> int:
+    return os.getpid()
+
+
+def sequential(pcm_path: Path) -> dict:
+    model_key = DEFAULT_MODEL_KEY._replace(cpu_threads=os.cpu_count() or 1)
+    model = model_registry.get(*model_key)
+    started = time.perf_counter()
+    segments, _ = model.transcribe(np.array(open_pcm(pcm_path)), **OPTIONS)
+    records = [segment_record(s) for s in segments]
+    return {"seconds": time.perf_counter() - started, "segments": len(records)}
+
+
+def chunked(pcm_path: Path, workers: int, chunk_seconds: float) -> dict:
+    audio = open_pcm(pcm_path)
+    chunks = plan_chunks(audio, chunk_seconds=chunk_seconds)
+    model_key = chunk_model_key(workers)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_load,
+        initargs=(model_key,),
+    ) as pool:
+        # Spawn every worker and load its model before the clock starts.
+        list(pool.map(_worker_pid, range(workers)))
+        started = time.perf_counter()
+        results = pool.map(
+            transcribe_chunk,
+            [str(pcm_path)] * len(chunks),
+            chunks,
+            [model_key] * len(chunks),
+            [OPTIONS] * len(chunks),
+        )
+        stitcher = SeamStitcher()
+        records = [
+            r for chunk, rs in zip(chunks, results) for r in stitcher.add(chunk, rs)
+        ]
+        elapsed = time.perf_counter() - started
+    return {"seconds": elapsed, "segments": len(records), "chunks": len(chunks)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunked transcription scaling")
+    parser.add_argument("--media", help="audio or video file; synthetic if omitted")
+    parser.add_argument("--minutes", type=float, default=20.0)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--chunk-seconds", type=float, default=300.0)
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_transcribe_") as tmp:
+        pcm_path = Path(tmp) / "audio.pcm"
+        if args.media:
+            decode_pcm(args.media, pcm_path)
+        else:
+            synthetic_pcm(pcm_path, args.minutes)
+        audio_seconds = len(open_pcm(pcm_path)) / SAMPLE_RATE
+
+        results = {}
+        if not args.skip_sequential:
+            results["sequential"] = sequential(pcm_path)
+        for workers in (int(w) for w in args.workers.split(",")):
+            results[f"chunked_{workers}"] = chunked(
+                pcm_path, workers, args.chunk_seconds
+            )
+        for result in results.values():
+            result["real_time_factor"] = result["seconds"] / audio_seconds
+        if "sequential" in results:
+            for result in results.values():
+                result["speedup"] = results["sequential"]["seconds"] / result["seconds"]
+
+    print(
+        json.dumps(
+            {
+                "media": args.media or "synthetic",
+                "audio_seconds": audio_seconds,
+                "model": DEFAULT_MODEL_KEY.label(),
+                "cpu_count": os.cpu_count(),
+                "chunk_seconds": args.chunk_seconds,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+import argparse
+import contextlib
+import functools
+import http.server
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+os.environ.setdefault("SHORTS_DATA_DIR", tempfile.mkdtemp(prefix="bench_pipeline_"))
+# Whisper must come from the local model cache; nothing here may touch the network.
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+import numpy as np
+
+from app.services.audio_ingest import decode_pcm, open_pcm
+from app.services.captions import caption_effect
+from app.services.clip_search import find_top_windows
+from app.services.feature_store import ProjectFeatures
+from app.services.loudness import SAMPLE_RATE, analyze_loudness_array
+from app.services.media_fetch import InfoCache, MediaFetcher
+from app.services.model_registry import DEFAULT_MODEL_KEY, model_registry
+from app.services.render import ffmpeg_exe, render_clip
+from app.services.scoring import ScoringWeights, segment_features, weight_vector
+from app.services.sentiment import sentiment_engine
+from app.services.smart_crop import crop_effect, plan_crop
+from app.services.streaming import StreamingAnalysis
+from app.services.transcript_cache import segment_record
+from benchmarks.bench_sentiment import VOCABULARY
+
+# Loading the Reflex config prints warnings on stdout, which carries the JSON.
+with contextlib.redirect_stdout(sys.stderr):
+    from app.states.analysis_state import TRANSCRIBE_OPTIONS
+    from app.states.video_state import AUDIO_FORMAT
+
+WORKLOAD_KEYS = ("media_seconds", "segments", "clip_seconds")
+STAGES = (
+    "download",
+    "decode",
+    "loudness",
+    "transcribe",
+    "features",
+    "clip_search",
+    "rerank",
+    "render_snap",
+    "render_smart",
+    "render_reencode",
+)
+WEIGHTS = ScoringWeights(sentiment=0.4, subjectivity=0.3, wps=0.3, loudness=0.2)
+# Syllable-rate amplitude bursts on a wobbling pitch, gated into phrases.
+SPEECH_LIKE = (
+    "0.4*sin(2*PI*(160+30*sin(2*PI*0.7*t))*t)"
+    "*(0.5+0.5*sin(2*PI*4*t))*gt(sin(2*PI*0.21*t)+0.3*sin(2*PI*1.3*t),-0.4)"
+)
+
+
+def synthetic_media(
+    path: Path, seconds: float, width: int = 1280, height: int = 720, fps: int = 30
+) -> None:
+    subprocess.run(
+        [ffmpeg_exe(), "-hide_banner", "-nostdin", "-v", "error", "-y"]
+        + ["-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}"]
+        + ["-f", "lavfi", "-i", f"aevalsrc='{SPEECH_LIKE}':s=44100"]
+        + ["-t", f"{seconds:.3f}", "-c:v", "libx264", "-preset", "ultrafast"]
+        + ["-g", str(fps * 2), "-pix_fmt", "yuv420p", "-c:a", "aac"]
+        + ["-movflags", "+faststart", str(path)],
+        check=True,
+    )
+
+
+def synthetic_transcript(seconds: float, count: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    step = seconds / max(count, 1)
+    segments = []
+    for i in range(count):
+        start = i * step
+        end = start + step * rng.uniform(0.7, 1.0)
+        texts = rng.choices(VOCABULARY, k=rng.randint(3, 25))
+        per_word = (end - start) / len(texts)
+        words = [
+            {
+                "start": start + k * per_word,
+                "end": start + (k + 1) * per_word,
+                "word": f" {text}",
+                "probability": 1.0,
+            }
+            for k, text in enumerate(texts)
+        ]
+        segments.append(
+            {
+                "start": start,
+                "end": end,
+                "text": "".join(w["word"] for w in words),
+                "words": words,
+            }
+        )
+    return segments
+
+
+class LocalServer:
+    # Stand-in for a remote host: yt_dlp fetches the file over plain HTTP
+    # through its generic extractor, just without the network.
+    def __init__(self, directory: Path):
+        handler = functools.partial(Handler, directory=str(directory))
+        self.server = QuietServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, name: str) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/{name}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietServer(http.server.ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # yt_dlp drops its probe connection once it has sniffed the headers.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class Pipeline:
+    def __init__(self, workdir: Path, source: Path, url: str, args):
+        self.workdir = workdir
+        self.source = source
+        self.url = url
+        self.args = args
+        self.pcm_path = workdir / "audio.pcm"
+        self.runs = 0
+        self.audio: np.ndarray | None = None
+        self.loudness = None
+        self.segments = synthetic_transcript(args.seconds, args.segments)
+        self.scored: list[dict] = []
+        self.feature_rows: list[list[float]] = []
+        clip_start = min(args.seconds / 3, max(0.0, args.seconds - args.clip_seconds))
+        self.clip = (clip_start, min(args.seconds, clip_start + args.clip_seconds))
+
+    def _output(self, name: str) -> Path:
+        self.runs += 1
+        path = self.workdir / "runs" / f"{self.runs}_{name}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def download(self) -> dict:
+        output = self._output("download")
+        (output / "info").mkdir(parents=True)
+        fetcher = MediaFetcher(InfoCache(output / "info", ttl=0))
+        info = fetcher.download(
+            self.url,
+            {
+                "format": AUDIO_FORMAT,
+                "outtmpl": str(output / "media.%(ext)s"),
+                "noplaylist": True,
+                "quiet": True,
+                "noprogress": True,
+            },
+        )
+        return {
+            "format": info.get("format_id"),
+            "bytes": sum(f.stat().st_size for f in output.glob("media.*")),
+        }
+
+    def decode(self) -> dict:
+        samples = decode_pcm(str(self.source), self.pcm_path)
+        self.audio = open_pcm(self.pcm_path)
+        return {"audio_seconds": samples / SAMPLE_RATE}
+
+    def loudness_stage(self) -> dict:
+        self.loudness = analyze_loudness_array(self._audio())
+        return {}
+
+    def transcribe(self) -> dict:
+        model = model_registry.get(*DEFAULT_MODEL_KEY)
+        segments, _ = model.transcribe(np.array(self._audio()), **TRANSCRIBE_OPTIONS)
+        records = [segment_record(s) for s in segments]
+        return {"model": DEFAULT_MODEL_KEY.label(), "segments": len(records)}
+
+    def features(self) -> dict:
+        # Same incremental path analyze_video takes, from a cold sentiment cache.
+        sentiment_engine.clear()
+        stream = StreamingAnalysis(segment_features, weight_vector(WEIGHTS))
+        if self.loudness is not None:
+            stream.feature_kwargs["loudness"] = self.loudness
+        for segment in self.segments:
+            stream.add(segment)
+            if stream.batch_ready():
+                stream.score_pending()
+        stream.score_pending()
+        self.scored = stream.scored_segments
+        self.feature_rows = stream.feature_rows
+        return {"segments": len(self.scored)}
+
+    def clip_search(self) -> dict:
+        scored = self._scored()
+        windows = find_top_windows(
+            [s["start"] for s in scored],
+            [s["end"] for s in scored],
+            [s["score"] for s in scored],
+            k=5,
+        )
+        return {"windows": len(windows)}
+
+    def rerank(self) -> dict:
+        scored = self._scored()
+        features = ProjectFeatures(scored, self.feature_rows)
+        return {
+            "candidates": len(features.candidates.first),
+            "windows": len(features.rank(WEIGHTS)),
+        }
+
+    def render(self, mode: str) -> dict:
+        start, end = self.clip
+        effects = None
+        if mode == "reencode":
+            effects = []
+            plan = plan_crop(str(self.source), start, end)
+            if plan is not None:
+                effects.append(crop_effect(plan))
+            words = [
+                w
+                for s in self.segments
+                for w in s["words"]
+                if w["end"] > start and w["start"] < end
+            ]
+            effects.append(caption_effect(words, offset=start))
+        output = self._output(f"render_{mode}.mp4")
+        result = render_clip(
+            str(self.source),
+            start,
+            end,
+            str(output),
+            mode,
+            effects,
+            # A progress callback keeps moviepy's bars off stdout.
+            progress=lambda fraction: None,
+        )
+        return {
+            "mode": result["mode"],
+            "clip_seconds": end - start,
+            "bytes": output.stat().st_size,
+        }
+
+    def _audio(self) -> np.ndarray:
+        if self.audio is None:
+            self.decode()
+        return self.audio
+
+    def _scored(self) -> list[dict]:
+        if not self.scored:
+            self.features()
+        return self.scored
+
+    def warm_up(self, name: str) -> None:
+        # Model loading is a startup cost, not part of the stage being timed.
+        if name == "transcribe":
+            model_registry.get(*DEFAULT_MODEL_KEY)
+
+    def stage(self, name: str) -> Callable[[], dict]:
+        if name == "loudness":
+            return self.loudness_stage
+        if name.startswith("render_"):
+            return functools.partial(self.render, name.removeprefix("render_"))
+        return getattr(self, name)
+
+
+def time_stage(fn: Callable[[], dict], repeat: int) -> dict:
+    runs = []
+    details = {}
+    for _ in range(repeat):
+        started = time.perf_counter()
+        details = fn()
+        runs.append(time.perf_counter() - started)
+    return {
+        "seconds": statistics.median(runs),
+        "min_seconds": min(runs),
+        "runs": runs,
+        **details,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> dict:
+    comparison = {}
+    for name, stage in results["stages"].items():
+        before = baseline.get("stages", {}).get(name, {})
+        if "seconds" not in stage or "seconds" not in before:
+            continue
+        ratio = stage["seconds"] / max(before["seconds"], 1e-9)
+        if ratio > 1 + tolerance:
+            verdict = "slower"
+        elif ratio < 1 - tolerance:
+            verdict = "faster"
+        else:
+            verdict = "unchanged"
+        comparison[name] = {
+            "baseline_seconds": before["seconds"],
+            "seconds": stage["seconds"],
+            "ratio": ratio,
+            "verdict": verdict,
+        }
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline stage timings")
+    parser.add_argument("--seconds", type=float, default=180.0)
+    parser.add_argument("--segments", type=int, help="default: one per 4s of media")
+    parser.add_argument("--clip-seconds", type=float, default=30.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--output", help="also write the JSON results here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+    if args.segments is None:
+        args.segments = max(1, int(args.seconds / 4))
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as tmp:
+        workdir = Path(tmp)
+        source = workdir / "serve" / "source.mp4"
+        source.parent.mkdir()
+        started = time.perf_counter()
+        synthetic_media(source, args.seconds)
+        generate_seconds = time.perf_counter() - started
+        results = {}
+        with LocalServer(source.parent) as server:
+            pipeline = Pipeline(workdir, source, server.url(source.name), args)
+            for name in stages:
+                try:
+                    pipeline.warm_up(name)
+                    results[name] = time_stage(pipeline.stage(name), args.repeat)
+                except Exception as e:
+                    # A missing local Whisper model should not hide the rest.
+                    results[name] = {"error": f"{type(e).__name__}: {e}"}
+                print(
+                    f"{name}: {results[name].get('seconds', 'failed')}", file=sys.stderr
+                )
+
+    report = {
+        "media_seconds": args.seconds,
+        "segments": args.segments,
+        "clip_seconds": args.clip_seconds,
+        "repeat": args.repeat,
+        "cpu_count": os.cpu_count(),
+        "generate_seconds": generate_seconds,
+        "stages": results,
+    }
+    regressed = False
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        # Timings from a different workload size are not comparable.
+        mismatched = [k for k in WORKLOAD_KEYS if baseline.get(k) != report[k]]
+        if mismatched:
+            report["baseline_mismatch"] = mismatched
+        report["comparison"] = compare(report, baseline, args.tolerance)
+        regressed = any(c["verdict"] == "slower" for c in report["comparison"].values())
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    print(text)
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
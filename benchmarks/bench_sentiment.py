@@ -0,0 +1,107 @@
+import argparse
+import json
+import random
+import time
+
+import numpy as np
+from textblob import TextBlob
+
+from app.services.scoring import segment_features
+from app.services.sentiment import (
+    LexiconBackend,
+    SentimentEngine,
+    TextBlobBackend,
+)
+
+VOCABULARY = (
+    "I really love this it's not good at all but the game was amazing you know "
+    "what I mean honestly terrible very bad so great wow don't never happy sadly "
+    "incredible boring we should talk about that crazy moment right now"
+).split()
+REPEATED = [
+    " Don't forget to like and subscribe!",
+    " This episode is brought to you by our amazing sponsor.",
+    " Welcome back to the show.",
+    " Yeah.",
+    " You know what I mean?",
+]
+
+
+def synthetic_segments(count: int, repeat_ratio: float, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    segments = []
+    t = 0.0
+    for _ in range(count):
+        if rng.random() < repeat_ratio:
+            text = rng.choice(REPEATED)
+        else:
+            words = rng.choices(VOCABULARY, k=rng.randint(3, 30))
+            text = " " + " ".join(words) + rng.choice([".", "!", "?", ","])
+        duration = rng.uniform(1.0, 8.0)
+        segments.append({"start": t, "end": t + duration, "text": text})
+        t += duration
+    return segments
+
+
+def legacy_features(segments: list[dict]) -> np.ndarray:
+    rows = []
+    for seg in segments:
+        blob = TextBlob(seg["text"])
+        sentiment = blob.sentiment.polarity
+        subjectivity = blob.sentiment.subjectivity
+        word_count = len(seg["text"].split())
+        duration = seg["end"] - seg["start"]
+        wps = word_count / duration if duration > 0 else 0
+        rows.append([(sentiment + 1) / 2, subjectivity, min(wps / 5, 1.0)])
+    return np.array(rows, dtype=np.float64)
+
+
+def timed(fn, segments: list[dict], **kwargs) -> tuple[float, np.ndarray]:
+    started = time.perf_counter()
+    result = fn(segments, **kwargs)
+    return len(segments) / (time.perf_counter() - started), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiment feature throughput")
+    parser.add_argument("--segments", type=int, default=5000)
+    parser.add_argument("--repeat-ratio", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    segments = synthetic_segments(args.segments, args.repeat_ratio)
+    rates = {}
+    diffs = {}
+    rates["legacy_textblob_loop"], legacy = timed(legacy_features, segments)
+
+    engines = {
+        "engine_textblob": SentimentEngine(TextBlobBackend()),
+        "engine_lexicon": SentimentEngine(LexiconBackend()),
+        "engine_lexicon_pool": SentimentEngine(
+            LexiconBackend(), workers=args.workers
+        ),
+    }
+    for name, engine in engines.items():
+        rates[f"{name}_cold"], features = timed(
+            segment_features, segments, engine=engine
+        )
+        rates[f"{name}_warm"], _ = timed(segment_features, segments, engine=engine)
+        # The legacy loop predates the loudness column.
+        diffs[name] = float(np.abs(features[:, : legacy.shape[1]] - legacy).max())
+        engine.shutdown()
+
+    print(
+        json.dumps(
+            {
+                "segments": args.segments,
+                "repeat_ratio": args.repeat_ratio,
+                "segments_per_sec": rates,
+                "max_abs_diff_vs_legacy": diffs,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
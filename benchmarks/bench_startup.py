@@ -0,0 +1,116 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Stacks that only pipeline stages need; none should load with the app.
+HEAVY_MODULES = (
+    "faster_whisper",
+    "ctranslate2",
+    "av",
+    "textblob",
+    "nltk",
+    "yt_dlp",
+    "moviepy",
+    "proglog",
+)
+MARKER = "BENCH_STARTUP "
+CHILD = f"""
+import sys
+import app.app
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+print({MARKER!r} + ",".join(loaded))
+"""
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_once() -> dict:
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    env.setdefault("SHORTS_DATA_DIR", tempfile.mkdtemp(prefix="bench_startup_"))
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    seconds = time.perf_counter() - started
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2)) / 1e6
+    marker = [line for line in proc.stdout.splitlines() if line.startswith(MARKER)]
+    heavy = marker[-1].removeprefix(MARKER) if marker else ""
+    return {
+        "seconds": seconds,
+        "modules": modules,
+        "heavy_loaded": [m for m in heavy.split(",") if m],
+    }
+
+
+def top_modules(modules: dict[str, float], top: int) -> list[dict]:
+    # Only our own packages and the heavy stacks are worth tracking by name.
+    roots = ("app", "reflex", "numpy") + HEAVY_MODULES
+    tracked = [
+        (name, seconds)
+        for name, seconds in modules.items()
+        if name.split(".")[0] in roots and name.count(".") <= 2
+    ]
+    tracked.sort(key=lambda item: item[1], reverse=True)
+    return [{"module": name, "seconds": seconds} for name, seconds in tracked[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time of the app")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="also write the JSON results here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.repeat):
+        runs.append(import_once())
+        print(f"import: {runs[-1]['seconds']:.3f}s", file=sys.stderr)
+    # The first run also pays for cold .pyc and page caches.
+    fastest = min(runs, key=lambda run: run["seconds"])
+    modules = fastest["modules"]
+    report = {
+        "repeat": args.repeat,
+        "seconds": statistics.median(run["seconds"] for run in runs),
+        "min_seconds": fastest["seconds"],
+        "runs": [run["seconds"] for run in runs],
+        "app_import_seconds": modules.get("app.app"),
+        "heavy_loaded": sorted({m for run in runs for m in run["heavy_loaded"]}),
+        "top_modules": top_modules(modules, args.top),
+    }
+    regressed = bool(report["heavy_loaded"])
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        ratio = report["seconds"] / max(baseline["seconds"], 1e-9)
+        report["comparison"] = {
+            "baseline_seconds": baseline["seconds"],
+            "seconds": report["seconds"],
+            "ratio": ratio,
+        }
+        regressed = regressed or ratio > 1 + args.tolerance
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    print(text)
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
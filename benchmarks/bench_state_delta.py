@@ -0,0 +1,183 @@
+import argparse
+import json
+import math
+import os
+import tempfile
+import uuid
+
+os.environ.setdefault("SHORTS_DATA_DIR", tempfile.mkdtemp(prefix="bench_state_"))
+
+import reflex as rx
+from reflex.utils.format import json_dumps
+
+import app.app  # noqa: F401  registers the state tree
+from app.services.progress import ProgressThrottle
+from app.services.project_store import project_store
+from app.states.video_state import (
+    PROJECTS_PAGE_SIZE,
+    VideoState,
+    format_clip_range,
+    format_duration,
+)
+
+
+class LegacyVideoState(rx.State):
+    # Mirrors the pre-normalization shape: the whole page is one list of
+    # project dicts (clips nested), plus a computed copy for display, and a
+    # progress tick replaces one element of that list.
+    video_projects: list[dict] = []
+
+    @rx.var
+    def formatted_video_projects(self) -> list[dict]:
+        return [
+            {
+                **p,
+                "duration_str": format_duration(p["duration"]),
+                "clips": [
+                    {**c, "duration_str": format_clip_range(c["start"], c["end"])}
+                    for c in p["clips"]
+                ],
+            }
+            for p in self.video_projects
+        ]
+
+    def _load_project_page(self):
+        self.video_projects = project_store.list_projects(0, PROJECTS_PAGE_SIZE)
+
+    def _update_project_status(self, project_id: str, progress: int):
+        for i, proj in enumerate(self.video_projects):
+            if proj["id"] == project_id:
+                self.video_projects[i] = {**proj, "progress": progress}
+                break
+
+
+def seed_projects(count: int, clips: int) -> list[str]:
+    ids = []
+    for i in range(count):
+        project_id = str(uuid.uuid4())
+        project_store.create_project(
+            {
+                "id": project_id,
+                "url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+                "title": f"Benchmark project {i} with a typical length title",
+                "thumbnail": "https://i.ytimg.com/vi/dQw4w9WgXcQ/maxresdefault.jpg",
+                "duration": 1800,
+                "status": "complete",
+                "progress": 100,
+                "file_path": f"videos/{project_id}.mp4",
+                "audio_path": f"audio/{project_id}.pcm",
+                "error_message": None,
+                "video_status": "ready",
+            }
+        )
+        project_store.replace_clips(
+            project_id,
+            [
+                {
+                    "id": str(uuid.uuid4()),
+                    "video_id": project_id,
+                    "start": 60.0 * k,
+                    "end": 60.0 * k + 45.0,
+                    "text": "word " * 120,
+                    "score": 0.5,
+                    "status": "pending",
+                    "progress": 0,
+                }
+                for k in range(clips)
+            ],
+        )
+        ids.append(project_id)
+    return ids
+
+
+class LegacyPush:
+    # The old progress hook pushed on every call, and the user-011 poller on
+    # every poll, whether or not the value had changed.
+    def __init__(self, poll_hz: float = 0.0):
+        self.interval = 1.0 / poll_hz if poll_hz > 0 else 0.0
+        self.last_time = -math.inf
+
+    def ready(self, value: int, now: float) -> bool:
+        if now - self.last_time < self.interval:
+            return False
+        self.last_time = now
+        return True
+
+
+def simulate_download(
+    project_id: str,
+    ticks: int,
+    seconds: float,
+    throttle: ProgressThrottle | LegacyPush,
+    state_class: type[rx.State] = VideoState,
+) -> dict:
+    root = rx.State(_reflex_internal_init=True)
+    state = root.get_substate(state_class.get_full_name().split("."))
+    state._load_project_page()
+    root._clean()
+    throttle.ready(0, now=0.0)
+    deltas = 0
+    sent = 0
+    for i in range(ticks + 1):
+        progress = int(100 * i / ticks)
+        if not throttle.ready(progress, now=i * seconds / ticks):
+            continue
+        state._update_project_status(project_id, progress=progress)
+        delta = root.get_delta()
+        root._clean()
+        if delta:
+            deltas += 1
+            sent += len(json_dumps(delta))
+    return {
+        "deltas": deltas,
+        "bytes": sent,
+        "bytes_per_delta": round(sent / deltas, 1) if deltas else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Websocket bytes per download")
+    parser.add_argument("--projects", type=int, default=12)
+    parser.add_argument("--clips", type=int, default=5)
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--max-hz", type=float, default=4.0)
+    parser.add_argument("--min-step", type=int, default=1)
+    args = parser.parse_args()
+
+    project_id = seed_projects(args.projects, args.clips)[-1]
+    results = {
+        "legacy_per_tick": simulate_download(
+            project_id, args.ticks, args.seconds, LegacyPush(), LegacyVideoState
+        ),
+        "legacy_polled_2hz": simulate_download(
+            project_id, args.ticks, args.seconds, LegacyPush(2.0), LegacyVideoState
+        ),
+        "unthrottled": simulate_download(
+            project_id, args.ticks, args.seconds, ProgressThrottle(0, 0)
+        ),
+        "throttled": simulate_download(
+            project_id,
+            args.ticks,
+            args.seconds,
+            ProgressThrottle(args.max_hz, args.min_step),
+        ),
+    }
+    print(
+        json.dumps(
+            {
+                "projects": args.projects,
+                "clips_per_project": args.clips,
+                "hook_ticks": args.ticks,
+                "download_seconds": args.seconds,
+                "max_hz": args.max_hz,
+                "min_step": args.min_step,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# The services open their stores at import time; point them at a scratch
+# directory before any test module imports them.
+_scratch = tempfile.mkdtemp(prefix="shorts_tests_")
+os.environ.setdefault("SHORTS_DATA_DIR", os.path.join(_scratch, "data"))
+os.environ.setdefault("REFLEX_UPLOADED_FILES_DIR", os.path.join(_scratch, "uploads"))
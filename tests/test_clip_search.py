@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from app.services.clip_search import (
+    candidate_windows,
+    duration_bounds,
+    find_top_windows,
+    select_windows,
+)
+
+
+def segments(n: int, seed: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    starts = np.cumsum(rng.uniform(0.5, 8.0, n))
+    ends = np.maximum.accumulate(starts + rng.uniform(0.5, 10.0, n))
+    return starts, ends, rng.uniform(-1.0, 1.0, n)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_duration_bounds_matches_brute_force(seed):
+    starts, ends, _ = segments(60, seed)
+    lo, hi = duration_bounds(starts, ends, 15.0, 60.0)
+    for i in range(len(starts)):
+        fits = [j for j in range(i, len(starts)) if ends[j] - starts[i] >= 15.0]
+        under = [j for j in range(i, len(starts)) if ends[j] - starts[i] <= 60.0]
+        assert lo[i] == (fits[0] if fits else len(starts))
+        assert hi[i] == (under[-1] if under else i - 1)
+
+
+def test_candidates_cover_every_window_in_bounds():
+    starts, ends, _ = segments(40, 7)
+    found = candidate_windows(starts, ends, 15.0, 60.0)
+    expected = {
+        (i, j)
+        for i in range(len(starts))
+        for j in range(i, len(starts))
+        if 15.0 <= ends[j] - starts[i] <= 60.0
+    }
+    assert set(zip(found.first.tolist(), found.last.tolist())) == expected
+    assert np.array_equal(found.start, starts[found.first])
+    assert np.array_equal(found.end, ends[found.last])
+
+
+def test_select_windows_takes_the_best_non_overlapping():
+    starts, ends, scores = segments(80, 3)
+    candidates = candidate_windows(starts, ends, 15.0, 60.0)
+    windows = select_windows(candidates, scores, k=5, min_gap=2.0)
+    assert 0 < len(windows) <= 5
+    best = max(
+        scores[i : j + 1].mean()
+        for i, j in zip(candidates.first.tolist(), candidates.last.tolist())
+    )
+    assert windows[0].score == pytest.approx(best)
+    assert [w.score for w in windows] == sorted(
+        (w.score for w in windows), reverse=True
+    )
+    for w in windows:
+        assert w.score == pytest.approx(scores[w.first : w.last + 1].mean())
+        assert 15.0 <= w.end - w.start <= 60.0
+    for a in windows:
+        for b in windows:
+            if a is not b:
+                assert b.start >= a.end + 2.0 or b.end + 2.0 <= a.start
+
+
+def test_select_windows_stops_when_nothing_fits():
+    starts = np.array([0.0, 20.0])
+    ends = np.array([18.0, 38.0])
+    candidates = candidate_windows(starts, ends, 15.0, 60.0)
+    windows = select_windows(candidates, [1.0, 0.5], k=5)
+    assert [(w.first, w.last) for w in windows] == [(0, 0), (1, 1)]
+
+
+def test_empty_inputs_give_no_windows():
+    assert find_top_windows([], [], [], k=5) == []
+    assert find_top_windows([0.0], [5.0], [1.0], k=5) == []
+    assert find_top_windows([0.0], [20.0], [1.0], k=0) == []
+    assert select_windows(candidate_windows([], []), [], k=3) == []
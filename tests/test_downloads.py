@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.services.downloads import HostRateLimiter, with_retries
+
+
+def test_with_retries_returns_the_first_success():
+    attempts = []
+
+    async def attempt():
+        attempts.append(len(attempts))
+        if len(attempts) < 3:
+            raise OSError("connection reset")
+        return "done"
+
+    assert asyncio.run(with_retries(attempt, "fetch", retries=3, backoff=0)) == "done"
+    assert len(attempts) == 3
+
+
+def test_with_retries_reraises_after_the_last_attempt():
+    attempts = []
+
+    async def attempt():
+        attempts.append(None)
+        raise OSError("still down")
+
+    with pytest.raises(OSError, match="still down"):
+        asyncio.run(with_retries(attempt, "fetch", retries=2, backoff=0))
+    assert len(attempts) == 3
+
+
+def test_host_limiter_spaces_starts_per_host():
+    limiter = HostRateLimiter(0.05)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        began = loop.time()
+        starts = {}
+
+        async def fetch(name, url):
+            await limiter.wait(url)
+            starts[name] = loop.time() - began
+
+        await asyncio.gather(
+            fetch("a1", "https://a.example/1"),
+            fetch("a2", "https://a.example/2"),
+            fetch("a3", "https://a.example/3"),
+            fetch("b1", "https://b.example/1"),
+        )
+        return starts
+
+    starts = asyncio.run(run())
+    assert starts["b1"] < 0.04
+    assert starts["a1"] < 0.04
+    assert starts["a2"] >= 0.045
+    assert starts["a3"] >= 0.095
@@ -0,0 +1,127 @@
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.media_fetch import InfoCache, MediaFetcher
+
+PAYLOAD = bytes(range(256)) * 2048
+RANGE = re.compile(r"bytes=(\d+)-(\d*)")
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    requests: list[tuple[str, str | None]]
+
+    def do_HEAD(self):
+        self.reply(head=True)
+
+    def do_GET(self):
+        self.reply(head=False)
+
+    def reply(self, head: bool):
+        header = self.headers.get("Range")
+        self.requests.append((self.command, header))
+        if self.path != "/clip.mp4":
+            self.send_error(404)
+            return
+        start, end = 0, len(PAYLOAD) - 1
+        match = RANGE.fullmatch(header or "")
+        if match:
+            start = int(match.group(1))
+            if match.group(2):
+                end = min(end, int(match.group(2)))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(PAYLOAD)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        if not head:
+            try:
+                self.wfile.write(PAYLOAD[start : end + 1])
+            except (BrokenPipeError, ConnectionResetError):
+                # The extractor only sniffs the start of the body.
+                pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    handler = type("Handler", (MediaHandler,), {"requests": []})
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/clip.mp4", handler.requests
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    return MediaFetcher(InfoCache(tmp_path / "info", ttl=60))
+
+
+def options(tmp_path, name: str, **extra) -> dict:
+    return {
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "outtmpl": str(tmp_path / f"{name}.%(ext)s"),
+        **extra,
+    }
+
+
+def covered(ranges: list[str]) -> list[tuple[int, int]]:
+    spans = []
+    for header in ranges:
+        start, end = RANGE.fullmatch(header).groups()
+        spans.append((int(start), int(end) if end else len(PAYLOAD) - 1))
+    return sorted(spans)
+
+
+def test_streamed_download_reuses_extracted_info(tmp_path, server, fetcher):
+    url, requests = server
+    (tmp_path / "info").mkdir()
+    fetcher.extract(url, {"quiet": True, "no_warnings": True})
+    probes = len(requests)
+    assert probes > 0
+    finished = []
+    opts = options(
+        tmp_path,
+        "streamed",
+        progress_hooks=[lambda d: d["status"] == "finished" and finished.append(d)],
+    )
+    info = fetcher.download(url, opts)
+    assert (tmp_path / "streamed.mp4").read_bytes() == PAYLOAD
+    assert info["requested_downloads"][0]["filepath"] == str(tmp_path / "streamed.mp4")
+    assert len(finished) == 1
+    # Only the media itself is fetched; the extraction probe is not repeated.
+    assert [method for method, _ in requests[probes:]] == ["GET"]
+
+
+def test_ranged_download_fetches_in_chunks(tmp_path, server, fetcher):
+    url, requests = server
+    (tmp_path / "info").mkdir()
+    chunked = options(tmp_path, "first", http_chunk_size=100_000)
+    fetcher.download(url, chunked)
+    assert (tmp_path / "first.mp4").read_bytes() == PAYLOAD
+    probes = [header for _, header in requests if header is None]
+    assert len(probes) == 1
+
+    requests.clear()
+    fetcher.download(url, options(tmp_path, "second", http_chunk_size=100_000))
+    assert (tmp_path / "second.mp4").read_bytes() == PAYLOAD
+    headers = [header for _, header in requests]
+    # The cached info is reused, so every request is a ranged media request.
+    assert None not in headers
+    assert len(headers) > 1
+    spans = covered(headers)
+    assert spans[0][0] == 0
+    assert spans[-1][1] == len(PAYLOAD) - 1
+    for (_, end), (start, _) in zip(spans, spans[1:]):
+        assert start == end + 1
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.services.ingest import (
+    UnknownUpload,
+    claim_upload,
+    stage_upload,
+    staged_bytes,
+    sweep_staging,
+)
+
+TICKET = "a" * 32
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+def stage(staging_dir, filename="clip.mp4", ticket=TICKET):
+    return asyncio.run(
+        stage_upload(chunks(b"abc", b"def"), filename, staging_dir, ticket)
+    )
+
+
+def age(path, seconds: float) -> None:
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_claim_returns_the_server_record_once(tmp_path):
+    staged = stage(tmp_path, "../../etc/My clip.MP4")
+    assert staged["filename"] == "My clip.MP4"
+    assert staged["suffix"] == ".mp4"
+    assert staged["size"] == 6
+    assert claim_upload(tmp_path, staged["upload_id"], TICKET) == staged
+    with pytest.raises(UnknownUpload):
+        claim_upload(tmp_path, staged["upload_id"], TICKET)
+    assert (tmp_path / f"{staged['upload_id']}.upload").read_bytes() == b"abcdef"
+
+
+@pytest.mark.parametrize("ticket", ["", "b" * 32])
+def test_claim_needs_the_staging_ticket(tmp_path, ticket):
+    staged = stage(tmp_path)
+    with pytest.raises(UnknownUpload):
+        claim_upload(tmp_path, staged["upload_id"], ticket)
+    assert claim_upload(tmp_path, staged["upload_id"], TICKET) == staged
+
+
+@pytest.mark.parametrize("upload_id", ["../videos/x", "A" * 32, "", "0" * 31])
+def test_claim_rejects_malformed_ids(tmp_path, upload_id):
+    with pytest.raises(UnknownUpload):
+        claim_upload(tmp_path, upload_id, TICKET)
+
+
+def test_stage_rejects_unsupported_files(tmp_path):
+    with pytest.raises(ValueError):
+        stage(tmp_path, "notes.txt")
+    with pytest.raises(ValueError):
+        stage(tmp_path, "clip.mp4", "")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_sweep_removes_only_expired_files(tmp_path):
+    old = stage(tmp_path)
+    fresh = stage(tmp_path)
+    for path in tmp_path.glob(f"{old['upload_id']}.*"):
+        age(path, 7200)
+    assert staged_bytes(tmp_path) > 12
+    assert sweep_staging(tmp_path, ttl=3600) == 2
+    assert {p.stem for p in tmp_path.iterdir()} == {fresh["upload_id"]}
+    with pytest.raises(UnknownUpload):
+        claim_upload(tmp_path, old["upload_id"], TICKET)
+
+
+def test_claiming_refreshes_the_staged_file(tmp_path):
+    staged = stage(tmp_path)
+    age(tmp_path / f"{staged['upload_id']}.upload", 7200)
+    claim_upload(tmp_path, staged["upload_id"], TICKET)
+    assert sweep_staging(tmp_path, ttl=3600) == 0
+
+
+def test_missing_staging_dir_is_empty(tmp_path):
+    assert staged_bytes(tmp_path / "missing") == 0
+    assert sweep_staging(tmp_path / "missing") == 0
@@ -0,0 +1,186 @@
+import threading
+from typing import ClassVar
+
+import pytest
+from yt_dlp.utils import DownloadError
+
+from app.services.media_fetch import InfoCache, MediaFetcher
+
+WATCH_URL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+SHORT_URL = "https://youtu.be/dQw4w9WgXcQ"
+
+
+def video_info(video_id: str = "dQw4w9WgXcQ") -> dict:
+    return {
+        "id": video_id,
+        "extractor_key": "Youtube",
+        "title": "A video",
+        "webpage_url": f"https://www.youtube.com/watch?v={video_id}",
+        "formats": [{"format_id": "18", "url": "https://example.invalid/v.mp4"}],
+    }
+
+
+class StubYoutubeDL:
+    calls: ClassVar[list[tuple[str, str | None]]] = []
+    info: ClassVar[dict] = {}
+    fail_process: ClassVar[bool] = False
+
+    def __init__(self, opts: dict):
+        self.opts = opts
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def sanitize_info(self, info: dict) -> dict:
+        return info
+
+    def extract_info(self, url: str, download: bool = True) -> dict:
+        self.calls.append(("extract_info", url))
+        return dict(self.info)
+
+    def process_ie_result(self, info: dict, download: bool = True) -> dict:
+        self.calls.append(("process_ie_result", info["id"]))
+        if self.fail_process:
+            raise DownloadError("HTTP Error 403: Forbidden")
+        return {**info, "requested_downloads": [{"filepath": "out.mp4"}]}
+
+
+@pytest.fixture
+def ydl():
+    class Recorder(StubYoutubeDL):
+        calls = []
+        info = video_info()
+        fail_process = False
+
+    return Recorder
+
+
+@pytest.fixture
+def fetcher(tmp_path, ydl):
+    return MediaFetcher(InfoCache(tmp_path, ttl=60), ydl_class=ydl)
+
+
+def test_extract_is_cached(fetcher, ydl):
+    first = fetcher.extract(WATCH_URL, {})
+    second = fetcher.extract(WATCH_URL, {})
+    assert first == second == ydl.info
+    assert ydl.calls == [("extract_info", WATCH_URL)]
+
+
+def test_cache_hit_returns_a_copy(fetcher):
+    fetcher.extract(WATCH_URL, {})["title"] = "changed"
+    assert fetcher.extract(WATCH_URL, {})["title"] == "A video"
+
+
+def test_url_variants_share_one_entry(fetcher, ydl):
+    fetcher.extract(WATCH_URL, {})
+    fetcher.extract(SHORT_URL, {})
+    assert ydl.calls == [("extract_info", WATCH_URL)]
+
+
+def test_download_reuses_extracted_info(fetcher, ydl):
+    fetcher.extract(WATCH_URL, {})
+    result = fetcher.download(WATCH_URL, {})
+    assert result["requested_downloads"] == [{"filepath": "out.mp4"}]
+    assert ydl.calls == [
+        ("extract_info", WATCH_URL),
+        ("process_ie_result", "dQw4w9WgXcQ"),
+    ]
+
+
+def test_download_without_cached_info_extracts_and_caches(fetcher, ydl):
+    fetcher.download(WATCH_URL, {})
+    fetcher.extract(WATCH_URL, {})
+    assert ydl.calls == [("extract_info", WATCH_URL)]
+
+
+def test_expired_info_is_extracted_again(tmp_path, ydl):
+    fetcher = MediaFetcher(InfoCache(tmp_path, ttl=-1), ydl_class=ydl)
+    fetcher.extract(WATCH_URL, {})
+    fetcher.extract(WATCH_URL, {})
+    assert [c[0] for c in ydl.calls] == ["extract_info", "extract_info"]
+
+
+def test_stale_format_urls_fall_back_to_a_fresh_extract(fetcher, ydl):
+    fetcher.extract(WATCH_URL, {})
+    ydl.fail_process = True
+    fetcher.download(WATCH_URL, {})
+    assert ydl.calls == [
+        ("extract_info", WATCH_URL),
+        ("process_ie_result", "dQw4w9WgXcQ"),
+        ("extract_info", WATCH_URL),
+    ]
+    # The failed entry is gone, so the next lookup extracts again.
+    fetcher.extract(WATCH_URL, {})
+    assert ydl.calls[-1] == ("extract_info", WATCH_URL)
+
+
+def test_cache_survives_a_new_process(tmp_path, ydl):
+    MediaFetcher(InfoCache(tmp_path, ttl=60), ydl_class=ydl).extract(SHORT_URL, {})
+    fresh = MediaFetcher(InfoCache(tmp_path, ttl=60), ydl_class=ydl)
+    assert fresh.extract(WATCH_URL, {})["id"] == "dQw4w9WgXcQ"
+    assert len(ydl.calls) == 1
+
+
+def test_unreadable_cache_entry_is_discarded(tmp_path, ydl):
+    cache = InfoCache(tmp_path, ttl=60)
+    MediaFetcher(cache, ydl_class=ydl).extract(WATCH_URL, {})
+    for path in tmp_path.glob("*.json"):
+        path.write_text("{not json")
+    assert InfoCache(tmp_path, ttl=60).get(WATCH_URL) is None
+
+
+def test_expand_flattens_channel_tabs(fetcher, ydl):
+    ydl.info = {
+        "_type": "playlist",
+        "entries": [
+            {"_type": "url", "url": "https://youtu.be/a"},
+            {
+                "_type": "playlist",
+                "entries": [
+                    {"_type": "url", "url": "https://youtu.be/b"},
+                    {"_type": "url", "title": "no url"},
+                ],
+            },
+            {"_type": "url", "webpage_url": "https://youtu.be/c"},
+        ],
+    }
+    entries = fetcher.expand("https://www.youtube.com/@channel", {})
+    assert [e.get("url") or e.get("webpage_url") for e in entries] == [
+        "https://youtu.be/a",
+        "https://youtu.be/b",
+        "https://youtu.be/c",
+    ]
+    limited = fetcher.expand("https://www.youtube.com/@channel", {}, limit=2)
+    assert limited == entries[:2]
+
+
+def test_expand_of_a_single_video_caches_it(fetcher, ydl):
+    assert fetcher.expand(WATCH_URL, {}) == [ydl.info]
+    fetcher.extract(WATCH_URL, {})
+    assert len(ydl.calls) == 1
+
+
+def test_concurrent_puts_of_one_video_all_succeed(tmp_path):
+    cache = InfoCache(tmp_path, ttl=60)
+    urls = [WATCH_URL, SHORT_URL]
+    errors = []
+
+    def put(n: int):
+        try:
+            for _ in range(20):
+                cache.put(urls[n % 2], video_info())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=put, args=(n,)) for n in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert not list(tmp_path.glob("*.part"))
+    assert InfoCache(tmp_path, ttl=60).get(SHORT_URL)["id"] == "dQw4w9WgXcQ"
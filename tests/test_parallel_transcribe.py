@@ -0,0 +1,114 @@
+import numpy as np
+
+from app.services.parallel_transcribe import AudioChunk, SeamStitcher, plan_chunks
+from app.services.transcript_cache import SegmentRecord, WordRecord
+
+RATE = 100
+
+
+def word(start: float, end: float, text: str) -> WordRecord:
+    return WordRecord(start=start, end=end, word=text, probability=0.9)
+
+
+def segment(*words: WordRecord, start=None, end=None, text=None) -> SegmentRecord:
+    return SegmentRecord(
+        start=words[0]["start"] if words else start,
+        end=words[-1]["end"] if words else end,
+        text="".join(w["word"] for w in words) if words else text,
+        words=list(words),
+    )
+
+
+def chunk(keep_start: float, keep_end: float) -> AudioChunk:
+    return AudioChunk(
+        start=int((keep_start - 2) * RATE),
+        end=int((keep_end + 2) * RATE),
+        keep_start=int(keep_start * RATE),
+        keep_end=int(keep_end * RATE),
+    )
+
+
+def texts(records: list[SegmentRecord]) -> list[str]:
+    return [r["text"] for r in records]
+
+
+def test_words_belong_to_the_chunk_owning_their_midpoint():
+    stitcher = SeamStitcher(sample_rate=RATE)
+    left = stitcher.add(
+        chunk(0, 10),
+        [
+            segment(
+                word(8.0, 8.5, " one"), word(9.6, 10.2, " two"), word(10.5, 11, " x")
+            )
+        ],
+    )
+    right = stitcher.add(
+        chunk(10, 20),
+        [
+            segment(
+                word(9.0, 9.6, " y"), word(10.2, 10.6, " three"), word(11, 12, " four")
+            )
+        ],
+    )
+    assert texts(left) == [" one two"]
+    assert texts(right) == [" three four"]
+    assert left[0]["start"] == 8.0 and left[0]["end"] == 10.2
+    assert right[0]["start"] == 10.2
+
+
+def test_a_word_seen_on_both_sides_of_the_seam_is_kept_once():
+    stitcher = SeamStitcher(sample_rate=RATE)
+    left = stitcher.add(chunk(0, 10), [segment(word(9.5, 9.98, " Hello,"))])
+    # The next chunk times the same word slightly later, past the cut.
+    right = stitcher.add(
+        chunk(10, 20), [segment(word(9.7, 10.4, " hello"), word(10.5, 11, " world"))]
+    )
+    assert texts(left) == [" Hello,"]
+    assert texts(right) == [" world"]
+
+
+def test_a_repeated_word_later_in_time_is_kept():
+    stitcher = SeamStitcher(sample_rate=RATE)
+    stitcher.add(chunk(0, 10), [segment(word(9.0, 9.4, " no"))])
+    right = stitcher.add(chunk(10, 20), [segment(word(10.1, 10.5, " no"))])
+    assert texts(right) == [" no"]
+
+
+def test_segments_without_words_are_placed_by_midpoint():
+    stitcher = SeamStitcher(sample_rate=RATE)
+    records = [
+        segment(start=8.0, end=9.0, text=" a"),
+        segment(start=9.5, end=11.0, text=" b"),
+    ]
+    assert texts(stitcher.add(chunk(0, 10), records)) == [" a"]
+    assert texts(stitcher.add(chunk(10, 20), records)) == [" b"]
+
+
+def test_untouched_segments_are_passed_through():
+    stitcher = SeamStitcher(sample_rate=RATE)
+    record = segment(word(1.0, 1.5, " hi"), word(1.6, 2.0, " there"))
+    assert stitcher.add(chunk(0, 10), [record])[0] is record
+
+
+def test_plan_chunks_keeps_contiguous_ranges_cut_at_silence():
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-0.5, 0.5, 100 * RATE).astype(np.float32)
+    audio[29 * RATE : 31 * RATE] = 0.0
+    audio[61 * RATE : 62 * RATE] = 0.0
+    chunks = plan_chunks(audio, sample_rate=RATE, chunk_seconds=30, overlap=2, search=5)
+    assert chunks[0].keep_start == 0
+    assert chunks[-1].keep_end == len(audio)
+    for a, b in zip(chunks, chunks[1:]):
+        assert a.keep_end == b.keep_start
+    for c in chunks:
+        assert c.start == max(0, c.keep_start - 2 * RATE)
+        assert c.end == min(len(audio), c.keep_end + 2 * RATE)
+    assert 29 * RATE <= chunks[1].keep_start < 31 * RATE
+    assert 61 * RATE <= chunks[2].keep_start < 62 * RATE
+
+
+def test_short_audio_is_a_single_chunk():
+    audio = np.zeros(40 * RATE, dtype=np.float32)
+    assert plan_chunks(audio, sample_rate=RATE, chunk_seconds=30) == [
+        AudioChunk(start=0, end=len(audio), keep_start=0, keep_end=len(audio))
+    ]
@@ -0,0 +1,39 @@
+from app.services.progress import ProgressThrottle
+
+
+def test_first_value_always_goes_out():
+    assert ProgressThrottle(max_hz=4).ready(0, now=0.0)
+
+
+def test_updates_are_rate_limited():
+    throttle = ProgressThrottle(max_hz=4, min_step=1)
+    sent = [v for v in range(100) if throttle.ready(v, now=v * 0.01)]
+    # 0.25s apart on a 0.01s tick.
+    assert sent == list(range(0, 100, 25))
+
+
+def test_small_steps_are_held_back():
+    throttle = ProgressThrottle(max_hz=0, min_step=5)
+    sent = [v for v in range(20) if throttle.ready(v, now=float(v))]
+    assert sent == [0, 5, 10, 15]
+
+
+def test_repeated_values_are_dropped():
+    throttle = ProgressThrottle(max_hz=0, min_step=1)
+    assert throttle.ready(10, now=0.0)
+    assert not throttle.ready(10, now=5.0)
+    assert throttle.ready(100, now=6.0)
+    assert not throttle.ready(100, now=7.0)
+
+
+def test_completion_is_never_throttled():
+    throttle = ProgressThrottle(max_hz=1, min_step=10)
+    assert throttle.ready(95, now=0.0)
+    assert not throttle.ready(99, now=0.1)
+    assert throttle.ready(100, now=0.2)
+
+
+def test_progress_can_move_backwards():
+    throttle = ProgressThrottle(max_hz=0, min_step=5)
+    assert throttle.ready(50, now=0.0)
+    assert throttle.ready(0, now=1.0)
@@ -0,0 +1,68 @@
+import os
+import time
+
+import pytest
+
+from app.services.render_queue import RenderScheduler
+
+
+def crash(job_id: str) -> None:
+    os._exit(1)
+
+
+def finish(job_id: str) -> dict:
+    return {"mode": "smart", "job_id": job_id}
+
+
+class StubScheduler(RenderScheduler):
+    def _start(self, executor, job):
+        return executor.submit(
+            crash if job.video_path == "crash" else finish, job.job_id
+        )
+
+
+def submit(scheduler: RenderScheduler, job_id: str, video_path: str = "ok"):
+    return scheduler.submit(job_id, "project", video_path, 0.0, 10.0, "out.mp4")
+
+
+def wait(*jobs, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not all(job.done for job in jobs):
+        if time.monotonic() > deadline:
+            pytest.fail(f"jobs never finished: {[job.status for job in jobs]}")
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = StubScheduler(max_workers=1)
+    yield scheduler
+    if scheduler._executor is not None:
+        scheduler._executor.shutdown(cancel_futures=True)
+
+
+def test_jobs_run_in_priority_order(scheduler):
+    jobs = [submit(scheduler, f"clip-{n}") for n in range(3)]
+    wait(*jobs)
+    assert [job.status for job in jobs] == ["complete"] * 3
+    assert jobs[1].result == {"mode": "smart", "job_id": "clip-1"}
+    assert scheduler.stats() == {"max_workers": 1, "running": 0, "queued": 0}
+
+
+def test_a_crashed_worker_does_not_wedge_the_queue(scheduler):
+    crashed = submit(scheduler, "clip-crash", "crash")
+    queued = submit(scheduler, "clip-next")
+    wait(crashed, queued)
+    assert crashed.status == "error"
+    assert crashed.error == "Render worker crashed"
+    # The queued job either died with the pool or ran on a fresh one; it
+    # never stays "running".
+    assert queued.status in ("complete", "error")
+    assert scheduler.stats()["running"] == 0
+
+    retried = submit(scheduler, "clip-crash")
+    later = submit(scheduler, "clip-later")
+    wait(retried, later)
+    assert retried is not crashed
+    assert (retried.status, later.status) == ("complete", "complete")
+    assert scheduler.stats() == {"max_workers": 1, "running": 0, "queued": 0}
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from app.services.waveform import (
+    TILE_PEAKS,
+    PeakPyramid,
+    build_peaks,
+    level_lengths,
+)
+
+BLOCK = 64
+
+
+@pytest.fixture
+def audio(tmp_path):
+    rng = np.random.default_rng(1)
+    samples = rng.uniform(-1.0, 1.0, BLOCK * 5000 + 17).astype(np.float32)
+    path = tmp_path / "audio.pcm"
+    samples.tofile(path)
+    return path, samples
+
+
+def build(tmp_path, pcm_path, **kwargs) -> PeakPyramid:
+    out = tmp_path / "peaks" / "audio.peaks"
+    build_peaks(pcm_path, out, block=BLOCK, sample_rate=16000, **kwargs)
+    assert list(out.parent.iterdir()) == [out]
+    return PeakPyramid(out)
+
+
+def test_level_lengths_halve_down_to_one_tile():
+    assert level_lengths(0) == [0]
+    assert level_lengths(TILE_PEAKS) == [TILE_PEAKS]
+    assert level_lengths(5001) == [5001, 2501, 1251, 626]
+
+
+def test_base_level_matches_block_min_max(tmp_path, audio):
+    pcm_path, samples = audio
+    pyramid = build(tmp_path, pcm_path)
+    count = -(-len(samples) // BLOCK)
+    assert pyramid.lengths == level_lengths(count)
+    padded = np.pad(samples, (0, count * BLOCK - len(samples)), mode="edge")
+    frames = padded.reshape(count, BLOCK)
+    expected = np.stack([frames.min(axis=1), frames.max(axis=1)], axis=1)
+    base = np.concatenate([pyramid.tile(0, i) for i in range(-(-count // TILE_PEAKS))])
+    assert np.array_equal(base, np.round(expected * 127).astype(np.int8))
+
+
+def test_tiles_slice_each_level(tmp_path, audio):
+    pyramid = build(tmp_path, audio[0])
+    for level, length in enumerate(pyramid.lengths):
+        tiles = -(-length // TILE_PEAKS)
+        sizes = [len(pyramid.tile(level, i)) for i in range(tiles)]
+        assert sizes[:-1] == [TILE_PEAKS] * (tiles - 1)
+        assert sizes[-1] == length - (tiles - 1) * TILE_PEAKS
+        with pytest.raises(IndexError):
+            pyramid.tile(level, tiles)
+    with pytest.raises(IndexError):
+        pyramid.tile(len(pyramid.lengths), 0)
+    with pytest.raises(IndexError):
+        pyramid.tile(0, -1)
+
+
+def test_upper_levels_keep_the_envelope(tmp_path, audio):
+    pyramid = build(tmp_path, audio[0])
+    below = pyramid.tile(0, 0)[:16]
+    above = pyramid.tile(1, 0)[:8]
+    assert np.array_equal(above[:, 0], below[:, 0].reshape(8, 2).min(axis=1))
+    assert np.array_equal(above[:, 1], below[:, 1].reshape(8, 2).max(axis=1))
+
+
+def test_meta_reports_the_layout(tmp_path, audio):
+    pyramid = build(tmp_path, audio[0])
+    meta = pyramid.meta()
+    assert meta["levels"] == pyramid.lengths
+    assert meta["tile_size"] == TILE_PEAKS
+    assert meta["duration"] == pytest.approx(pyramid.lengths[0] * BLOCK / 16000)
+
+
+def test_empty_audio_has_no_tiles(tmp_path):
+    pcm_path = tmp_path / "empty.pcm"
+    pcm_path.touch()
+    pyramid = build(tmp_path, pcm_path)
+    assert pyramid.lengths == [0]
+    with pytest.raises(IndexError):
+        pyramid.tile(0, 0)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not.peaks"
+    path.write_bytes(b"RIFF" + bytes(20))
+    with pytest.raises(ValueError):
+        PeakPyramid(path)